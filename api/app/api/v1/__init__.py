@@ -1,7 +1,9 @@
 from fastapi import APIRouter
 
-from app.api.v1 import products, stats
+from app.api.v1 import analytics, events, products, stats
 
 api_router = APIRouter()
 api_router.include_router(products.router, prefix="/products", tags=["products"])
-api_router.include_router(stats.router, prefix="/stats", tags=["statistics"]) 
\ No newline at end of file
+api_router.include_router(stats.router, prefix="/stats", tags=["statistics"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"]) 
\ No newline at end of file
@@ -0,0 +1,95 @@
+import threading
+from typing import Any, Dict, List
+from fastapi import APIRouter, HTTPException, Request
+
+from app.core.config import settings
+from app.core.negotiation import negotiate
+
+try:
+    from data_manager import analytics
+except ImportError:
+    analytics = None
+
+router = APIRouter()
+
+# DuckDB connection shared by all requests; each request uses its own cursor
+_connection = None
+_connection_lock = threading.Lock()
+
+
+def get_connection():
+    """
+    Open the analytics connection on first use
+    """
+    global _connection
+    if _connection is None:
+        with _connection_lock:
+            if _connection is None:
+                if settings.ANALYTICS_SOURCE == "postgres":
+                    _connection = analytics.connect(
+                        postgres_uri=str(settings.SQLALCHEMY_DATABASE_URI),
+                        database=settings.ANALYTICS_DATABASE,
+                    )
+                else:
+                    _connection = analytics.connect(
+                        parquet_dir=settings.ANALYTICS_PARQUET_DIR,
+                        database=settings.ANALYTICS_DATABASE,
+                    )
+    return _connection
+
+
+def parse_params(name: str, query_params) -> Dict[str, Any]:
+    """
+    Convert query string values to the types of the query's parameter defaults
+    """
+    defaults = analytics.QUERIES[name]["params"]
+    params = {}
+    for key, value in query_params.items():
+        if key not in defaults:
+            raise HTTPException(status_code=400, detail=f"Unknown parameter: {key}")
+        default = defaults[key]
+        try:
+            params[key] = type(default)(value) if default is not None else value
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid value for {key}: {value}")
+    return params
+
+
+def require_analytics():
+    if analytics is None:
+        raise HTTPException(status_code=503, detail="Analytics engine is not installed (duckdb)")
+
+
+@router.get("/", response_model=List[Dict[str, Any]])
+def list_queries():
+    """
+    List the available analytics queries and their parameters
+    """
+    require_analytics()
+    return [
+        {"name": name, "description": query["description"], "params": query["params"]}
+        for name, query in analytics.QUERIES.items()
+    ]
+
+
+@router.get("/{name}", response_model=List[Dict[str, Any]])
+def run_query(name: str, request: Request):
+    """
+    Run a canned analytics query; parameters are passed in the query string
+    """
+    require_analytics()
+    if name not in analytics.QUERIES:
+        raise HTTPException(status_code=404, detail=f"Unknown query: {name}")
+    params = parse_params(name, request.query_params)
+
+    try:
+        cursor = get_connection().cursor()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    try:
+        rows = analytics.run_arrow(cursor, name, **params).to_pylist()
+    finally:
+        cursor.close()
+
+    return negotiate(request, rows, fast=True)
@@ -0,0 +1,55 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.events import change_broker
+
+router = APIRouter()
+
+
+def format_sse(event):
+    """
+    Format a change event as a Server-Sent Events message
+    """
+    data = json.dumps(event, ensure_ascii=False)
+    return f"event: {event.get('type', 'change')}\ndata: {data}\n\n"
+
+
+@router.get("/stream")
+async def stream_changes(
+    request: Request,
+    brand: Optional[str] = Query(None, description="Only send changes for this brand"),
+    store: Optional[str] = Query(None, description="Only send changes for this store label or source name"),
+    uniqueid: Optional[str] = Query(None, description="Only send changes for this product unique ID"),
+    type: Optional[str] = Query(None, description="Only send this event type (price, availability or new)"),
+):
+    """
+    Stream live price and availability changes as Server-Sent Events
+    """
+    subscription = change_broker.subscribe(brand=brand, store=store, uniqueid=uniqueid, type=type)
+
+    async def event_generator():
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(),
+                        timeout=settings.EVENTS_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            change_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,15 +1,45 @@
+from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import desc, asc, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY
 
 from app.db.database import get_db
 from app.models.product import Product
-from app.schemas.product import ProductList
+from app.schemas.product import ProductList, ProductLookupRequest, ProductLookupResponse
 from app.core.config import settings
+from app.core.negotiation import negotiate
+from data_manager.downsample import downsample_indices
 
 router = APIRouter()
 
+# Response field name -> Product model column, used for field projection
+FIELD_COLUMNS = {
+    "uniqueID": "unique_id",
+    "title": "title",
+    "store_label": "store_label",
+    "category": "category",
+    "subcategory": "subcategory",
+    "source_name": "source_name",
+    "image": "image_url",
+    "currency": "currency",
+    "price": "current_price",
+    "brand": "brand",
+    "availability": "availability",
+    "link": "link",
+    "source_link": "source_link",
+    "clicks": "clicks",
+    "clicksExternal": "clicks_external",
+    "date_creation": "date_creation",
+    "last_updated": "last_updated",
+    "seen_at": "seen_at",
+    "priceTable": "price_history",
+    "availabilityTable": "availability_history",
+}
+
+HISTORY_FIELDS = ("priceTable", "availabilityTable")
+
 
 def convert_db_to_schema(db_product):
     """
@@ -40,13 +70,28 @@ def convert_db_to_schema(db_product):
         "clicksExternal": db_product.clicks_external,
         "date_creation": db_product.date_creation,
         "last_updated": db_product.last_updated,
+        "seen_at": db_product.seen_at,
         "priceTable": price_history,
         "availabilityTable": availability_history
     }
 
 
+def project_product(db_product, fields):
+    """
+    Convert a database Product model to a dict holding only the requested fields
+    """
+    item = {}
+    for field in fields:
+        value = getattr(db_product, FIELD_COLUMNS[field])
+        if field in HISTORY_FIELDS and not value:
+            value = []
+        item[field] = value
+    return item
+
+
 @router.get("/", response_model=ProductList)
-async def list_products(
+def list_products(
+    request: Request,
     q: Optional[str] = Query(None, description="Search query for product title"),
     uniqueid: Optional[str] = Query(None, description="Filter by product unique ID"),
     category: Optional[str] = Query(None, description="Filter by category"),
@@ -60,10 +105,18 @@ async def list_products(
     sort_order: str = Query("desc", description="Sort order (asc or desc)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE, description="Number of records to return"),
+    fast: bool = Query(False, description="Skip response validation and encode with orjson (recommended for large pages)"),
     db: Session = Depends(get_db)
 ):
     """
     List products with filtering, sorting and pagination
+    
+    With `fast=true` the rows are trusted as stored in the database: the response
+    model validation is skipped and the payload is encoded with orjson.
+    
+    Send `Accept: application/msgpack` for MessagePack or
+    `Accept: application/vnd.apache.arrow.stream` for an Arrow IPC stream of the
+    items (the total is returned in the X-Total-Count header).
     """
     # Start with a base query
     query = db.query(Product)
@@ -119,8 +172,117 @@ async def list_products(
     # Convert database models to schema models
     products = [convert_db_to_schema(product) for product in db_products]
     
-    # Return products
-    return {
+    # Return products in the negotiated format
+    result = {
         "total": total,
         "items": products
-    } 
\ No newline at end of file
+    }
+    
+    return negotiate(request, result, rows=products, fast=fast, headers={"X-Total-Count": str(total)}) 
+
+
+@router.post("/lookup", response_model=ProductLookupResponse)
+def lookup_products(
+    request: Request,
+    lookup: ProductLookupRequest,
+    fast: bool = Query(False, description="Skip response validation and encode with orjson"),
+    db: Session = Depends(get_db)
+):
+    """
+    Fetch many products by unique ID in a single query
+    
+    `fields` restricts the returned fields (for example `["uniqueID", "price", "last_updated"]`
+    for a staleness check) and `include_history=false` drops the price and
+    availability histories. Unknown IDs are listed in `missing`.
+    """
+    # Validate the projection
+    fields = lookup.fields or list(FIELD_COLUMNS)
+    unknown_fields = [field for field in fields if field not in FIELD_COLUMNS]
+    if unknown_fields:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown fields: {', '.join(unknown_fields)}. Valid fields: {', '.join(FIELD_COLUMNS)}"
+        )
+    
+    if not lookup.include_history:
+        fields = [field for field in fields if field not in HISTORY_FIELDS]
+    
+    # uniqueID is always returned so results can be matched to the request
+    if "uniqueID" not in fields:
+        fields = ["uniqueID"] + fields
+    
+    # Deduplicate the IDs while keeping the requested order
+    ids = list(dict.fromkeys(lookup.ids))
+    
+    # Single round trip: unique_id = ANY(%(ids)s), loading only the projected columns
+    columns = [getattr(Product, FIELD_COLUMNS[field]) for field in fields]
+    db_products = db.query(Product)\
+        .options(load_only(*columns))\
+        .filter(Product.unique_id == any_(bindparam("ids", ids, type_=ARRAY(String))))\
+        .all()
+    
+    found = {product.unique_id: project_product(product, fields) for product in db_products}
+    items = [found[unique_id] for unique_id in ids if unique_id in found]
+    missing = [unique_id for unique_id in ids if unique_id not in found]
+    
+    result = {
+        "total": len(items),
+        "items": items,
+        "missing": missing
+    }
+    
+    return negotiate(request, result, rows=items, fast=fast)
+
+
+
+def downsample_price_history(price_history, max_points, method="lttb"):
+    """
+    Reduce a price history to at most max_points entries, keeping its shape
+    """
+    entries = []
+    for entry in price_history:
+        try:
+            entries.append((datetime.fromisoformat(str(entry["date_price"])).timestamp(), float(entry["price"]), entry))
+        except (KeyError, TypeError, ValueError):
+            continue
+    
+    if len(entries) <= max_points:
+        return price_history
+    
+    entries.sort(key=lambda item: item[0])
+    indices = downsample_indices(
+        [item[0] for item in entries], [item[1] for item in entries], max_points, method
+    )
+    return [entries[i][2] for i in indices]
+
+
+@router.get("/{uniqueid}/history")
+def get_product_history(
+    request: Request,
+    uniqueid: str,
+    max_points: Optional[int] = Query(None, ge=3, description="Downsample the price history to at most this many points"),
+    method: str = Query("lttb", regex="^(lttb|minmax)$", description="Downsampling method (lttb or minmax)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the price and availability history of a product
+    """
+    db_product = db.query(Product)\
+        .options(load_only(Product.unique_id, Product.price_history, Product.availability_history))\
+        .filter(Product.unique_id == uniqueid)\
+        .first()
+    
+    if not db_product:
+        raise HTTPException(status_code=404, detail=f"Product {uniqueid} not found")
+    
+    price_history = db_product.price_history or []
+    if max_points:
+        price_history = downsample_price_history(price_history, max_points, method)
+    
+    result = {
+        "uniqueID": db_product.unique_id,
+        "priceTable": price_history,
+        "availabilityTable": db_product.availability_history or []
+    }
+    
+    return negotiate(request, result, rows=price_history, fast=True)
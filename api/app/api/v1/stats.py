@@ -1,11 +1,12 @@
 from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import func, distinct
 
 from app.db.database import get_db
 from app.models.product import Product, SourceStats
 from app.schemas.product import StatsResponse, SourceStat
+from app.core.negotiation import negotiate
 
 router = APIRouter()
 
@@ -22,7 +23,7 @@ def convert_source_stat(db_source_stat):
 
 
 @router.get("/", response_model=StatsResponse)
-async def get_stats(db: Session = Depends(get_db)):
+def get_stats(db: Session = Depends(get_db)):
     """
     Get system-wide statistics about products and sources
     """
@@ -44,7 +45,7 @@ async def get_stats(db: Session = Depends(get_db)):
 
 
 @router.get("/categories", response_model=Dict[str, List[str]])
-async def get_categories(db: Session = Depends(get_db)):
+def get_categories(db: Session = Depends(get_db)):
     """
     Get all available categories and subcategories
     """
@@ -66,16 +67,16 @@ async def get_categories(db: Session = Depends(get_db)):
 
 
 @router.get("/sources", response_model=List[SourceStat])
-async def get_sources(db: Session = Depends(get_db)):
+def get_sources(request: Request, db: Session = Depends(get_db)):
     """
     Get all available sources/stores with stats
     """
     db_source_stats = db.query(SourceStats).order_by(SourceStats.products_count.desc()).all()
-    return [convert_source_stat(source) for source in db_source_stats]
+    return negotiate(request, [convert_source_stat(source) for source in db_source_stats])
 
 
 @router.get("/brands", response_model=List[str])
-async def get_brands(db: Session = Depends(get_db)):
+def get_brands(db: Session = Depends(get_db)):
     """
     Get all available brands
     """
@@ -34,10 +34,42 @@ class Settings(BaseSettings):
 
     # Database configuration
     SQLALCHEMY_DATABASE_URI: PostgresDsn = NEON_URI
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    
+    # Worker threads for the synchronous database routes. Defaults to the
+    # connection pool capacity so threads never queue on the pool itself.
+    DB_THREADPOOL_SIZE: Optional[int] = None
+
+    @validator("DB_THREADPOOL_SIZE", pre=True, always=True)
+    def default_threadpool_size(cls, v: Optional[int], values: Dict[str, Any]) -> int:
+        if v:
+            return v
+        return values.get("DB_POOL_SIZE", 10) + values.get("DB_MAX_OVERFLOW", 20)
     
     # API behavior settings
     DEFAULT_PAGE_SIZE: int = 50
     MAX_PAGE_SIZE: int = 5000
+    MAX_LOOKUP_IDS: int = 5000
+    
+    # Response compression (zstd and brotli are used when installed)
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    
+    # Live change stream settings (must match the scraper's NOTIFY channel)
+    EVENTS_CHANNEL: str = "product_changes"
+    EVENTS_QUEUE_SIZE: int = 1000
+    EVENTS_KEEPALIVE_SECONDS: int = 15
+    EVENTS_RECONNECT_SECONDS: int = 5
+    
+    # Analytics engine: "parquet" reads the scraper's Parquet export,
+    # "postgres" scans the database tables directly
+    ANALYTICS_SOURCE: str = "parquet"
+    ANALYTICS_PARQUET_DIR: str = os.path.join(parent_dir, "output", "parquet")
+    ANALYTICS_DATABASE: str = ":memory:"
     
     # Security settings (can be expanded later if needed)
     SECRET_KEY: str = os.getenv("SECRET_KEY", "dev_secret_key")
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import select
+import socket
+import threading
+from typing import Any, Dict, Optional
+
+import psycopg2
+
+from app.core.config import settings
+
+
+class Subscription:
+    """A single SSE client's view of the change stream"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, filters: Dict[str, Optional[str]]):
+        self.loop = loop
+        self.filters = filters
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        """
+        Check an event against the subscription filters
+        """
+        brand = self.filters.get("brand")
+        if brand and event.get("brand") != brand:
+            return False
+
+        store = self.filters.get("store")
+        if store and store not in (event.get("store_label"), event.get("source_name")):
+            return False
+
+        uniqueid = self.filters.get("uniqueid")
+        if uniqueid and event.get("uniqueID") != uniqueid:
+            return False
+
+        event_type = self.filters.get("type")
+        if event_type and event.get("type") != event_type:
+            return False
+
+        return True
+
+    def push(self, event: Dict[str, Any]):
+        """
+        Enqueue an event, dropping the oldest one if the client is too slow
+        """
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(event)
+
+
+class ChangeBroker:
+    """
+    Fan out Postgres NOTIFY events published by the scraper to SSE subscribers.
+    A single background thread holds the LISTEN connection for the whole process.
+    """
+
+    def __init__(self, dsn: str, channel: str):
+        self.dsn = dsn
+        self.channel = channel
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        # Written to by stop() to wake the listener out of select()
+        self._wakeup = None
+
+    def start(self):
+        """
+        Start the listener thread if it is not already running
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._wakeup = socket.socketpair()
+        self._thread = threading.Thread(target=self._listen, name="change-broker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stop the listener thread and wait for it to close its connection
+
+        Returns:
+            True if the thread has exited
+        """
+        self._stop_event.set()
+        thread = self._thread
+        if thread is None:
+            return True
+
+        self._wakeup[1].send(b"x")
+        thread.join(timeout)
+        if thread.is_alive():
+            print(f"Change listener did not stop within {timeout}s")
+            return False
+
+        for sock in self._wakeup:
+            sock.close()
+        self._thread = None
+        self._wakeup = None
+        return True
+
+    def subscribe(self, **filters) -> Subscription:
+        """
+        Register a new subscriber on the running event loop
+        """
+        subscription = Subscription(asyncio.get_running_loop(), filters)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event: Dict[str, Any]):
+        """
+        Deliver an event to every matching subscriber (thread-safe)
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            if subscription.matches(event):
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.push, event)
+                except RuntimeError:
+                    # The subscriber's event loop is closed
+                    self.unsubscribe(subscription)
+
+    def _listen(self):
+        """
+        Hold a LISTEN connection open, reconnecting after failures
+        """
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                print(f"Listening for product changes on channel '{self.channel}'")
+
+                while not self._stop_event.is_set():
+                    # stop() makes the wakeup socket readable
+                    readable, _, _ = select.select([conn, self._wakeup[0]], [], [], 5)
+                    if conn not in readable:
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            event = json.loads(notify.payload)
+                        except json.JSONDecodeError:
+                            print(f"Ignoring malformed change event: {notify.payload[:200]}")
+                            continue
+                        self.publish(event)
+
+            except Exception as e:
+                print(f"Error in change listener: {e}")
+                self._stop_event.wait(settings.EVENTS_RECONNECT_SECONDS)
+
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+change_broker = ChangeBroker(str(settings.SQLALCHEMY_DATABASE_URI), settings.EVENTS_CHANNEL)
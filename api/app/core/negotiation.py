@@ -0,0 +1,112 @@
+from datetime import date, datetime
+from decimal import Decimal
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def _msgpack_default(value):
+    """
+    Encode the types msgpack does not know natively
+    """
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPES[0]
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+class ArrowResponse(Response):
+    """
+    Arrow IPC stream of a list of row dictionaries
+    """
+    media_type = ARROW_MEDIA_TYPE
+
+    def render(self, content: List[Dict[str, Any]]) -> bytes:
+        table = pa.Table.from_pylist(content)
+        sink = BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+
+
+def preferred_media_type(request: Request) -> str:
+    """
+    Pick the response format from the Accept header.
+    Binary formats are only chosen when their library is installed.
+    """
+    candidates = []
+    for position, part in enumerate(request.headers.get("accept", "").split(",")):
+        pieces = part.strip().split(";")
+        media_type = pieces[0].strip().lower()
+        quality = 1.0
+        for param in pieces[1:]:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            candidates.append((-quality, position, media_type))
+
+    for _, _, media_type in sorted(candidates):
+        if media_type in MSGPACK_MEDIA_TYPES and msgpack is not None:
+            return MSGPACK_MEDIA_TYPES[0]
+        if media_type == ARROW_MEDIA_TYPE and pa is not None:
+            return ARROW_MEDIA_TYPE
+        if media_type in ("application/json", "application/*", "*/*"):
+            return "application/json"
+    return "application/json"
+
+
+def negotiate(request: Request, content: Any, rows: Optional[List[Dict[str, Any]]] = None,
+              fast: bool = False, headers: Optional[Dict[str, str]] = None):
+    """
+    Render a route result in the format requested by the client
+
+    Args:
+        request: The incoming request
+        content: The full JSON-shaped result
+        rows: Tabular view of the result used for Arrow (defaults to content)
+        fast: For JSON, skip response_model validation and encode with orjson
+        headers: Extra response headers (binary formats and fast JSON only)
+
+    Returns:
+        A Response for binary formats or fast JSON, otherwise `content` unchanged
+        so FastAPI applies the route's response_model
+    """
+    media_type = preferred_media_type(request)
+
+    if media_type == ARROW_MEDIA_TYPE:
+        return ArrowResponse(rows if rows is not None else content, headers=headers)
+
+    if media_type == MSGPACK_MEDIA_TYPES[0]:
+        return MsgPackResponse(content, headers=headers)
+
+    if fast:
+        return ORJSONResponse(content, headers=headers)
+
+    return content
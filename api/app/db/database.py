@@ -9,10 +9,11 @@ from app.core.config import settings
 # Create SQLAlchemy engine with PostgreSQL configuration
 engine = create_engine(
     settings.SQLALCHEMY_DATABASE_URI,
-    pool_pre_ping=True,  # Test connections before using them
-    pool_size=10,        # Maximum number of connections to keep in the pool
-    max_overflow=20,     # Maximum number of connections to create beyond pool_size
-    pool_recycle=3600,   # Recycle connections after one hour
+    pool_pre_ping=True,                     # Test connections before using them
+    pool_size=settings.DB_POOL_SIZE,        # Maximum number of connections to keep in the pool
+    max_overflow=settings.DB_MAX_OVERFLOW,  # Maximum number of connections to create beyond pool_size
+    pool_timeout=settings.DB_POOL_TIMEOUT,  # Seconds to wait for a free connection
+    pool_recycle=3600,                      # Recycle connections after one hour
 )
 
 # Create a session factory
@@ -1,3 +1,6 @@
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
@@ -8,6 +11,23 @@ from datetime import datetime
 
 from app.api.v1 import api_router
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.events import change_broker
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Size the thread pool that runs the synchronous database routes, and
+    listen for product changes published by the scraper while the app runs
+    """
+    to_thread.current_default_thread_limiter().total_tokens = settings.DB_THREADPOOL_SIZE
+    change_broker.start()
+    try:
+        yield
+    finally:
+        # Joining the listener thread blocks, so it runs off the event loop
+        await to_thread.run_sync(change_broker.stop)
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -15,6 +35,7 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Set up CORS middleware
@@ -27,6 +48,9 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+# Compress large responses (zstd, brotli or gzip depending on Accept-Encoding)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
 # Include API routes
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -29,6 +29,8 @@ class Product(Base):
     price_history = Column(JSONB, default=[])
     availability_history = Column(JSONB, default=[])
     additional_data = Column(JSONB, default={})
+    content_hash = Column(String(32))
+    seen_at = Column(DateTime)
     
     def __repr__(self):
         return f"<Product {self.unique_id}: {self.title}>"
@@ -61,6 +61,7 @@ class ProductInDB(ProductBase):
     uniqueID: str
     date_creation: datetime
     last_updated: datetime
+    seen_at: Optional[datetime] = None
     priceTable: List[PriceHistoryItem] = []
     availabilityTable: List[AvailabilityHistoryItem] = []
     
@@ -79,6 +80,20 @@ class ProductList(BaseModel):
     items: List[Product]
 
 
+class ProductLookupRequest(BaseModel):
+    """Schema for a bulk lookup by unique IDs"""
+    ids: List[str] = Field(..., min_items=1, max_items=settings.MAX_LOOKUP_IDS)
+    fields: Optional[List[str]] = None
+    include_history: bool = True
+
+
+class ProductLookupResponse(BaseModel):
+    """Schema for bulk lookup results"""
+    total: int
+    items: List[Dict[str, Any]]
+    missing: List[str]
+
+
 class SourceStatBase(BaseModel):
     """Base schema for source statistics"""
     name: str
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Concurrency load test for the API.
+Runs N concurrent clients against one endpoint for a fixed duration and reports
+requests per second and latency percentiles for each concurrency level.
+
+Usage (start the API first, e.g. `python run.py`):
+    python benchmarks/bench_concurrency.py --url "http://localhost:8000/api/v1/products/?limit=50" --clients 50 100 200
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def client_loop(url, deadline, latencies, errors, lock):
+    """
+    Issue requests back to back until the deadline, recording latencies
+    """
+    session = requests.Session()
+    local_latencies = []
+    local_errors = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = session.get(url, timeout=60)
+            if response.status_code != 200:
+                local_errors += 1
+            else:
+                local_latencies.append(time.perf_counter() - start)
+        except requests.RequestException:
+            local_errors += 1
+    session.close()
+
+    with lock:
+        latencies.extend(local_latencies)
+        errors[0] += local_errors
+
+
+def run_level(url, clients, duration):
+    """
+    Run one concurrency level and return its summary
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        for _ in range(clients):
+            executor.submit(client_loop, url, deadline, latencies, errors, lock)
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    def percentile(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "mean": statistics.mean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000/api/v1/products/?limit=50", help="Endpoint to load")
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 100, 200], help="Concurrency levels to run")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per concurrency level")
+    args = parser.parse_args()
+
+    print(f"Load testing {args.url} for {args.duration:.0f}s per level\n")
+    print(f"{'clients':>8} {'requests':>9} {'errors':>7} {'req/s':>8} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for clients in args.clients:
+        r = run_level(args.url, clients, args.duration)
+        print(
+            f"{r['clients']:>8} {r['requests']:>9} {r['errors']:>7} {r['rps']:>8.1f} "
+            f"{r['mean']:>8.1f} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
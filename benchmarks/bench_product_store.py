@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Benchmark the memory used by the scraper's in-memory catalog.
+Compares the previous dict[uniqueID -> dict] with ProductStore on synthetic
+products shaped like format_product_data output.
+
+Usage (from the repository root):
+    python benchmarks/bench_product_store.py --sizes 100000,1000000 --points 10
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_manager.product_store import ProductStore
+
+STORES = [f"Store {i}" for i in range(40)]
+BRANDS = ["lenovo", "hp", "asus", "dell", "acer", "msi", "apple", "huawei"]
+SOURCES = [f"source_{i}" for i in range(40)]
+
+
+def make_product(i, points, rng):
+    """
+    Build one synthetic product dictionary, round-tripped through JSON so
+    that every string is a separate object, as load_existing_data receives it
+    """
+    start = datetime(2024, 1, 1) + timedelta(minutes=i)
+    price = round(rng.uniform(500, 6000), 0)
+    store = rng.randrange(len(STORES))
+
+    product = {
+        "uniqueID": f"{i:032x}",
+        "title": f"PC Portable Benchmark {i} Core i5 16Go 512Go SSD",
+        "store_label": STORES[store],
+        "category": "computers",
+        "subcategory": "laptops",
+        "source_name": SOURCES[store],
+        "image": f"https://barbechli.tn/images/product/{i:032x}.jpg",
+        "currency": "TND",
+        "price": price,
+        "price_min": price,
+        "price_max": price + 100.0,
+        "price_drop": 0,
+        "price_drop_percent": 0,
+        "price_week_changed": "no",
+        "price_week_drop": 0,
+        "price_week_drop_percent": 0,
+        "price_deal": "no",
+        "price_hot_deal": "no",
+        "price_top_deal": "no",
+        "link": f"https://www.example-store.tn/pc-portable/{i}-pc-portable-benchmark.html",
+        "source_link": f"https://barbechli.tn/redirect/{i:032x}",
+        "brand": rng.choice(BRANDS),
+        "availability": "on_stock",
+        "clicks": rng.randrange(100),
+        "clicksExternal": rng.randrange(100),
+        "priceTable": [
+            {"date_price": (start + timedelta(days=day)).isoformat(), "price": price + day}
+            for day in range(points)
+        ],
+        "availabilityTable": [
+            {"date_availability": (start + timedelta(days=day)).isoformat(), "availability": "on_stock"}
+            for day in range(0, points, 2)
+        ],
+        "date_creation": start.isoformat(),
+    }
+    return json.loads(json.dumps(product))
+
+
+def measure(build):
+    """
+    Return (seconds, MiB still allocated) for building a container
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    container = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del container
+    gc.collect()
+    return elapsed, current / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,1000000", help="Comma-separated product counts")
+    parser.add_argument("--points", type=int, default=10, help="Price points per product")
+    parser.add_argument("--skip-dict", action="store_true", help="Only measure ProductStore")
+    args = parser.parse_args()
+
+    for size in (int(value) for value in args.sizes.split(",")):
+        print(f"\n{size:,} products x {args.points} price points")
+
+        def build_dict():
+            rng = random.Random(42)
+            products = {}
+            for i in range(size):
+                product = make_product(i, args.points, rng)
+                products[product["uniqueID"]] = product
+            return products
+
+        def build_store():
+            rng = random.Random(42)
+            store = ProductStore()
+            for i in range(size):
+                product = make_product(i, args.points, rng)
+                store[product["uniqueID"]] = product
+            return store
+
+        runs = [("store", build_store)]
+        if not args.skip_dict:
+            runs.insert(0, ("dict", build_dict))
+
+        results = {}
+        for name, build in runs:
+            elapsed, memory = measure(build)
+            results[name] = memory
+            print(f"{name:>6}: {memory:9.1f} MiB  {memory * 1024 ** 2 / size:7.0f} B/product  {elapsed:6.1f} s")
+
+        if "dict" in results:
+            print(f"Memory reduction: {results['dict'] / results['store']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
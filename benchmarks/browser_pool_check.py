@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+End-to-end check of the shared browser (scraper/browser_pool.py).
+Starts the pool, leases pages from several threads that each navigate a
+number of local pages, and checks that every lease was served by the shared
+Chromium, that pages were recycled after BROWSER_MAX_NAVIGATIONS navigations
+and that page heap and browser RSS were reported.
+
+When the pool cannot be started, the same threads run through borrow(None),
+one browser per thread, which is the scraper's fallback.
+
+Usage (from the repository root, needs Chromium for Playwright):
+    python benchmarks/browser_pool_check.py --threads 4 --navigations 60
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from scraper import browser_pool
+from scraper.browser_pool import borrow, start_pool
+
+# A page that allocates a little memory, so the heap figures are not all zero
+PAGE = "data:text/html,<script>window.data = new Array(100000).fill(%d)</script><p>page %d</p>"
+
+
+def browse(pool, navigations, results, errors):
+    """
+    Navigate `navigations` pages through one lease and record its counters
+    """
+    name = threading.current_thread().name
+    try:
+        with borrow(pool) as lease:
+            for i in range(navigations):
+                lease.page.goto(PAGE % (i, i))
+                lease.navigated()
+            results[name] = {"recycled": lease.recycled, "memory": lease.page_memory()}
+    except Exception as e:
+        errors[name] = e
+
+
+def run(pool, threads, navigations):
+    """
+    Run the browsing threads and return (results, errors, seconds)
+    """
+    results = {}
+    errors = {}
+    workers = [
+        threading.Thread(target=browse, args=(pool, navigations, results, errors), name=f"lease-{i}")
+        for i in range(threads)
+    ]
+    started = time.time()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results, errors, time.time() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lease pages of the shared browser from several threads")
+    parser.add_argument("--threads", type=int, default=4, help="Threads leasing a page")
+    parser.add_argument("--navigations", type=int, default=60, help="Navigations per thread")
+    parser.add_argument("--max-navigations", type=int, default=25,
+                        help="Navigations before a page is recycled (BROWSER_MAX_NAVIGATIONS)")
+    args = parser.parse_args()
+
+    browser_pool.MAX_NAVIGATIONS = args.max_navigations
+    expected_recycles = args.navigations // args.max_navigations
+
+    pool = start_pool()
+    mode = "shared browser" if pool is not None else "fallback, one browser per thread"
+    print(f"{args.threads} threads x {args.navigations} navigations ({mode})")
+    try:
+        results, errors, seconds = run(pool, args.threads, args.navigations)
+        metrics = pool.metrics() if pool is not None else None
+    finally:
+        if pool is not None:
+            pool.close()
+
+    ok = not errors
+    for name, error in sorted(errors.items()):
+        print(f"❌ {name}: {error}")
+    for name, result in sorted(results.items()):
+        memory = result["memory"]
+        print(f"{name}: {result['recycled']} recycles, JS heap {memory['js_heap_mb']} MB, "
+              f"{memory['dom_nodes']} DOM nodes")
+        if result["recycled"] != expected_recycles:
+            ok = False
+            print(f"❌ {name} recycled {result['recycled']} times, expected {expected_recycles}")
+
+    if metrics is not None:
+        print(f"Browser RSS: {metrics['browser_rss_mb']} MB (None without psutil), "
+              f"{metrics['pages_recycled']} pages recycled")
+        if metrics["pages_recycled"] != expected_recycles * len(results):
+            ok = False
+            print(f"❌ The pool counted {metrics['pages_recycled']} recycles")
+    if results:
+        print(f"{len(results) * args.navigations / seconds:.1f} navigations/s")
+
+    print("\nBrowser pool check passed!" if ok else "\nBrowser pool check failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+End-to-end check of fixture recording and replay.
+Records a short run of main.py against barbechli.tn, replays it through
+main.py against scraper/mock_server.py, and checks that both runs collected
+the same product IDs and the same products.
+
+Each run works in its own directory under --workdir (output files, fixtures),
+with the database disabled (NEON_URI empty) so the check never writes to it.
+
+Usage (from the repository root, needs Chromium for Playwright):
+    python benchmarks/replay_check.py --pages 2
+    python benchmarks/replay_check.py --workdir /tmp/replay-check --skip-record
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from data_manager import fingerprint
+from scraper.fixtures import FixtureStore
+from scraper.mock_server import MockBarbechli
+
+
+def run_main(run_dir, env):
+    """
+    Run main.py in run_dir with extra environment variables
+    """
+    # db_manager logs to data_manager/ relative to the working directory
+    os.makedirs(os.path.join(run_dir, "data_manager"), exist_ok=True)
+    run_env = {**os.environ, "PYTHONPATH": REPO_ROOT, "NEON_URI": "", **env}
+    with open(os.path.join(run_dir, "main.log"), "w", encoding="utf-8") as log:
+        result = subprocess.run([sys.executable, os.path.join(REPO_ROOT, "main.py")],
+                                cwd=run_dir, env=run_env, stdout=log, stderr=subprocess.STDOUT)
+    if result.returncode != 0:
+        raise RuntimeError(f"main.py failed in {run_dir} (exit code {result.returncode}), see main.log")
+
+
+def load_results(run_dir):
+    """
+    Return (product IDs, {uniqueID: normalized product}) written by a run
+    """
+    output_dir = os.path.join(run_dir, "output")
+    with open(os.path.join(output_dir, "barbechli_product_ids.json"), "r", encoding="utf-8") as f:
+        ids = json.load(f)
+    with open(os.path.join(output_dir, "barbechli_products_details.json"), "r", encoding="utf-8") as f:
+        products = json.load(f)["products"]
+    return ids, {product["uniqueID"]: fingerprint.normalize(product) for product in products}
+
+
+def compare(recorded_dir, replayed_dir):
+    """
+    Print the differences between two runs
+
+    Returns:
+        True when both runs found the same IDs and products
+    """
+    recorded_ids, recorded_products = load_results(recorded_dir)
+    replayed_ids, replayed_products = load_results(replayed_dir)
+    ok = True
+
+    if recorded_ids != replayed_ids:
+        ok = False
+        print(f"❌ Product IDs differ: {len(recorded_ids)} recorded, {len(replayed_ids)} replayed")
+        print(f"   missing: {sorted(set(recorded_ids) - set(replayed_ids))[:10]}")
+        print(f"   extra: {sorted(set(replayed_ids) - set(recorded_ids))[:10]}")
+    else:
+        print(f"✅ Same {len(recorded_ids)} product IDs, in the same order")
+
+    if recorded_products.keys() != replayed_products.keys():
+        ok = False
+        print(f"❌ Products differ: {len(recorded_products)} recorded, {len(replayed_products)} replayed")
+    else:
+        changed = [key for key in recorded_products if recorded_products[key] != replayed_products[key]]
+        if changed:
+            ok = False
+            print(f"❌ {len(changed)} products have different content, e.g. {changed[:5]}")
+        else:
+            print(f"✅ Same {len(recorded_products)} products with the same content")
+
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record a short run, replay it and compare the results")
+    parser.add_argument("--pages", type=int, default=2, help="Listing pages in the recorded run")
+    parser.add_argument("--workdir", help="Directory for both runs (a new temporary directory by default)")
+    parser.add_argument("--skip-record", action="store_true", help="Reuse the recording already in --workdir")
+    args = parser.parse_args()
+
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="barbechli-replay-"))
+    recorded_dir = os.path.join(workdir, "recorded")
+    replayed_dir = os.path.join(workdir, "replayed")
+    fixtures_path = os.path.join(recorded_dir, "fixtures", "barbechli.jsonl.gz")
+
+    if not args.skip_record:
+        print(f"Recording {args.pages} listing pages into {recorded_dir}...")
+        shutil.rmtree(recorded_dir, ignore_errors=True)
+        os.makedirs(recorded_dir)
+        run_main(recorded_dir, {"RECORD_FIXTURES": fixtures_path, "MAX_PAGES": str(args.pages)})
+
+    store = FixtureStore(fixtures_path)
+    server = MockBarbechli(("127.0.0.1", 0), store).start()
+    print(f"Replaying {len(store)} responses from {server.base_url} into {replayed_dir}...")
+    try:
+        # The replay starts without the output of an earlier replay
+        shutil.rmtree(replayed_dir, ignore_errors=True)
+        os.makedirs(replayed_dir)
+        run_main(replayed_dir, {"BARBECHLI_BASE_URL": server.base_url, "MAX_PAGES": str(args.pages)})
+    finally:
+        server.shutdown()
+        server.server_close()
+    print(f"Served {server.served} find requests")
+
+    ok = compare(recorded_dir, replayed_dir)
+    print("\nReplay check passed!" if ok else "\nReplay check failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,22 @@ import os
 import dash
 import dash_bootstrap_components as dbc
 from dash import Dash, dcc, html
+from utils.data import dataset
 
 app = Dash(
     __name__,
     use_pages=True,
     title="Barbechli Scraper Dashboard",
     external_stylesheets=[dbc.themes.BOOTSTRAP],
+    # Page layouts are built on demand; without this Dash calls every page
+    # layout on the first request to build a validation layout
+    suppress_callback_exceptions=True,
 )
 server = app.server
 
+# Pages compute their charts on first visit; start the download without blocking startup
+dataset.preload()
+
 # sidebar
 sidebar = html.Div(
     [
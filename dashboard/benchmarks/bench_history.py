@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Benchmark building the price history frame from the priceTable column.
+Compares the previous per-row loop (iterrows + strptime) with the vectorized
+build_price_history on a synthetic catalog.
+
+Usage (from the dashboard directory):
+    python benchmarks/bench_history.py --products 50000 --points 20
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.history import build_price_history
+
+
+def make_catalog(products, points, seed=42):
+    """
+    Build a synthetic catalog shaped like the API response
+    """
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 1, 1)
+    stores = [f"Store {i}" for i in range(40)]
+    prices = rng.uniform(500, 6000, size=products).round(3)
+
+    tables = []
+    for i in range(products):
+        days = np.sort(rng.choice(400, size=points, replace=False))
+        tables.append([
+            {"date_price": (start + timedelta(days=int(day), seconds=int(day) * 37)).isoformat(),
+             "price": float(prices[i] + day)}
+            for day in days
+        ])
+
+    return pd.DataFrame({
+        "uniqueID": [f"bench-{i}" for i in range(products)],
+        "title": [f"PC Portable Benchmark {i}" for i in range(products)],
+        "store_label": rng.choice(stores, size=products),
+        "price": prices,
+        "priceTable": tables,
+    })
+
+
+def legacy_price_history(df):
+    """
+    The per-row loop previously used by the price and store pages
+    """
+    price_history = []
+    for idx, row in df.iterrows():
+        if isinstance(row['priceTable'], list):
+            for entry in row['priceTable']:
+                if 'date_price' in entry and 'price' in entry:
+                    try:
+                        date = datetime.strptime(entry['date_price'].split('T')[0], '%Y-%m-%d')
+                        price_history.append({
+                            'date': date,
+                            'price': entry['price'],
+                            'product_id': row['uniqueID'],
+                            'product_name': row['title'],
+                            'store_label': row['store_label'],
+                        })
+                    except Exception:
+                        pass
+
+    price_history_df = pd.DataFrame(price_history)
+    if not price_history_df.empty:
+        price_history_df = price_history_df.sort_values('date')
+    return price_history_df
+
+
+def measure(func, df):
+    start = time.perf_counter()
+    result = func(df)
+    elapsed = time.perf_counter() - start
+    return elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=50000, help="Number of synthetic products")
+    parser.add_argument("--points", type=int, default=20, help="Price points per product")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the vectorized builder")
+    args = parser.parse_args()
+
+    print(f"Generating {args.products:,} products x {args.points} points...")
+    df = make_catalog(args.products, args.points)
+    total_points = args.products * args.points
+
+    runs = [("vectorized", build_price_history)]
+    if not args.skip_legacy:
+        runs.insert(0, ("legacy", legacy_price_history))
+
+    results = {}
+    for name, func in runs:
+        elapsed, history = measure(func, df)
+        results[name] = elapsed
+        memory = history.memory_usage(deep=True).sum() / 1024 ** 2
+        print(f"{name:>10}: {elapsed:7.2f} s  {elapsed / total_points * 1e6:6.2f} us/point  "
+              f"{len(history):,} rows  {memory:7.1f} MiB")
+
+    if "legacy" in results:
+        print(f"\nSpeedup: {results['legacy'] / results['vectorized']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ from dash import dcc, html, Input, Output, callback
 import dash_bootstrap_components as dbc
 from utils.functions import create_card
 import pandas as pd
-from utils.data import data_import
+from utils.data import dataset
 import plotly.express as px
 
 # Initialize the Dash page
@@ -18,7 +18,7 @@ dash.register_page(
 # Load data
 # =============================================
 
-df=data_import()
+# The product frame is shared by all pages and refreshed in the background
 
 # =============================================
 # Data Preparation
@@ -27,10 +27,10 @@ df=data_import()
 def prepare_chart_data(df):
     """Prepare all data needed for visualizations"""
     # For availability pie chart
-    availability_counts = df.groupby(['brand', 'availability']).size().reset_index(name='count')
+    availability_counts = df.groupby(['brand', 'availability'], observed=True).size().reset_index(name='count')
     
     # Calculate median prices for each brand
-    median_prices = df.groupby('brand')['price'].median().sort_values(ascending=False)
+    median_prices = df.groupby('brand', observed=True)['price'].median().sort_values(ascending=False)
     
     # For top brands by product count (for treemap)
     brand_counts = df['brand'].value_counts().reset_index()
@@ -47,8 +47,6 @@ def prepare_chart_data(df):
         'avg_price': df['price'].mean()
     }
 
-chart_data = prepare_chart_data(df)
-
 # =============================================
 # Visualizations
 # =============================================
@@ -102,105 +100,115 @@ def create_visualizations(df, chart_data):
         'brands_treemap': brands_treemap
     }
 
-figures = create_visualizations(df, chart_data)
+def build_page(df):
+    """Compute the chart data and figures for one dataset version"""
+    chart_data = prepare_chart_data(df)
+    return chart_data, create_visualizations(df, chart_data)
+
+# Computed on the first visit, then reused until the dataset version changes;
+# the builders only read the shared frame
+page_data = dataset.derive(build_page, copy=False)
 
 # =============================================
 # Dashboard Layout
 # =============================================
 
-layout = dbc.Container(
-    [
-        # Header Section
-        html.Div(
-            [
-                html.H1("Brand Analysis Dashboard", className="page-header"),
-                html.P("This dashboard provides insights into product performance across different brands.", 
-                      className="page-subtitle"),
-            ],
-            className="header-section"
-        ),
+def layout(**kwargs):
+    """Build the page from the current dataset snapshot"""
+    chart_data, figures = page_data.get()
+    return dbc.Container(
+        [
+            # Header Section
+            html.Div(
+                [
+                    html.H1("Brand Analysis Dashboard", className="page-header"),
+                    html.P("This dashboard provides insights into product performance across different brands.", 
+                          className="page-subtitle"),
+                ],
+                className="header-section"
+            ),
         
-        # Summary Cards
-        dbc.Row(
-            [
-              dbc.Col(
-                  create_card(
-                      "Number of Brands",
-                      f"{chart_data['brands_count']:,}",
-                      "fa-tags"
+            # Summary Cards
+            dbc.Row(
+                [
+                  dbc.Col(
+                      create_card(
+                          "Number of Brands",
+                          f"{chart_data['brands_count']:,}",
+                          "fa-tags"
+                      ),
+                      width=4,
                   ),
-                  width=4,
-              ),
-              dbc.Col(
-                  create_card(
-                      "Total Products",
-                      f"{chart_data['total_products']:,}",
-                      "fa-boxes"
+                  dbc.Col(
+                      create_card(
+                          "Total Products",
+                          f"{chart_data['total_products']:,}",
+                          "fa-boxes"
+                      ),
+                      width=4,
                   ),
-                  width=4,
-              ),
-              dbc.Col(
-                  create_card(
-                      "Avg Price",
-                      f"{chart_data['avg_price']:.2f} DT",
-                      "fa-tag"
+                  dbc.Col(
+                      create_card(
+                          "Avg Price",
+                          f"{chart_data['avg_price']:.2f} DT",
+                          "fa-tag"
+                      ),
+                      width=4,
                   ),
-                  width=4,
-              ),
-          ],className="summary-cards-row",
-      ),
+              ],className="summary-cards-row",
+          ),
         
-        # Main Visualizations
-        html.H2("Brand Performance Metrics", className="section-header"),
+            # Main Visualizations
+            html.H2("Brand Performance Metrics", className="section-header"),
         
-        dbc.Row(
-            [
-                dbc.Col(
-                    dcc.Graph(
-                        figure=figures['clicks_bar'],
-                        config={"displayModeBar": False},
-                        className="chart-card",
-                        style={"height": "500px"}
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Graph(
+                            figure=figures['clicks_bar'],
+                            config={"displayModeBar": False},
+                            className="chart-card",
+                            style={"height": "500px"}
+                        ),
+                        width=6
                     ),
-                    width=6
-                ),
-                dbc.Col(
-                    dcc.Graph(
-                        figure=figures['price_box'],
-                        config={"displayModeBar": False},
-                        className="chart-card",
-                        style={"height": "500px"}
+                    dbc.Col(
+                        dcc.Graph(
+                            figure=figures['price_box'],
+                            config={"displayModeBar": False},
+                            className="chart-card",
+                            style={"height": "500px"}
+                        ),
+                        width=6
                     ),
-                    width=6
-                ),
-            ],
-            className="chart-row"
-        ),
+                ],
+                className="chart-row"
+            ),
         
-        dbc.Row(
-            [
-                dbc.Col(
-                    dcc.Graph(
-                        figure=figures['availability_pie'],
-                        config={"displayModeBar": False},
-                        className="chart-card",
-                        style={"height": "500px"}
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Graph(
+                            figure=figures['availability_pie'],
+                            config={"displayModeBar": False},
+                            className="chart-card",
+                            style={"height": "500px"}
+                        ),
+                        width=6
                     ),
-                    width=6
-                ),
-                dbc.Col(
-                    dcc.Graph(
-                        figure=figures['brands_treemap'],
-                        config={"displayModeBar": False},
-                        className="chart-card",
-                        style={"height": "500px"}
+                    dbc.Col(
+                        dcc.Graph(
+                            figure=figures['brands_treemap'],
+                            config={"displayModeBar": False},
+                            className="chart-card",
+                            style={"height": "500px"}
+                        ),
+                        width=6
                     ),
-                    width=6
-                ),
-            ],
-            className="chart-row"
-        ),
-    ],
-    fluid=True,
-    className="dashboard-container"
-)
+                ],
+                className="chart-row"
+            ),
+        ],
+        fluid=True,
+        className="dashboard-container"
+    )
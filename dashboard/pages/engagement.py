@@ -3,7 +3,7 @@ from dash import dcc, html, Input, Output, callback
 import dash_bootstrap_components as dbc
 from utils.functions import create_card
 import pandas as pd
-from utils.data import data_import
+from utils.data import dataset
 import plotly.express as px
 import numpy as np
 
@@ -19,7 +19,7 @@ dash.register_page(
 # Load data
 # =============================================
 
-df=data_import()
+# The product frame is shared by all pages and refreshed in the background
 
 # =============================================
 # Data Preparation
@@ -36,7 +36,7 @@ def prepare_chart_data(df):
     )
     
     # Calculate click statistics by brand
-    brand_engagement = df.groupby('brand').agg({
+    brand_engagement = df.groupby('brand', observed=True).agg({
         'clicks': 'sum',
         'clicksExternal': 'sum'
     }).reset_index()
@@ -44,7 +44,7 @@ def prepare_chart_data(df):
     brand_engagement = brand_engagement.sort_values('clicks', ascending=False).head(10)
     
     # Calculate engagement by availability
-    availability_engagement = df.groupby('availability').agg({
+    availability_engagement = df.groupby('availability', observed=True).agg({
         'clicks': 'sum',
         'clicksExternal': 'sum',
         'uniqueID': 'count'
@@ -53,11 +53,11 @@ def prepare_chart_data(df):
     availability_engagement['external_clicks_per_product'] = availability_engagement['clicksExternal'] / availability_engagement['uniqueID']
     
     # Top products by engagement
-    df['total_engagement'] = df['clicks'] + df['clicksExternal']
-    top_products = df.sort_values('total_engagement', ascending=False).head(15)
+    total_engagement = (df['clicks'] + df['clicksExternal']).sort_values(ascending=False).head(15)
+    top_products = df.loc[total_engagement.index].assign(total_engagement=total_engagement)
     
     # Create engagement metrics for store comparison
-    store_engagement = df.groupby('store_label').agg({
+    store_engagement = df.groupby('store_label', observed=True).agg({
         'clicks': 'sum',
         'clicksExternal': 'sum',
         'uniqueID': 'count'
@@ -77,8 +77,6 @@ def prepare_chart_data(df):
         'conversion_rate': (df['clicksExternal'].sum() / df['clicks'].sum() * 100) if df['clicks'].sum() > 0 else 0
     }
 
-chart_data = prepare_chart_data(df)
-
 # =============================================
 # Visualizations
 # =============================================
@@ -163,131 +161,141 @@ def create_visualizations(df, chart_data):
         'conversion_by_store': fig04
     }
 
-figures = create_visualizations(df, chart_data)
+def build_page(df):
+    """Compute the chart data and figures for one dataset version"""
+    chart_data = prepare_chart_data(df)
+    return chart_data, create_visualizations(df, chart_data)
+
+# Computed on the first visit, then reused until the dataset version changes;
+# the builders only read the shared frame
+page_data = dataset.derive(build_page, copy=False)
 
 # =============================================
 # Dashboard Layout
 # =============================================
 
-layout = dbc.Container(
-    [
-        # Header Section
-        html.Div(
-            [
-                html.H1("Engagement Analysis Dashboard", className="page-header"),
-                html.P("This dashboard provides insights into user engagement metrics, focusing on the relationship between clicks and external clicks.", 
-                      className="page-subtitle"),
-            ],
-            className="header-section"
-        ),
+def layout(**kwargs):
+    """Build the page from the current dataset snapshot"""
+    chart_data, figures = page_data.get()
+    return dbc.Container(
+        [
+            # Header Section
+            html.Div(
+                [
+                    html.H1("Engagement Analysis Dashboard", className="page-header"),
+                    html.P("This dashboard provides insights into user engagement metrics, focusing on the relationship between clicks and external clicks.", 
+                          className="page-subtitle"),
+                ],
+                className="header-section"
+            ),
         
-        # Summary Cards
-        dbc.Row(
-            [
-              dbc.Col(
-                  create_card(
-                      "Total Clicks",
-                      f"{chart_data['total_clicks']:,}",
-                      "fa-mouse-pointer"
+            # Summary Cards
+            dbc.Row(
+                [
+                  dbc.Col(
+                      create_card(
+                          "Total Clicks",
+                          f"{chart_data['total_clicks']:,}",
+                          "fa-mouse-pointer"
+                      ),
+                      width=4,
                   ),
-                  width=4,
-              ),
-              dbc.Col(
-                  create_card(
-                      "External Clicks",
-                      f"{chart_data['total_external_clicks']:,}",
-                      "fa-external-link-alt"
+                  dbc.Col(
+                      create_card(
+                          "External Clicks",
+                          f"{chart_data['total_external_clicks']:,}",
+                          "fa-external-link-alt"
+                      ),
+                      width=4,
                   ),
-                  width=4,
-              ),
-              dbc.Col(
-                  create_card(
-                      "Conversion Rate",
-                      f"{chart_data['conversion_rate']:.2f}%",
-                      "fa-chart-line"
+                  dbc.Col(
+                      create_card(
+                          "Conversion Rate",
+                          f"{chart_data['conversion_rate']:.2f}%",
+                          "fa-chart-line"
+                      ),
+                      width=4,
                   ),
-                  width=4,
-              ),
-          ],className="summary-cards-row",
-      ),
+              ],className="summary-cards-row",
+          ),
         
-        # Main Visualizations
-        html.H2("Engagement Performance Metrics", className="section-header"),
+            # Main Visualizations
+            html.H2("Engagement Performance Metrics", className="section-header"),
         
-        dbc.Row(
-            [
-                dbc.Col(
-                    dcc.Graph(
-                        figure=figures['clicks_by_brand'],
-                        config={"displayModeBar": False},
-                        className="chart-card",
-                        style={"height": "500px"}
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Graph(
+                            figure=figures['clicks_by_brand'],
+                            config={"displayModeBar": False},
+                            className="chart-card",
+                            style={"height": "500px"}
+                        ),
+                        width=6
                     ),
-                    width=6
-                ),
-                dbc.Col(
-                    dcc.Graph(
-                        figure=figures['engagement_by_availability'],
-                        config={"displayModeBar": False},
-                        className="chart-card",
-                        style={"height": "500px"}
+                    dbc.Col(
+                        dcc.Graph(
+                            figure=figures['engagement_by_availability'],
+                            config={"displayModeBar": False},
+                            className="chart-card",
+                            style={"height": "500px"}
+                        ),
+                        width=6
                     ),
-                    width=6
-                ),
-            ],
-            className="chart-row"
-        ),
+                ],
+                className="chart-row"
+            ),
         
-        dbc.Row(
-            [
-                dbc.Col(
-                    dcc.Graph(
-                        figure=figures['top_products'],
-                        config={"displayModeBar": False},
-                        className="chart-card",
-                        style={"height": "500px"}
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Graph(
+                            figure=figures['top_products'],
+                            config={"displayModeBar": False},
+                            className="chart-card",
+                            style={"height": "500px"}
+                        ),
+                        width=6
                     ),
-                    width=6
-                ),
-                dbc.Col(
-                    dcc.Graph(
-                        figure=figures['conversion_by_store'],
-                        config={"displayModeBar": False},
-                        className="chart-card",
-                        style={"height": "500px"}
+                    dbc.Col(
+                        dcc.Graph(
+                            figure=figures['conversion_by_store'],
+                            config={"displayModeBar": False},
+                            className="chart-card",
+                            style={"height": "500px"}
+                        ),
+                        width=6
                     ),
-                    width=6
-                ),
-            ],
-            className="chart-row"
-        ),
+                ],
+                className="chart-row"
+            ),
         
-        # Explanation Section
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.H3("Understanding Clicks vs. External Clicks", className="mt-4"),
-                        html.P([
-                            html.Strong("Clicks: "), 
-                            "Total number of times users interacted with the product listing on the platform."
-                        ]),
-                        html.P([
-                            html.Strong("External Clicks: "), 
-                            "Number of times users clicked through to the external retailer's website to potentially make a purchase."
-                        ]),
-                        html.P([
-                            html.Strong("Conversion Rate: "), 
-                            "The percentage of total clicks that resulted in external clicks, indicating potential purchase intent."
-                        ]),
-                    ],
-                    className="info-section"
+            # Explanation Section
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.H3("Understanding Clicks vs. External Clicks", className="mt-4"),
+                            html.P([
+                                html.Strong("Clicks: "), 
+                                "Total number of times users interacted with the product listing on the platform."
+                            ]),
+                            html.P([
+                                html.Strong("External Clicks: "), 
+                                "Number of times users clicked through to the external retailer's website to potentially make a purchase."
+                            ]),
+                            html.P([
+                                html.Strong("Conversion Rate: "), 
+                                "The percentage of total clicks that resulted in external clicks, indicating potential purchase intent."
+                            ]),
+                        ],
+                        className="info-section"
+                    ),
+                    width=12
                 ),
-                width=12
-            ),
-            className="mt-4"
-        )
-    ],
-    fluid=True,
-    className="dashboard-container"
-)
\ No newline at end of file
+                className="mt-4"
+            )
+        ],
+        fluid=True,
+        className="dashboard-container"
+    )
\ No newline at end of file
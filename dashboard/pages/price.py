@@ -3,10 +3,13 @@ from dash import dcc, html, Input, Output, callback
 import dash_bootstrap_components as dbc
 from utils.functions import create_card
 import pandas as pd
-from utils.data import data_import
+from utils.data import dataset
 import plotly.express as px
-import json
-from datetime import datetime
+from utils.history import price_history
+from utils.downsample import downsample_frame
+
+# Maximum number of points drawn per trace in the price evolution chart
+MAX_EVOLUTION_POINTS = 2000
 
 # Initialize the Dash page
 dash.register_page(
@@ -19,54 +22,27 @@ dash.register_page(
 # Load data
 # =============================================
 
-df=data_import()
+# The product frame is shared by all pages and refreshed in the background
 
 # =============================================
 # Data Preparation
 # =============================================
 
-def prepare_chart_data(df):
+def prepare_chart_data(df, price_history_df):
     """Prepare all data needed for visualizations"""
-    # Parse the priceTable column to extract price history data
-    df['priceTable'] = df['priceTable'].apply(
-    lambda x: json.loads(x.replace("'", '"')) if isinstance(x, str) else x
-)
-
-    
     # Create price distribution data
     price_distribution = df['price'].value_counts().reset_index()
     price_distribution.columns = ['price_point', 'count']
     price_distribution = price_distribution.sort_values('price_point')
     
     # Calculate price statistics by brand
-    price_by_brand = df.groupby('brand')['price'].agg(['mean', 'median', 'min', 'max']).reset_index()
+    price_by_brand = df.groupby('brand', observed=True)['price'].agg(['mean', 'median', 'min', 'max']).reset_index()
     price_by_brand = price_by_brand.sort_values('median', ascending=False).head(10)
     
     # Price range distribution by store
-    price_by_store = df.groupby('store_label')['price'].agg(['count', 'mean', 'median']).reset_index()
+    price_by_store = df.groupby('store_label', observed=True)['price'].agg(['count', 'mean', 'median']).reset_index()
     price_by_store = price_by_store.sort_values('count', ascending=False).head(15)
     
-    # Extract price history for time series
-    price_history = []
-    for idx, row in df.iterrows():
-        if isinstance(row['priceTable'], list):
-            for entry in row['priceTable']:
-                if 'date_price' in entry and 'price' in entry:
-                    try:
-                        date = datetime.strptime(entry['date_price'].split('T')[0], '%Y-%m-%d')
-                        price_history.append({
-                            'date': date,
-                            'price': entry['price'],
-                            'product_id': row['uniqueID'],
-                            'product_name': row['title']
-                        })
-                    except:
-                        pass
-    
-    price_history_df = pd.DataFrame(price_history)
-    if not price_history_df.empty:
-        price_history_df = price_history_df.sort_values('date')
-    
     return {
         'price_distribution': price_distribution,
         'price_by_brand': price_by_brand,
@@ -77,8 +53,6 @@ def prepare_chart_data(df):
         'product_count': len(df)
     }
 
-chart_data = prepare_chart_data(df)
-
 # =============================================
 # Visualizations
 # =============================================
@@ -122,6 +96,7 @@ def create_visualizations(df, chart_data):
     if not chart_data['price_history_df'].empty:
         # Group by date and calculate average price
         avg_price_over_time = chart_data['price_history_df'].groupby('date')['price'].mean().reset_index()
+        avg_price_over_time = downsample_frame(avg_price_over_time, 'date', 'price', MAX_EVOLUTION_POINTS)
         
         # Create figure with improved hover information
         fig04 = px.line(
@@ -133,7 +108,10 @@ def create_visualizations(df, chart_data):
         )
         
         # Add a scatter trace for hover points with product information
-        scatter_df = chart_data['price_history_df'].copy()
+        # (min/max bucketing keeps the price envelope of each period)
+        scatter_df = downsample_frame(
+            chart_data['price_history_df'], 'date', 'price', MAX_EVOLUTION_POINTS, method='minmax'
+        )
         fig04.add_trace(
             px.scatter(
                 scatter_df,
@@ -160,105 +138,116 @@ def create_visualizations(df, chart_data):
         'price_evolution': fig04
     }
 
-figures = create_visualizations(df, chart_data)
+def build_page(df):
+    """Compute the chart data and figures for one dataset version"""
+    # Price history is exploded once and shared with the store page
+    chart_data = prepare_chart_data(df, price_history.for_frame(df))
+    return chart_data, create_visualizations(df, chart_data)
+
+# Computed on the first visit, then reused until the dataset version changes;
+# the builders only read the shared frame
+page_data = dataset.derive(build_page, copy=False)
 
 # =============================================
 # Dashboard Layout
 # =============================================
 
-layout = dbc.Container(
-    [
-        # Header Section
-        html.Div(
-            [
-                html.H1("Price Analysis Dashboard", className="page-header"),
-                html.P("This dashboard provides insights into product pricing trends and distribution.", 
-                      className="page-subtitle"),
-            ],
-            className="header-section"
-        ),
+def layout(**kwargs):
+    """Build the page from the current dataset snapshot"""
+    chart_data, figures = page_data.get()
+    return dbc.Container(
+        [
+            # Header Section
+            html.Div(
+                [
+                    html.H1("Price Analysis Dashboard", className="page-header"),
+                    html.P("This dashboard provides insights into product pricing trends and distribution.", 
+                          className="page-subtitle"),
+                ],
+                className="header-section"
+            ),
         
-        # Summary Cards
-        dbc.Row(
-            [
-              dbc.Col(
-                  create_card(
-                      "Average Price",
-                      f"{chart_data['avg_price']:.2f} DT",
-                      "fa-tag"
+            # Summary Cards
+            dbc.Row(
+                [
+                  dbc.Col(
+                      create_card(
+                          "Average Price",
+                          f"{chart_data['avg_price']:.2f} DT",
+                          "fa-tag"
+                      ),
+                      width=4,
                   ),
-                  width=4,
-              ),
-              dbc.Col(
-                  create_card(
-                      "Median Price",
-                      f"{chart_data['median_price']:.2f} DT",
-                      "fa-dollar-sign"
+                  dbc.Col(
+                      create_card(
+                          "Median Price",
+                          f"{chart_data['median_price']:.2f} DT",
+                          "fa-dollar-sign"
+                      ),
+                      width=4,
                   ),
-                  width=4,
-              ),
-              dbc.Col(
-                  create_card(
-                      "Total Products",
-                      f"{chart_data['product_count']:,}",
-                      "fa-boxes"
+                  dbc.Col(
+                      create_card(
+                          "Total Products",
+                          f"{chart_data['product_count']:,}",
+                          "fa-boxes"
+                      ),
+                      width=4,
                   ),
-                  width=4,
-              ),
-          ],className="summary-cards-row",
-      ),
+              ],className="summary-cards-row",
+          ),
         
-        # Main Visualizations
-        html.H2("Price Performance Metrics", className="section-header"),
+            # Main Visualizations
+            html.H2("Price Performance Metrics", className="section-header"),
         
-        dbc.Row(
-            [
-                dbc.Col(
-                    dcc.Graph(
-                        figure=figures['price_distribution'],
-                        config={"displayModeBar": False},
-                        className="chart-card",
-                        style={"height": "500px"}
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Graph(
+                            figure=figures['price_distribution'],
+                            config={"displayModeBar": False},
+                            className="chart-card",
+                            style={"height": "500px"}
+                        ),
+                        width=6
                     ),
-                    width=6
-                ),
-                dbc.Col(
-                    dcc.Graph(
-                        figure=figures['price_by_brand'],
-                        config={"displayModeBar": False},
-                        className="chart-card",
-                        style={"height": "500px"}
+                    dbc.Col(
+                        dcc.Graph(
+                            figure=figures['price_by_brand'],
+                            config={"displayModeBar": False},
+                            className="chart-card",
+                            style={"height": "500px"}
+                        ),
+                        width=6
                     ),
-                    width=6
-                ),
-            ],
-            className="chart-row"
-        ),
+                ],
+                className="chart-row"
+            ),
         
-        dbc.Row(
-            [
-                dbc.Col(
-                    dcc.Graph(
-                        figure=figures['price_by_store'],
-                        config={"displayModeBar": False},
-                        className="chart-card",
-                        style={"height": "500px"}
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Graph(
+                            figure=figures['price_by_store'],
+                            config={"displayModeBar": False},
+                            className="chart-card",
+                            style={"height": "500px"}
+                        ),
+                        width=6
                     ),
-                    width=6
-                ),
-                dbc.Col(
-                    dcc.Graph(
-                        figure=figures['price_evolution'],
-                        config={"displayModeBar": False},
-                        className="chart-card",
-                        style={"height": "500px"}
+                    dbc.Col(
+                        dcc.Graph(
+                            figure=figures['price_evolution'],
+                            config={"displayModeBar": False},
+                            className="chart-card",
+                            style={"height": "500px"}
+                        ),
+                        width=6
                     ),
-                    width=6
-                ),
-            ],
-            className="chart-row"
-        ),
-    ],
-    fluid=True,
-    className="dashboard-container"
-)
\ No newline at end of file
+                ],
+                className="chart-row"
+            ),
+        ],
+        fluid=True,
+        className="dashboard-container"
+    )
\ No newline at end of file
@@ -1,12 +1,24 @@
+import threading
+from collections import OrderedDict
+
 import dash
 from dash import callback, dcc, html, Input, Output
 import dash_bootstrap_components as dbc
 from utils.functions import create_card
-from utils.data import data_import
+from utils.data import dataset
 import pandas as pd
 import plotly.express as px
-import json
-from dateutil.parser import parse  # Using dateutil for more flexible date parsing
+from utils.history import price_history
+from utils.downsample import downsample_frame
+
+# Maximum number of points drawn in the price trends chart
+MAX_TREND_POINTS = 3000
+
+# Least recently used price trends figures, by (dataset version, store).
+# Figures of an older version are never hit again and age out.
+MAX_TREND_FIGURES = 64
+_trend_figures = OrderedDict()
+_trend_figures_lock = threading.Lock()
 
 # Initialize the Dash page
 dash.register_page(
@@ -20,13 +32,13 @@ dash.register_page(
 # Load and prepare data
 # =============================================
 
-df=data_import()
+# The product frame is shared by all pages and refreshed in the background
 
 # =============================================
 # Data Preparation
 # =============================================
 
-def prepare_store_data(df):
+def prepare_store_data(df, price_data):
     """Prepare all store-related data for visualizations"""
     # Store engagement data
     engagement_data = df.melt(
@@ -37,15 +49,16 @@ def prepare_store_data(df):
     )
 
     # Calculate total engagement per store
-    store_engagement = engagement_data.groupby('store_label')['click_count'].sum().reset_index()
+    store_engagement = engagement_data.groupby('store_label', observed=True)['click_count'].sum().reset_index()
     store_engagement = store_engagement.sort_values('click_count', ascending=False)
     top_stores = store_engagement.head(5)['store_label'].tolist()
     
     # Deal frequency data
-    for col in ['price_deal', 'price_hot_deal', 'price_top_deal']:
-        df[col] = df[col].apply(lambda x: 1 if str(x).lower() in ['yes', 'true'] else 0)
+    deal_flags = df[['price_deal', 'price_hot_deal', 'price_top_deal']].apply(
+        lambda column: column.astype(str).str.lower().isin(['yes', 'true']).astype(int)
+    )
     
-    deal_counts = df.groupby('store_label')[['price_deal', 'price_hot_deal', 'price_top_deal']].sum().reset_index()
+    deal_counts = deal_flags.groupby(df['store_label'], observed=True).sum().reset_index()
     deal_data = deal_counts.melt(
         id_vars=['store_label'],
         value_vars=['price_deal', 'price_hot_deal', 'price_top_deal'],
@@ -60,65 +73,34 @@ def prepare_store_data(df):
         'price_top_deal': 'Top Deal'
     })
     
-    # Parse priceTable data safely
-    price_records = []
-    for idx, row in df.iterrows():
-        try:
-            # Try to parse the price table data
-            if isinstance(row['priceTable'], str):
-                try:
-                    price_table = json.loads(row['priceTable'])
-                except json.JSONDecodeError:
-                    # Try with single quote replacement
-                    price_table = json.loads(row['priceTable'].replace("'", '"'))
-            else:
-                price_table = row['priceTable']
-                
-            # Process each price record
-            if isinstance(price_table, list):
-                for entry in price_table:
-                    try:
-                        dt = parse(entry['date_price'])
-                        price_records.append({
-                            'store_label': row['store_label'],
-                            'product_name': row['title'],
-                            'product_id': row['uniqueID'],
-                            'date_price': dt.strftime('%Y-%m-%d'),
-                            'price': float(entry['price'])
-                        })
-                    except (ValueError, KeyError, TypeError):
-                        continue
-        except (json.JSONDecodeError, TypeError, AttributeError):
-            continue
-    
-    price_data = pd.DataFrame(price_records)
-    if not price_data.empty:
-        price_data['date_price'] = pd.to_datetime(price_data['date_price'])
-        price_data = price_data.sort_values('date_price')
+    # Per-store price history, split once so the trends callback never filters the full frame
+    price_by_store = {
+        store: frame for store, frame in price_data.groupby('store_label', observed=True, sort=False)
+    } if not price_data.empty else {}
     
     # Get top 5 most expensive products per store
     top_products = df.sort_values(['store_label', 'price'], ascending=[True, False]) \
-                   .groupby('store_label').head(5)
+                   .groupby('store_label', observed=True).head(5)
     
     # Get top 3 brands per store (for top 5 stores)
     top_brands = df[df['store_label'].isin(top_stores)] \
-               .groupby(['store_label', 'brand'])['clicks'].sum().reset_index() \
+               .groupby(['store_label', 'brand'], observed=True)['clicks'].sum().reset_index() \
                .sort_values(['store_label', 'clicks'], ascending=[True, False]) \
-               .groupby('store_label').head(3)
+               .groupby('store_label', observed=True).head(3)
     
     # Average price per store
-    avg_price_by_store = df.groupby('store_label')['price'].mean().reset_index()
+    avg_price_by_store = df.groupby('store_label', observed=True)['price'].mean().reset_index()
     avg_price_by_store = avg_price_by_store.sort_values('price', ascending=False)
     
     # Store product count
-    product_count_by_store = df.groupby('store_label')['uniqueID'].count().reset_index()
+    product_count_by_store = df.groupby('store_label', observed=True)['uniqueID'].count().reset_index()
     product_count_by_store.columns = ['store_label', 'product_count']
     
     # Calculate summary stats
     stats = {
         'total_stores': df['store_label'].nunique(),
         'avg_price': df['price'].mean(),
-        'total_deals': df[['price_deal', 'price_hot_deal', 'price_top_deal']].sum().sum(),
+        'total_deals': deal_flags.sum().sum(),
         'total_products': len(df)
     }
     
@@ -132,6 +114,7 @@ def prepare_store_data(df):
         'store_engagement': store_engagement,
         'deal_data': deal_data,
         'price_data': price_data,
+        'price_by_store': price_by_store,
         'top_products': top_products,
         'top_brands': top_brands,
         'top_stores': top_stores,
@@ -141,8 +124,6 @@ def prepare_store_data(df):
         **stats
     }
 
-store_data = prepare_store_data(df)
-
 # =============================================
 # Visualizations
 # =============================================
@@ -166,7 +147,7 @@ def create_store_visualizations(store_data):
     
     # 2. Store Engagement Comparison
     engagement_chart = px.bar(
-        store_data['engagement_data'].groupby(['store_label', 'click_type'])['click_count'].sum().reset_index(),
+        store_data['engagement_data'].groupby(['store_label', 'click_type'], observed=True)['click_count'].sum().reset_index(),
         x='store_label',
         y='click_count',
         color='click_type',
@@ -262,59 +243,69 @@ def create_store_visualizations(store_data):
         'product_count_chart': product_count_chart
     }
 
-figures = create_store_visualizations(store_data)
+def build_page(df):
+    """Compute the store data and figures for one dataset version"""
+    # Price history is exploded once and shared with the price page
+    store_data = prepare_store_data(df, price_history.for_frame(df))
+    return store_data, create_store_visualizations(store_data)
+
+# Computed on the first visit, then reused until the dataset version changes;
+# the builders only read the shared frame
+page_data = dataset.derive(build_page, copy=False)
 
 # =============================================
 # Callbacks for Interactive Features
 # =============================================
 
-@callback(
-    Output('price-trends-chart', 'figure'),
-    Input('store-selector', 'value')
-)
-def update_price_trends(selected_store):
-    """Update price trends chart based on selected store"""
+def empty_trends_figure(title, message):
+    fig = px.line(title=title)
+    fig.update_layout(
+        annotations=[{
+            'text': message,
+            'showarrow': False,
+            'font': {'size': 16}
+        }]
+    )
+    return fig
+
+
+def price_trends_figure(selected_store, price_by_store):
+    """
+    Build the price trends figure for one store from the per-store price history
+    """
+    
     # Check if price data is available
-    if store_data['price_data'].empty:
-        fig = px.line(title="No price history data available")
-        fig.update_layout(
-            annotations=[{
-                'text': 'No price history data available for this selection',
-                'showarrow': False,
-                'font': {'size': 16}
-            }]
-        )
-        return fig
+    if not price_by_store:
+        return empty_trends_figure(
+            "No price history data available",
+            'No price history data available for this selection'
+        ).to_dict()
     
-    # Filter data if a specific store is selected
+    # Use the pre-grouped frame if a specific store is selected
     if selected_store != 'ALL':
-        filtered_data = store_data['price_data'][store_data['price_data']['store_label'] == selected_store]
+        filtered_data = price_by_store.get(selected_store)
         
         # Check if filtered data is empty
-        if filtered_data.empty:
-            fig = px.line(title=f"No price history data available for {selected_store}")
-            fig.update_layout(
-                annotations=[{
-                    'text': f'No price history data available for {selected_store}',
-                    'showarrow': False,
-                    'font': {'size': 16}
-                }]
-            )
-            return fig
+        if filtered_data is None or filtered_data.empty:
+            return empty_trends_figure(
+                f"No price history data available for {selected_store}",
+                f'No price history data available for {selected_store}'
+            ).to_dict()
         
         fig = px.line(
-            filtered_data.sort_values('date_price'),
-            x='date_price',
+            downsample_frame(filtered_data, 'date', 'price', MAX_TREND_POINTS),
+            x='date',
             y='price',
             title=f'Price Trends for {selected_store}',
             color_discrete_sequence=['#2E7D32'],
             hover_data=['product_name']
         )
     else:
-        # Show all stores with data
+        # Show all stores with data, sharing the point budget between stores
+        per_store_points = max(MAX_TREND_POINTS // len(price_by_store), 50)
         fig = px.line(
-            store_data['price_data'].sort_values('date_price'),
-            x='date_price',
+            pd.concat([downsample_frame(frame, 'date', 'price', per_store_points) for frame in price_by_store.values()]),
+            x='date',
             y='price',
             color='store_label',
             title='Store Price Trends - All Stores',
@@ -340,143 +331,172 @@ def update_price_trends(selected_store):
             hovertemplate="<b>%{customdata[0]}</b><br>Date: %{x|%Y-%m-%d}<br>Price: %{y:.2f} DT"
         )
     
-    return fig
+    return fig.to_dict()
+
+
+@callback(
+    Output('price-trends-chart', 'figure'),
+    Input('store-selector', 'value')
+)
+def update_price_trends(selected_store):
+    """Update price trends chart based on selected store"""
+    # Version and data come from the same snapshot, so a refresh between two
+    # reads cannot store a figure of the new data under the old version
+    data_version, (store_data, _) = page_data.versioned()
+    key = (data_version, selected_store)
+    with _trend_figures_lock:
+        figure = _trend_figures.get(key)
+        if figure is not None:
+            _trend_figures.move_to_end(key)
+            return figure
+
+    # Switching back to a store reuses its figure until the data changes
+    figure = price_trends_figure(selected_store, store_data['price_by_store'])
+    with _trend_figures_lock:
+        _trend_figures[key] = figure
+        _trend_figures.move_to_end(key)
+        while len(_trend_figures) > MAX_TREND_FIGURES:
+            _trend_figures.popitem(last=False)
+    return figure
 
 # =============================================
 # Dashboard Layout
 # =============================================
 
-layout = dbc.Container(
-    [
-        # Header Section
-        html.Div(
-            [
-                html.H1("Store Performance Dashboard", className="page-header"),
-                html.P("Analyze store engagement, pricing trends, and product performance", 
-                      className="page-subtitle"),
-            ],
-            className="header-section"
-        ),
+def layout(**kwargs):
+    """Build the page from the current dataset snapshot"""
+    store_data, figures = page_data.get()
+    return dbc.Container(
+        [
+            # Header Section
+            html.Div(
+                [
+                    html.H1("Store Performance Dashboard", className="page-header"),
+                    html.P("Analyze store engagement, pricing trends, and product performance", 
+                          className="page-subtitle"),
+                ],
+                className="header-section"
+            ),
         
-        # Summary Cards
-        dbc.Row(
-            [
-                dbc.Col(create_card("Total Stores", f"{store_data['total_stores']:,}", "fa-store"), width=4),
-                dbc.Col(create_card("Avg Price", f"{store_data['avg_price']:.2f} DT", "fa-tag"), width=4),
-                dbc.Col(create_card("Total Products", f"{store_data['total_products']:,}", "fa-box"), width=4),
-            ],
-            className="summary-cards-row",
-        ),
+            # Summary Cards
+            dbc.Row(
+                [
+                    dbc.Col(create_card("Total Stores", f"{store_data['total_stores']:,}", "fa-store"), width=4),
+                    dbc.Col(create_card("Avg Price", f"{store_data['avg_price']:.2f} DT", "fa-tag"), width=4),
+                    dbc.Col(create_card("Total Products", f"{store_data['total_products']:,}", "fa-box"), width=4),
+                ],
+                className="summary-cards-row",
+            ),
         
-        # Pricing Trends with Dropdown
-        html.H2("Pricing Trends", className="section-header"),
-        dbc.Row([
-            dbc.Col([
-                dcc.Dropdown(
-                    id='store-selector',
-                    options=store_data['store_options'],
-                    value='ALL',
-                    clearable=False,
-                    className="store-selector"
-                ),
-                dcc.Graph(
-                    id='price-trends-chart',
-                    figure=figures['price_trends_chart'],
-                    className="chart-card",
-                    style={"height": "500px"}
-                )
-            ], width=12)
-        ], className="chart-row"),
+            # Pricing Trends with Dropdown
+            html.H2("Pricing Trends", className="section-header"),
+            dbc.Row([
+                dbc.Col([
+                    dcc.Dropdown(
+                        id='store-selector',
+                        options=store_data['store_options'],
+                        value='ALL',
+                        clearable=False,
+                        className="store-selector"
+                    ),
+                    dcc.Graph(
+                        id='price-trends-chart',
+                        figure=figures['price_trends_chart'],
+                        className="chart-card",
+                        style={"height": "500px"}
+                    )
+                ], width=12)
+            ], className="chart-row"),
         
-        # Store Engagement Section
-        html.H2("Store Engagement", className="section-header"),
-        dbc.Row([
-            dbc.Col(
-                dcc.Graph(
-                    figure=figures['engagement_treemap'],
-                    className="chart-card",
-                    style={"height": "500px"}
+            # Store Engagement Section
+            html.H2("Store Engagement", className="section-header"),
+            dbc.Row([
+                dbc.Col(
+                    dcc.Graph(
+                        figure=figures['engagement_treemap'],
+                        className="chart-card",
+                        style={"height": "500px"}
+                    ),
+                    width=6
                 ),
-                width=6
-            ),
-            dbc.Col(
-                dcc.Graph(
-                    figure=figures['engagement_chart'],
-                    className="chart-card",
-                    style={"height": "500px"}
+                dbc.Col(
+                    dcc.Graph(
+                        figure=figures['engagement_chart'],
+                        className="chart-card",
+                        style={"height": "500px"}
+                    ),
+                    width=6
                 ),
-                width=6
-            ),
-        ], className="chart-row"),
+            ], className="chart-row"),
         
-        # Store Products and Brands Section
-        html.H2("Products and Brands", className="section-header"),
-        dbc.Row([
-            dbc.Col(
-                dcc.Graph(
-                    figure=figures['product_count_chart'],
-                    className="chart-card",
-                    style={"height": "500px"}
+            # Store Products and Brands Section
+            html.H2("Products and Brands", className="section-header"),
+            dbc.Row([
+                dbc.Col(
+                    dcc.Graph(
+                        figure=figures['product_count_chart'],
+                        className="chart-card",
+                        style={"height": "500px"}
+                    ),
+                    width=6
                 ),
-                width=6
-            ),
-            dbc.Col(
-                dcc.Graph(
-                    figure=figures['top_brands_chart'],
-                    className="chart-card",
-                    style={"height": "500px"}
+                dbc.Col(
+                    dcc.Graph(
+                        figure=figures['top_brands_chart'],
+                        className="chart-card",
+                        style={"height": "500px"}
+                    ),
+                    width=6
                 ),
-                width=6
-            ),
-        ], className="chart-row"),
+            ], className="chart-row"),
         
-        # Store Pricing Section
-        html.H2("Store Pricing Analysis", className="section-header"),
-        dbc.Row([
-            dbc.Col(
-                dcc.Graph(
-                    figure=figures['avg_price_chart'],
-                    className="chart-card",
-                    style={"height": "500px"}
+            # Store Pricing Section
+            html.H2("Store Pricing Analysis", className="section-header"),
+            dbc.Row([
+                dbc.Col(
+                    dcc.Graph(
+                        figure=figures['avg_price_chart'],
+                        className="chart-card",
+                        style={"height": "500px"}
+                    ),
+                    width=6
                 ),
-                width=6
-            ),
-            dbc.Col(
-                dcc.Graph(
-                    figure=figures['deal_frequency_chart'],
-                    className="chart-card",
-                    style={"height": "500px"}
+                dbc.Col(
+                    dcc.Graph(
+                        figure=figures['deal_frequency_chart'],
+                        className="chart-card",
+                        style={"height": "500px"}
+                    ),
+                    width=6
                 ),
-                width=6
-            ),
-        ], className="chart-row"),
+            ], className="chart-row"),
         
-        # Explanation Section
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.H3("Understanding Store Metrics", className="mt-4"),
-                        html.P([
-                            html.Strong("Engagement: "), 
-                            "Total clicks and external clicks received by products from each store."
-                        ]),
-                        html.P([
-                            html.Strong("Pricing Trends: "), 
-                            "Historical price data showing how product prices have changed over time."
-                        ]),
-                        html.P([
-                            html.Strong("Deal Frequency: "), 
-                            "Distribution of regular deals, hot deals, and top deals across stores."
-                        ]),
-                    ],
-                    className="info-section"
+            # Explanation Section
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.H3("Understanding Store Metrics", className="mt-4"),
+                            html.P([
+                                html.Strong("Engagement: "), 
+                                "Total clicks and external clicks received by products from each store."
+                            ]),
+                            html.P([
+                                html.Strong("Pricing Trends: "), 
+                                "Historical price data showing how product prices have changed over time."
+                            ]),
+                            html.P([
+                                html.Strong("Deal Frequency: "), 
+                                "Distribution of regular deals, hot deals, and top deals across stores."
+                            ]),
+                        ],
+                        className="info-section"
+                    ),
+                    width=12
                 ),
-                width=12
-            ),
-            className="mt-4"
-        )
-    ],
-    fluid=True,
-    className="dashboard-container"
-)
\ No newline at end of file
+                className="mt-4"
+            )
+        ],
+        fluid=True,
+        className="dashboard-container"
+    )
\ No newline at end of file
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Copy the modules shared with the scraper from data_manager/ into utils/.
+data_manager/ holds the only implementation; the dashboard is deployed on its
+own, so it ships copies that must stay byte-identical to the originals.
+
+Usage (from the dashboard directory):
+    python sync_shared.py           # rewrite the copies
+    python sync_shared.py --check   # exit with 1 if a copy differs
+"""
+
+import argparse
+import os
+import sys
+
+DASHBOARD_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(DASHBOARD_DIR, "..", "data_manager")
+TARGET_DIR = os.path.join(DASHBOARD_DIR, "utils")
+
+# Modules of data_manager/ copied into utils/
+SHARED_MODULES = ["brands.py", "downsample.py"]
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy the shared modules from data_manager/ into utils/")
+    parser.add_argument("--check", action="store_true", help="Only check that the copies are up to date")
+    args = parser.parse_args()
+
+    stale = []
+    for name in SHARED_MODULES:
+        source = read(os.path.join(SOURCE_DIR, name))
+        target_path = os.path.join(TARGET_DIR, name)
+        if os.path.exists(target_path) and read(target_path) == source:
+            continue
+        stale.append(name)
+        if not args.check:
+            with open(target_path, "wb") as f:
+                f.write(source)
+            print(f"Updated utils/{name}")
+
+    if args.check and stale:
+        print(f"❌ Out of date with data_manager/: {', '.join(stale)} (run python sync_shared.py)")
+        sys.exit(1)
+    if not stale:
+        print(f"✅ {len(SHARED_MODULES)} shared modules up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,50 @@
 
+import os
+import threading
+import time
 import pandas as pd
 import requests
 
+from utils.brands import normalize_brands
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Seconds between background refreshes of the shared dataset
+DATA_TTL = int(os.environ.get("DATA_TTL", 15 * 60))
+
+# Directory shared by all server workers for the memory-mapped snapshot.
+# Unset: every process downloads and keeps its own copy.
+DATA_SNAPSHOT_DIR = os.environ.get("DATA_SNAPSHOT_DIR")
+
+# Seconds between checks for a new snapshot written by another worker
+DATA_SNAPSHOT_POLL = int(os.environ.get("DATA_SNAPSHOT_POLL", 60))
+
+
+def fetch_products(url):
+    """
+    Download the product list from the API as a DataFrame.
+    Asks for an Arrow IPC stream when pyarrow is installed (no JSON parsing),
+    and falls back to the JSON response otherwise.
+    """
+    headers = {"Accept": f"{ARROW_MEDIA_TYPE}, application/json;q=0.5"} if pa is not None else {}
+    response = requests.get(url, headers=headers)
+    response.raise_for_status()
+
+    if response.headers.get("content-type", "").startswith(ARROW_MEDIA_TYPE):
+        df = pa.ipc.open_stream(response.content).read_pandas()
+        # Arrow list columns come back as numpy arrays; the pages expect lists
+        for column in ('priceTable', 'availabilityTable'):
+            if column in df.columns:
+                df[column] = df[column].apply(lambda x: list(x) if x is not None else [])
+        return df
+
+    return pd.DataFrame(response.json()['items'])
+
 
 def data_import():
     # Fetch data from the API
@@ -9,37 +52,175 @@ def data_import():
 
     url = "https://barbechli-api.onrender.com/api/v1/products/?sort_by=last_updated&sort_order=desc&skip=0&limit=2000"
 
-    response = requests.get(url)
-
-    # Parse JSON response
-    data = response.json()
-
     # Convert to DataFrame
-    df = pd.DataFrame(data['items'])
+    df = fetch_products(url)
 
     df.drop(columns=['category', 'subcategory', 'currency','source_name'],axis=0 ,inplace=True)
-    ids_amd=df[df['brand']=='amd'] .index.tolist()
-
-    for i in ids_amd:
-      df['brand'].iloc[i]=df['title'].iloc[i].split(' ')[2]
-
-    ids_nvd=df[df['brand']=='nvidia'] .index.tolist()
-
-    for i in ids_nvd:
-      df['brand'].iloc[i]=df['title'].iloc[i].split(' ')[2]
-
-    df['brand'][df['brand']=='m']='apple'
-    df['brand'][df['brand']=='mba']='apple'
-    df['brand'][df['brand']=='ACER']='acer'
-    df['brand'][df['brand']=='hz']='acer'
-    df['brand'][df['brand']=='i']='dell'
-    df['brand'][df['brand']=='rtx']='asus'
-    df['brand'][df['brand']=='windows']='asus'
-    df['brand'][df['brand']=='ASUS']='asus'
-    df['brand'][df['brand']=='icon']='msi'
-    df['brand'][df['brand']=='gpu']='msi'
-    df['brand'][df['brand']=='badge']='lenovo'
-    df['brand'][df['brand']=='geforce']='lenovo'
-    df['brand'][df['brand']=='LENOVO']='lenovo'
+
+    # Fix chipset vendors, title fragments and missing brands
+    df['brand'] = normalize_brands(df['brand'], df['title'])
     return df
 
+
+class Dataset:
+    """
+    Process-wide product dataset shared by all pages.
+
+    The data is fetched once, then refreshed every `ttl` seconds by a background
+    thread. Each refresh builds a new DataFrame and swaps it in atomically with a
+    new version number, so readers always see a complete snapshot.
+    """
+
+    def __init__(self, loader, ttl=DATA_TTL):
+        self.loader = loader
+        self.ttl = ttl
+        self._state = None  # (version, frame, loaded_at), replaced as a whole
+        self._load_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def version(self):
+        state = self._state
+        return state[0] if state else 0
+
+    def snapshot(self):
+        """
+        Return (version, frame), loading the data on first use.
+        The frame is shared and must be treated as read-only.
+        """
+        state = self._state
+        if state is None:
+            with self._load_lock:
+                if self._state is None:
+                    self.refresh()
+            state = self._state
+        self.start()
+        return state[0], state[1]
+
+    def frame(self):
+        return self.snapshot()[1]
+
+    def refresh(self):
+        """
+        Load a fresh frame and swap it in with a new version
+        """
+        frame = self.loader()
+        state = self._state
+        if state is not None and frame is state[1]:
+            # Loader had nothing new (shared snapshot unchanged): keep the
+            # version so derived data is not rebuilt
+            return
+        version = self.version + 1
+        # Lets derived data built from this frame find the version it belongs to
+        frame.attrs["dataset_version"] = version
+        self._state = (version, frame, time.time())
+        print(f"Dataset loaded: {len(frame)} products (version {self.version})")
+
+    def preload(self):
+        """
+        Load the first snapshot in a background thread so startup does not
+        wait for the download; the first reader blocks until it is ready
+        """
+        def load():
+            try:
+                self.snapshot()
+            except Exception as e:
+                print(f"Error preloading dataset: {e}")
+
+        threading.Thread(target=load, name="dataset-preload", daemon=True).start()
+
+    def start(self):
+        """
+        Start the background refresh thread if it is not already running
+        """
+        if self.ttl <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        with self._load_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._refresh_loop, name="dataset-refresh", daemon=True)
+            self._thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.ttl)
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the previous snapshot
+                print(f"Error refreshing dataset: {e}")
+
+    def derive(self, builder, copy=True):
+        """
+        Register a computation over the dataset that is only re-run when the
+        dataset version changes. Builders that do not modify the frame can
+        pass copy=False to skip the defensive copy.
+        """
+        return DerivedData(self, builder, copy)
+
+
+class DerivedData:
+    """
+    Result of `builder(frame)` cached against the dataset version
+    """
+
+    def __init__(self, dataset, builder, copy=True):
+        self.dataset = dataset
+        self.builder = builder
+        self.copy = copy
+        self._cached = None  # (version, value)
+        self._lock = threading.Lock()
+
+    def get(self):
+        return self.versioned()[1]
+
+    def versioned(self):
+        """
+        Return (dataset version, value), rebuilding the value if the dataset changed
+        """
+        version, frame = self.dataset.snapshot()
+        cached = self._cached
+        if cached is not None and cached[0] == version:
+            return cached
+
+        with self._lock:
+            cached = self._cached
+            if cached is None or cached[0] != version:
+                # Builders may add or modify columns, so they get their own copy
+                cached = (version, self.builder(frame.copy() if self.copy else frame))
+                self._cached = cached
+        return cached
+
+    def for_frame(self, frame):
+        """
+        Return the value for the dataset version `frame` belongs to. Builders
+        of other derived data use it, so both are computed from one snapshot
+        even when a refresh happens in between.
+        """
+        version = frame.attrs.get("dataset_version")
+        cached = self._cached
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        with self._lock:
+            cached = self._cached
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            value = self.builder(frame.copy() if self.copy else frame)
+            # An older frame's value is returned without replacing a newer one
+            if cached is None or version is None or cached[0] < version:
+                self._cached = (version, value)
+            return value
+
+
+if DATA_SNAPSHOT_DIR and pa is not None:
+    from utils.snapshot import ArrowSnapshot
+
+    # One worker downloads and writes the snapshot every DATA_TTL seconds;
+    # all workers poll the shared directory and memory-map the latest one
+    snapshot = ArrowSnapshot(data_import, DATA_SNAPSHOT_DIR, DATA_TTL)
+    dataset = Dataset(snapshot, ttl=min(DATA_TTL, DATA_SNAPSHOT_POLL))
+else:
+    snapshot = None
+    dataset = Dataset(data_import)
+
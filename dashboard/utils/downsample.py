@@ -0,0 +1,126 @@
+"""
+Downsampling of long price series for the API's and the dashboard's charts.
+dashboard/utils/downsample.py is a copy written by dashboard/sync_shared.py;
+edit this file and re-run it.
+Functions return the indices of the points to keep so callers can carry any
+extra columns (product name, store...) along with the selected points.
+"""
+
+import numpy as np
+
+
+def _as_float(values):
+    """
+    Convert x values (numbers or datetime64) to float64 for area computations
+    """
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype("datetime64[ns]").astype(np.int64)
+    return values.astype(np.float64)
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Args:
+        x: Sorted x values (numbers or datetime64)
+        y: y values
+        max_points: Number of points to keep (at least 3)
+
+    Returns:
+        Sorted array of indices of the selected points
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    # First and last points are always kept; the rest is split into buckets
+    every = (n - 2) / (max_points - 2)
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    selected = 0
+    for i in range(max_points - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        # Average of the next bucket (the last point for the final bucket)
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        # Keep the point forming the largest triangle with the previous pick
+        # and the next bucket's average
+        areas = np.abs(
+            (x[selected] - next_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (next_y - y[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indices[i + 1] = selected
+
+    return indices
+
+
+def minmax_indices(y, max_points):
+    """
+    Min/max bucketing: keep the lowest and highest point of each bucket
+
+    Args:
+        y: y values, in x order
+        max_points: Number of points to keep (two per bucket)
+
+    Returns:
+        Sorted array of indices of the selected points
+    """
+    n = len(y)
+    if max_points >= n or max_points < 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(0, n, max_points // 2 + 1).astype(np.int64)
+
+    indices = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        bucket = y[start:end]
+        indices.append(start + int(np.argmin(bucket)))
+        indices.append(start + int(np.argmax(bucket)))
+
+    return np.unique(np.asarray(indices, dtype=np.int64))
+
+
+def downsample_indices(x, y, max_points, method="lttb"):
+    """
+    Select at most max_points points of a series with the given method ("lttb" or "minmax")
+    """
+    if method == "minmax":
+        return minmax_indices(y, max_points)
+    if method == "lttb":
+        return lttb_indices(x, y, max_points)
+    raise ValueError(f"Unknown downsampling method: {method}")
+
+
+def downsample_frame(frame, x, y, max_points, method="lttb"):
+    """
+    Downsample a DataFrame sorted by column `x`, keeping whole rows
+
+    Args:
+        frame: pandas DataFrame sorted by x
+        x: Name of the x column
+        y: Name of the y column
+        max_points: Point budget
+        method: "lttb" or "minmax"
+
+    Returns:
+        DataFrame with at most max_points rows
+    """
+    if len(frame) <= max_points:
+        return frame
+    indices = downsample_indices(frame[x].to_numpy(), frame[y].to_numpy(), max_points, method)
+    return frame.iloc[indices]
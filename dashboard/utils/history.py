@@ -0,0 +1,69 @@
+import json
+import pandas as pd
+from utils.data import dataset, snapshot
+
+
+def parse_price_table(value):
+    """
+    Parse a priceTable stored as text (CSV exports use Python repr quoting)
+    """
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        try:
+            return json.loads(value.replace("'", '"'))
+        except json.JSONDecodeError:
+            return []
+
+
+def build_price_history(df):
+    """
+    Explode the priceTable column into one row per price point.
+
+    Returns:
+        DataFrame with columns date (day precision), price (float32),
+        product_id, product_name and store_label (categoricals), sorted by date
+    """
+    columns = ['date', 'price', 'product_id', 'product_name', 'store_label']
+
+    tables = df['priceTable']
+    is_text = tables.map(lambda x: isinstance(x, str))
+    if is_text.any():
+        tables = tables.where(~is_text, tables[is_text].map(parse_price_table))
+
+    # One row per history entry, keeping the owning product's keys
+    exploded = pd.DataFrame({
+        'product_id': df['uniqueID'].values,
+        'product_name': df['title'].values,
+        'store_label': df['store_label'].values,
+        'entry': tables.values,
+    }).explode('entry', ignore_index=True)
+    exploded = exploded[exploded['entry'].notna()]
+    if exploded.empty:
+        return pd.DataFrame(columns=columns)
+
+    entries = pd.DataFrame.from_records(exploded['entry'].tolist(), columns=['date_price', 'price'])
+
+    history = pd.DataFrame({
+        'date': pd.to_datetime(entries['date_price'], format='ISO8601', utc=True, errors='coerce')
+                  .dt.tz_localize(None).dt.normalize(),
+        'price': pd.to_numeric(entries['price'], errors='coerce').astype('float32'),
+        'product_id': exploded['product_id'].values,
+        'product_name': exploded['product_name'].values,
+        'store_label': exploded['store_label'].values,
+    })
+    history = history.dropna(subset=['date', 'price'])
+
+    for column in ('product_id', 'product_name', 'store_label'):
+        history[column] = history[column].astype('category')
+
+    return history.sort_values('date', kind='stable', ignore_index=True)
+
+
+# Shared by the price and store pages, rebuilt once per dataset version
+if snapshot is not None:
+    # Built once by the worker writing the snapshot, memory-mapped by all workers
+    snapshot.register_table('price_history', build_price_history)
+    price_history = dataset.derive(lambda df: snapshot.table('price_history', df), copy=False)
+else:
+    price_history = dataset.derive(build_price_history, copy=False)
@@ -0,0 +1,172 @@
+import json
+import os
+import shutil
+import time
+import pyarrow as pa
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development, no locking needed
+    fcntl = None
+
+# Low-cardinality text columns stored dictionary-encoded: they are read back as
+# pandas categoricals (small codes over the memory map) instead of one Python
+# string per row in every worker
+DICTIONARY_COLUMNS = (
+    "store_label", "brand", "availability", "price_week_changed",
+    "price_deal", "price_hot_deal", "price_top_deal",
+)
+
+
+class ArrowSnapshot:
+    """
+    Dataset loader sharing one copy of the data between server workers.
+
+    Exactly one worker (the one holding the lock file) downloads the catalog and
+    writes it, with any registered derived tables, as Arrow IPC files into a new
+    generation directory. It then atomically replaces the CURRENT pointer. Every
+    worker memory-maps the files of the current generation read-only, so the
+    numeric buffers are shared through the OS page cache instead of being copied
+    into each process.
+    """
+
+    def __init__(self, fetch, directory, ttl, keep_generations=2):
+        self.fetch = fetch
+        self.directory = directory
+        self.ttl = ttl
+        self.keep_generations = keep_generations
+        self.builders = {}
+        self._generation = None
+        self._frame = None
+        self._tables = {}
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def pointer_path(self):
+        return os.path.join(self.directory, "CURRENT")
+
+    def register_table(self, name, builder):
+        """
+        Add a table derived from the catalog (builder(frame) -> DataFrame)
+        that is written with each generation and shared the same way
+        """
+        self.builders[name] = builder
+
+    def __call__(self):
+        """
+        Return the catalog frame of the current generation, producing a new
+        generation first if the current one is missing or older than the TTL.
+        Returns the same object as the previous call when nothing changed.
+        """
+        if self._is_stale():
+            self._produce()
+
+        generation = self._read_pointer()
+        if generation is None:
+            raise RuntimeError(f"No dataset snapshot available in {self.directory}")
+
+        if generation != self._generation:
+            frame = self._read_table(generation, "catalog")
+            frame.attrs["snapshot_generation"] = generation
+            self._tables = {}
+            self._frame = frame
+            self._generation = generation
+        return self._frame
+
+    def table(self, name, frame=None):
+        """
+        Return a registered derived table, memory-mapped like the catalog
+
+        Args:
+            name: Name given to register_table
+            frame: Catalog frame the table must match; defaults to the
+                generation loaded last
+        """
+        generation = frame.attrs.get("snapshot_generation") if frame is not None else None
+        generation = generation or self._generation
+        key = (generation, name)
+        tables = self._tables
+        if key not in tables:
+            tables[key] = self._read_table(generation, name)
+        return tables[key]
+
+    def _is_stale(self):
+        try:
+            return time.time() - os.path.getmtime(self.pointer_path) >= self.ttl
+        except OSError:
+            return True
+
+    def _read_pointer(self):
+        try:
+            with open(self.pointer_path, "r", encoding="utf-8") as f:
+                return json.load(f)["generation"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _read_table(self, generation, name):
+        path = os.path.join(self.directory, generation, f"{name}.arrow")
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        # split_blocks avoids consolidating columns, so numeric columns without
+        # nulls stay zero-copy views over the memory map; self_destruct drops
+        # each Arrow column as soon as it is converted
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    def _produce(self):
+        """
+        Download and write a new generation unless another worker is doing it
+        """
+        lock_file = open(os.path.join(self.directory, ".lock"), "w")
+        try:
+            if fcntl is not None:
+                has_pointer = self._read_pointer() is not None
+                try:
+                    # Without any snapshot yet, wait for whoever is producing one
+                    fcntl.flock(lock_file, fcntl.LOCK_EX if not has_pointer else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return
+                # Another worker may have finished while we waited for the lock
+                if not self._is_stale():
+                    return
+
+            frame = self.fetch()
+            generation = f"gen-{time.time_ns()}"
+            generation_dir = os.path.join(self.directory, generation)
+            os.makedirs(generation_dir)
+
+            self._write_table(frame, os.path.join(generation_dir, "catalog.arrow"))
+            for name, builder in self.builders.items():
+                self._write_table(builder(frame), os.path.join(generation_dir, f"{name}.arrow"))
+
+            # Atomic swap: readers see either the old or the new generation
+            tmp_path = self.pointer_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"generation": generation, "created": time.time()}, f)
+            os.replace(tmp_path, self.pointer_path)
+            print(f"Wrote dataset snapshot {generation}")
+
+            self._cleanup(generation)
+        finally:
+            lock_file.close()
+
+    def _write_table(self, frame, path):
+        # Nested history columns are not needed once derived tables are built
+        frame = frame.drop(columns=[c for c in ('priceTable', 'availabilityTable') if c in frame.columns])
+        # Sorted categories, so groupby results keep the order of plain strings
+        for column in DICTIONARY_COLUMNS:
+            if column in frame.columns and frame[column].dtype == object:
+                frame[column] = frame[column].astype("category")
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    def _cleanup(self, current):
+        """
+        Remove old generations. Workers still mapping them keep their data
+        until they switch, since unlinked files stay readable on POSIX.
+        """
+        generations = sorted(
+            name for name in os.listdir(self.directory) if name.startswith("gen-") and name != current
+        )
+        for name in generations[:max(0, len(generations) - (self.keep_generations - 1))]:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
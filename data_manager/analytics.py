@@ -0,0 +1,260 @@
+"""
+Embedded DuckDB analytics over the product data.
+
+A connection exposes the same three views whatever the source:
+- products(unique_id, title, store_label, brand, source_name, category,
+  subcategory, price, availability, clicks, clicks_external, date_creation,
+  last_updated)
+- price_points(unique_id, source_name, store_label, date, price)
+- availability_points(unique_id, source_name, store_label, date, availability)
+
+The views read either the Parquet export (see parquet_export) or the Postgres
+tables through DuckDB's postgres extension, so the aggregations run locally
+without loading the catalog into pandas.
+
+Usage:
+    python -m data_manager.analytics median_price_by_store_week --param store=Mytek
+"""
+
+import argparse
+import os
+
+import duckdb
+
+from data_manager.parquet_export import DEFAULT_OUTPUT_DIR
+
+# Canned queries: name -> description, SQL using $name parameters, and the
+# parameters with their defaults (None for optional filters)
+QUERIES = {
+    "median_price_by_store_week": {
+        "description": "Median price per store and week",
+        "sql": """
+            SELECT store_label, date_trunc('week', date) AS week,
+                   median(price) AS median_price, count(*) AS points
+            FROM price_points
+            WHERE ($store IS NULL OR store_label = $store)
+              AND ($since IS NULL OR date >= CAST($since AS TIMESTAMPTZ))
+            GROUP BY ALL
+            ORDER BY store_label, week
+        """,
+        "params": {"store": None, "since": None},
+    },
+    "price_over_time": {
+        "description": "Average and median price per day across all stores",
+        "sql": """
+            SELECT date_trunc('day', date) AS day, avg(price) AS avg_price,
+                   median(price) AS median_price, count(*) AS points
+            FROM price_points
+            WHERE ($brand IS NULL OR unique_id IN (SELECT unique_id FROM products WHERE brand = $brand))
+              AND ($since IS NULL OR date >= CAST($since AS TIMESTAMPTZ))
+            GROUP BY ALL
+            ORDER BY day
+        """,
+        "params": {"brand": None, "since": None},
+    },
+    "store_overview": {
+        "description": "Product count, prices and clicks per store",
+        "sql": """
+            SELECT store_label, count(*) AS product_count,
+                   avg(price) AS avg_price, median(price) AS median_price,
+                   CAST(sum(clicks) AS BIGINT) AS clicks,
+                   CAST(sum(clicks_external) AS BIGINT) AS clicks_external
+            FROM products
+            GROUP BY store_label
+            ORDER BY product_count DESC
+            LIMIT $limit
+        """,
+        "params": {"limit": 50},
+    },
+    "brand_overview": {
+        "description": "Product count and price range per brand",
+        "sql": """
+            SELECT brand, count(*) AS product_count,
+                   avg(price) AS avg_price, median(price) AS median_price,
+                   min(price) AS min_price, max(price) AS max_price
+            FROM products
+            WHERE brand <> 'na'
+              AND ($store IS NULL OR store_label = $store)
+            GROUP BY brand
+            ORDER BY product_count DESC
+            LIMIT $limit
+        """,
+        "params": {"store": None, "limit": 10},
+    },
+    "availability_by_store": {
+        "description": "Share of products in stock per store",
+        "sql": """
+            SELECT store_label, count(*) AS product_count,
+                   avg(CASE WHEN availability = 'on_stock' THEN 1.0 ELSE 0.0 END) AS in_stock_share
+            FROM products
+            GROUP BY store_label
+            ORDER BY product_count DESC
+        """,
+        "params": {},
+    },
+    "most_repriced": {
+        "description": "Products whose price changed most often",
+        "sql": """
+            SELECT unique_id, any_value(store_label) AS store_label,
+                   count(DISTINCT price) AS distinct_prices,
+                   min(price) AS min_price, max(price) AS max_price
+            FROM price_points
+            WHERE ($store IS NULL OR store_label = $store)
+            GROUP BY unique_id
+            ORDER BY distinct_prices DESC, max_price - min_price DESC
+            LIMIT $limit
+        """,
+        "params": {"store": None, "limit": 20},
+    },
+}
+
+# Views over the Parquet export
+PARQUET_VIEWS = {
+    "products": """
+        SELECT uniqueID AS unique_id, title, store_label, brand, source_name, category, subcategory,
+               price, availability, clicks, clicksExternal AS clicks_external, date_creation, last_updated
+        FROM read_parquet('{dir}/products.parquet')
+    """,
+    "price_points": """
+        SELECT uniqueID AS unique_id, source_name, store_label, date, price
+        FROM read_parquet('{dir}/price_points/*/*.parquet', hive_partitioning = true)
+    """,
+    "availability_points": """
+        SELECT uniqueID AS unique_id, source_name, store_label, date, availability
+        FROM read_parquet('{dir}/availability_points/*/*.parquet', hive_partitioning = true)
+    """,
+}
+
+# Views over the Postgres tables attached as "pg"; histories are unnested from JSONB
+POSTGRES_VIEWS = {
+    "products": """
+        SELECT unique_id, title, store_label, brand, source_name, category, subcategory,
+               CAST(current_price AS DOUBLE) AS price, availability, clicks, clicks_external,
+               date_creation, last_updated
+        FROM pg.public.products
+    """,
+    "price_points": """
+        SELECT unique_id, source_name, store_label,
+               try_cast(entry.date_price AS TIMESTAMPTZ) AS date, entry.price AS price
+        FROM (
+            SELECT unique_id, source_name, store_label,
+                   unnest(from_json(CAST(price_history AS VARCHAR),
+                                    '[{"date_price": "VARCHAR", "price": "DOUBLE"}]')) AS entry
+            FROM pg.public.products
+        )
+        WHERE try_cast(entry.date_price AS TIMESTAMPTZ) IS NOT NULL
+    """,
+    "availability_points": """
+        SELECT unique_id, source_name, store_label,
+               try_cast(entry.date_availability AS TIMESTAMPTZ) AS date, entry.availability AS availability
+        FROM (
+            SELECT unique_id, source_name, store_label,
+                   unnest(from_json(CAST(availability_history AS VARCHAR),
+                                    '[{"date_availability": "VARCHAR", "availability": "VARCHAR"}]')) AS entry
+            FROM pg.public.products
+        )
+        WHERE try_cast(entry.date_availability AS TIMESTAMPTZ) IS NOT NULL
+    """,
+}
+
+
+def connect(parquet_dir=None, postgres_uri=None, database=":memory:"):
+    """
+    Open a DuckDB connection with the analytics views
+
+    Args:
+        parquet_dir: Directory of a Parquet export (the default when no source is given)
+        postgres_uri: Postgres connection URI, attached read-only instead of Parquet
+        database: DuckDB database file (":memory:" keeps nothing on disk)
+
+    Returns:
+        duckdb connection. Use connection.cursor() for each thread.
+    """
+    connection = duckdb.connect(database)
+    # The scraper stores naive dates in UTC (GLOBAL: applies to cursors too)
+    connection.execute("SET GLOBAL TimeZone = 'UTC'")
+
+    if postgres_uri:
+        connection.execute("INSTALL postgres")
+        connection.execute("LOAD postgres")
+        connection.execute(f"ATTACH '{_quote(postgres_uri)}' AS pg (TYPE postgres, READ_ONLY)")
+        views = POSTGRES_VIEWS
+    else:
+        directory = os.path.abspath(parquet_dir or DEFAULT_OUTPUT_DIR)
+        if not os.path.exists(os.path.join(directory, "products.parquet")):
+            raise FileNotFoundError(
+                f"No Parquet export in {directory}; run python -m data_manager.parquet_export first"
+            )
+        directory = _quote(directory)
+        views = {name: sql.replace("{dir}", directory) for name, sql in PARQUET_VIEWS.items()}
+
+    for name, sql in views.items():
+        connection.execute(f"CREATE OR REPLACE VIEW {name} AS {sql}")
+
+    return connection
+
+
+def _quote(value):
+    """
+    Escape a value for use inside a single-quoted SQL literal
+    """
+    return value.replace("'", "''")
+
+
+def query_params(name, **params):
+    """
+    Resolve the parameters of a canned query, applying defaults
+
+    Raises:
+        KeyError: Unknown query
+        ValueError: Unknown parameter
+    """
+    query = QUERIES[name]
+    unknown = set(params) - set(query["params"])
+    if unknown:
+        raise ValueError(f"Unknown parameters for {name}: {', '.join(sorted(unknown))}")
+    return {**query["params"], **params}
+
+
+def run_arrow(connection, name, **params):
+    """
+    Run a canned query
+
+    Args:
+        connection: Connection (or cursor) from connect()
+        name: Key of QUERIES
+        **params: Query parameters
+
+    Returns:
+        pyarrow Table
+    """
+    return connection.execute(QUERIES[name]["sql"], query_params(name, **params)).fetch_arrow_table()
+
+
+def run(connection, name, **params):
+    """
+    Run a canned query and return a pandas DataFrame
+    """
+    return connection.execute(QUERIES[name]["sql"], query_params(name, **params)).df()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a canned analytics query")
+    parser.add_argument("query", choices=sorted(QUERIES), help="Query name")
+    parser.add_argument("--parquet-dir", default=DEFAULT_OUTPUT_DIR, help="Parquet export directory")
+    parser.add_argument("--postgres", action="store_true", help="Query Postgres (NEON_URI) instead of Parquet")
+    parser.add_argument("--param", action="append", default=[], help="Query parameter as name=value")
+    args = parser.parse_args()
+
+    params = {}
+    for item in args.param:
+        key, _, value = item.partition("=")
+        default = QUERIES[args.query]["params"].get(key)
+        params[key] = type(default)(value) if default is not None else value
+
+    connection = connect(args.parquet_dir, postgres_uri=os.getenv("NEON_URI") if args.postgres else None)
+    print(run(connection, args.query, **params).to_string())
+
+
+if __name__ == "__main__":
+    main()
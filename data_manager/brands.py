@@ -0,0 +1,145 @@
+"""
+Brand resolution for the scraper ingestion path and the dashboard.
+dashboard/utils/brands.py is a copy written by dashboard/sync_shared.py; edit
+this file and re-run it.
+Known bad values are fixed with an alias table; values that carry no brand
+information ("na", chipset vendors) are inferred from the product title.
+"""
+
+import re
+
+# Known bad brand values -> real brand
+BRAND_ALIASES = {
+    "m": "apple",
+    "mba": "apple",
+    "macbook": "apple",
+    "hz": "acer",
+    "i": "dell",
+    "rtx": "asus",
+    "windows": "asus",
+    "icon": "msi",
+    "gpu": "msi",
+    "badge": "lenovo",
+    "geforce": "lenovo",
+    "hewlett-packard": "hp",
+    "": "na",
+}
+
+# Brand values that say nothing about the maker; the title decides instead
+INFER_FROM_TITLE = {"na", "amd", "nvidia", "intel"}
+
+# Title keyword -> brand. Brand names map to themselves; product lines
+# identify their maker.
+KEYWORD_BRANDS = {
+    "acer": "acer", "aspire": "acer", "nitro": "acer", "predator": "acer", "travelmate": "acer",
+    "apple": "apple", "macbook": "apple", "imac": "apple",
+    "asus": "asus", "vivobook": "asus", "zenbook": "asus", "expertbook": "asus", "rog": "asus", "tuf": "asus",
+    "dell": "dell", "inspiron": "dell", "vostro": "dell", "latitude": "dell", "xps": "dell", "alienware": "dell",
+    "dynabook": "dynabook", "toshiba": "dynabook",
+    "gigabyte": "gigabyte", "aorus": "gigabyte",
+    "hp": "hp", "elitebook": "hp", "probook": "hp", "pavilion": "hp", "victus": "hp", "omen": "hp", "envy": "hp",
+    "huawei": "huawei", "matebook": "huawei",
+    "honor": "honor", "magicbook": "honor",
+    "infinix": "infinix", "inbook": "infinix",
+    "lenovo": "lenovo", "ideapad": "lenovo", "thinkpad": "lenovo", "thinkbook": "lenovo", "legion": "lenovo", "yoga": "lenovo", "loq": "lenovo",
+    "lg": "lg",
+    "microsoft": "microsoft", "surface": "microsoft",
+    "msi": "msi", "katana": "msi",
+    "samsung": "samsung", "galaxy book": "samsung",
+    "xiaomi": "xiaomi", "redmibook": "xiaomi",
+}
+
+
+def build_trie_pattern(keywords):
+    """
+    Compile keywords into a regular expression shaped like a prefix trie,
+    e.g. ["hp", "honor", "huawei"] -> "h(?:onor|p|uawei)"
+
+    Args:
+        keywords: Iterable of lowercase keywords
+
+    Returns:
+        Regular expression string without capturing groups
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}  # end of keyword marker
+
+    def to_pattern(node):
+        branches = []
+        optional = "" in node
+        for char in sorted(key for key in node if key):
+            branches.append(re.escape(char) + to_pattern(node[char]))
+
+        if not branches:
+            return ""
+        if len(branches) == 1 and not optional:
+            return branches[0]
+
+        pattern = "(?:" + "|".join(branches) + ")"
+        return pattern + "?" if optional else pattern
+
+    return to_pattern(trie)
+
+
+# Keywords must not be glued to other letters ("hp15" matches hp, "chpx" does not)
+TITLE_PATTERN = r"(?<![a-z])(" + build_trie_pattern(KEYWORD_BRANDS) + r")(?![a-z])"
+TITLE_REGEX = re.compile(TITLE_PATTERN)
+
+
+def brand_from_title(title):
+    """
+    Infer the brand from a product title
+
+    Returns:
+        The brand of the first keyword found in the title, or None
+    """
+    if not title:
+        return None
+    match = TITLE_REGEX.search(str(title).lower())
+    return KEYWORD_BRANDS[match.group(1)] if match else None
+
+
+def normalize_brand(brand, title=""):
+    """
+    Resolve the brand of a single product
+
+    Args:
+        brand: Brand value reported by the source
+        title: Product title used when the brand value is not informative
+
+    Returns:
+        Lowercase brand name, "na" when it cannot be resolved
+    """
+    brand = str(brand).strip().lower() if brand is not None else "na"
+    brand = BRAND_ALIASES.get(brand, brand)
+
+    if brand in INFER_FROM_TITLE:
+        brand = brand_from_title(title) or brand
+
+    return brand
+
+
+def normalize_brands(brands, titles):
+    """
+    Resolve brands for whole columns with vectorized pandas operations
+
+    Args:
+        brands: pandas Series of brand values
+        titles: pandas Series of product titles (same index as brands)
+
+    Returns:
+        New Series of resolved brands
+    """
+    resolved = brands.fillna("na").astype(str).str.strip().str.lower().replace(BRAND_ALIASES)
+
+    needs_title = resolved.isin(INFER_FROM_TITLE)
+    if needs_title.any():
+        keywords = titles[needs_title].fillna("").astype(str).str.lower().str.extract(TITLE_PATTERN, expand=False)
+        inferred = keywords.map(KEYWORD_BRANDS).dropna()
+        resolved.loc[inferred.index] = inferred
+
+    return resolved
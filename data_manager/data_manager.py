@@ -1,31 +1,90 @@
 import json
 import os
 from collections import Counter
+from contextlib import nullcontext
 from typing import Dict, List, Any
 from data_manager import db_manager
+from data_manager import brands
+from data_manager import snapshot
+from data_manager import fingerprint
+from data_manager.product_store import ProductStore
 
-def load_existing_data():
+try:
+    from data_manager import parquet_export
+except ImportError:
+    # pandas/pyarrow not installed: skip the Parquet export
+    parquet_export = None
+
+# Refresh seen_at and clicks of unchanged products instead of skipping the database entirely
+TOUCH_UNCHANGED = os.getenv("TOUCH_UNCHANGED", "true").lower() == "true"
+
+# Product writes done and avoided by update_product in this process
+write_counts = Counter()
+
+# Directory of the JSON and JSONL product files (crawl shards use their own)
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "output")
+
+# Append each final save to the Parquet export (off in crawl shards, which
+# only hold part of the catalog)
+EXPORT_PARQUET = True
+
+# uniqueID -> content_hash of products that are not in the products dictionary
+# passed to update_product (crawl shards start from an empty one), and those of
+# them whose last write did not reach the database
+known_hashes = {}
+known_unsynced = set()
+
+def set_output_dir(path):
+    """
+    Read and write the product files in another directory
+    """
+    global OUTPUT_DIR
+    OUTPUT_DIR = path
+    os.makedirs(path, exist_ok=True)
+
+def details_path():
+    return os.path.join(OUTPUT_DIR, "barbechli_products_details.json")
+
+def details_jsonl_path():
+    return os.path.join(OUTPUT_DIR, "barbechli_products_details.jsonl")
+
+def load_existing_data(index_only=False):
     """
-    Load existing product data from the JSON file
+    Load existing product data from the JSON file (or the JSONL snapshot),
+    streaming products one at a time into the product store
+    
+    Args:
+        index_only: Load only the uniqueID -> (price, availability,
+            last_updated) index instead of full products, for callers that
+            only need to tell whether a product changed
     
     Returns:
         Tuple containing:
-        - The complete data structure with stats and products
-        - Dictionary of products indexed by uniqueID for easier updates
+        - The data structure with stats (products are kept in the store only)
+        - ProductStore of products indexed by uniqueID for easier updates, or
+          the dictionary of (price, availability, last_updated) tuples with
+          index_only
     """
     # Initialize with empty structure
     existing_data = {"stats": {"total_products": 0, "total_sources": 0, "sources": []}, "products": []}
+    existing_products_dict = {} if index_only else ProductStore()
     
-    if os.path.exists("output/barbechli_products_details.json"):
-        try:
-            with open("output/barbechli_products_details.json", "r", encoding="utf-8") as f:
-                existing_data = json.load(f)
-            print(f"Loaded {len(existing_data['products'])} existing products")
-        except Exception as e:
-            print(f"Error loading existing product data: {e}")
-    
-    # Convert products list to dictionary for efficient lookups
-    existing_products_dict = {product["uniqueID"]: product for product in existing_data["products"]}
+    try:
+        stats = snapshot.load_stats(details_path())
+        if stats:
+            existing_data["stats"] = stats
+        
+        if index_only:
+            existing_products_dict = snapshot.load_product_index(details_path(), details_jsonl_path())
+            print(f"Loaded index of {len(existing_products_dict)} existing products")
+            return existing_data, existing_products_dict
+        
+        for product in snapshot.iter_products(details_path(), details_jsonl_path()):
+            existing_products_dict[product["uniqueID"]] = product
+        if existing_products_dict:
+            print(f"Loaded {len(existing_products_dict)} existing products")
+    except Exception as e:
+        print(f"Error loading existing product data: {e}")
     
     return existing_data, existing_products_dict
 
@@ -69,7 +128,7 @@ def format_product_data(product_data, product_id):
         "price_top_deal": product.get("price_top_deal", "no"),
         "link": product.get("link", ""),
         "source_link": product.get("source_link", ""),
-        "brand": product.get("brand", "na"),
+        "brand": brands.normalize_brand(product.get("brand", "na"), product.get("title", "")),
         "availability": product.get("availability", "unknown"),
         "clicks": product.get("clicks", 0),
         "clicksExternal": product.get("clicksExternal", 0),
@@ -84,34 +143,83 @@ def update_product(products_dict, product_id, product_data):
     """
     Add or update a product in the products dictionary
     
+    Products whose content fingerprint matches the stored one are not
+    written again; with TOUCH_UNCHANGED only their seen_at and click
+    counters are refreshed in the database. The fingerprint is kept even when
+    the database write fails, for the files; db_synced then forces a full
+    database write the next time the product is seen.
+    
     Args:
-        products_dict: Dictionary of products indexed by uniqueID
+        products_dict: ProductStore (or dictionary) of products indexed by uniqueID
         product_id: The product ID being processed
         product_data: The raw product data from the API
     
     Returns:
-        True if product was added/updated, False otherwise
+        "added", "updated" or "unchanged", or False if there was no product data
     """
     formatted_product = format_product_data(product_data, product_id)
     
     if not formatted_product:
         return False
     
+    content_hash = fingerprint.product_fingerprint(formatted_product)
+    existing_product = products_dict.get(product_id)
+    if existing_product is not None:
+        stored_hash = existing_product.get("content_hash")
+        stored_synced = existing_product.get("db_synced", True)
+    else:
+        stored_hash = known_hashes.get(product_id)
+        stored_synced = product_id not in known_unsynced
+    
+    # Without a database there is nothing to catch up on or touch
+    use_db = bool(db_manager.NEON_URI)
+    if stored_hash == content_hash and (stored_synced or not use_db):
+        # Same content as the last write: skip the full write. Fall through to
+        # it if the database row is missing or has another fingerprint.
+        touch = TOUCH_UNCHANGED and use_db
+        if not touch or db_manager.touch_product(
+            product_id, content_hash, formatted_product["clicks"], formatted_product["clicksExternal"]
+        ):
+            write_counts["unchanged"] += 1
+            if touch:
+                write_counts["touched"] += 1
+            # Keep counters current for the next file save, without forcing one
+            if existing_product is not None:
+                existing_product["clicks"] = formatted_product["clicks"]
+                existing_product["clicksExternal"] = formatted_product["clicksExternal"]
+            return "unchanged"
+    
     # Save to database
-    success, _, _ = db_manager.add_or_update_product(formatted_product)
+    success, _, _ = db_manager.add_or_update_product(formatted_product, content_hash)
     
     if not success:
+        write_counts["failed"] += 1
         print(f"Warning: Failed to save product {product_id} to database")
     
+    formatted_product["content_hash"] = content_hash
+    formatted_product["db_synced"] = success
+    
     # Update in-memory dictionary as well (for backward compatibility)
-    if product_id in products_dict:
+    if existing_product is not None:
         # Update existing product
-        products_dict[product_id].update(formatted_product)
-    else:
-        # Add new product
-        products_dict[product_id] = formatted_product
+        existing_product.update(formatted_product)
+        write_counts["updated"] += 1
+        return "updated"
     
-    return True
+    # Add new product
+    products_dict[product_id] = formatted_product
+    write_counts["added"] += 1
+    return "added"
+
+def write_summary():
+    """
+    Describe the writes done and avoided since the process started
+    """
+    written = write_counts["added"] + write_counts["updated"]
+    total = written + write_counts["unchanged"]
+    return (f"Writes: {write_counts['added']} added, {write_counts['updated']} updated, "
+            f"{write_counts['unchanged']} of {total} avoided as unchanged "
+            f"({write_counts['touched']} touched), {write_counts['failed']} database failures")
 
 def calculate_stats(products_dict):
     """
@@ -123,11 +231,9 @@ def calculate_stats(products_dict):
     Returns:
         Dictionary containing statistics
     """
-    products_list = list(products_dict.values())
-    
     # Count products by source
-    source_counts = Counter(p["source_name"] for p in products_list if "source_name" in p)
-    total_products = len(products_list)
+    source_counts = Counter(p["source_name"] for p in products_dict.values() if "source_name" in p)
+    total_products = len(products_dict)
     
     sources_stats = []
     for source_name, count in source_counts.items():
@@ -148,60 +254,91 @@ def calculate_stats(products_dict):
         "sources": sources_stats
     }
 
-def save_products_data(products_dict, is_final=False, is_incremental=False):
+def _plain_products(products_dict, lock=None):
+    """
+    Yield the products as plain dictionaries, one at a time. With a lock, the
+    IDs are listed under it and each product is copied under it, so other
+    threads can update products between two reads.
+    """
+    if lock is None:
+        for product in products_dict.values():
+            yield dict(product)
+        return
+    
+    with lock:
+        product_ids = list(products_dict.keys())
+    for product_id in product_ids:
+        with lock:
+            product = products_dict.get(product_id)
+            product = dict(product) if product is not None else None
+        if product is not None:
+            yield product
+
+def save_products_data(products_dict, is_final=False, is_incremental=False, lock=None):
     """
     Save the current products dictionary to both the database and JSON file
     
+    Products are written one at a time, so saving never holds a second copy
+    of the catalog in memory.
+    
     Args:
-        products_dict: Dictionary of products indexed by uniqueID
+        products_dict: ProductStore (or dictionary) of products indexed by uniqueID
         is_final: Whether this is the final save (for logging)
-        is_incremental: Whether this is a quick save after each product
+        is_incremental: Whether this is a quick save during the crawl
+        lock: Lock guarding products_dict while other threads update it
     
     Returns:
-        Dictionary containing the saved data structure
-    """
-    # Convert the dictionary back to a list for the final JSON
-    products_list = list(products_dict.values())
-    
-    # For incremental saves, try to reuse existing stats if available
-    if is_incremental and os.path.exists("output/barbechli_products_details.json"):
-        try:
-            with open("output/barbechli_products_details.json", "r", encoding="utf-8") as f:
-                existing_data = json.load(f)
-            
-            # Update only the products list, keeping existing stats
-            existing_data["products"] = products_list
-            final_data = existing_data
-            
-            # Update just the total_products count for accuracy
-            final_data["stats"]["total_products"] = len(products_list)
-        except Exception:
-            # If any errors occur during incremental save, fall back to full save
-            is_incremental = False
-    
-    # For non-incremental saves, recalculate all stats
-    if not is_incremental:
-        # Calculate stats
-        stats = calculate_stats(products_dict)
+        The stats dictionary written with the products
+    """
+    stats = None
+    stats_accumulator = getattr(products_dict, "stats", None)
+    
+    with lock or nullcontext():
+        if stats_accumulator is not None:
+            # The product store keeps stats up to date as products change
+            stats = stats_accumulator.snapshot()
+        
+        # For incremental saves of a plain dictionary, try to reuse existing stats if available
+        elif is_incremental and os.path.exists(details_path()):
+            try:
+                stats = snapshot.load_stats(details_path())
+                
+                # Keep existing stats, updating just the total_products count for accuracy
+                stats["total_products"] = len(products_dict)
+            except Exception:
+                # If any errors occur during incremental save, fall back to full save
+                stats = None
         
-        # Create the final data structure
-        final_data = {
-            "stats": stats,
-            "products": products_list
-        }
+        # For non-incremental saves, recalculate all stats
+        if stats is None:
+            stats = calculate_stats(products_dict)
     
-    # Save to JSON file (for backward compatibility)
-    with open("output/barbechli_products_details.json", "w", encoding="utf-8") as f:
-        json.dump(final_data, f, indent=2, ensure_ascii=False)
+    # Save to JSON file (for backward compatibility); views of the product
+    # store are converted back to plain dictionaries one at a time
+    snapshot.write_json(stats, _plain_products(products_dict, lock), details_path())
     
     if is_final:
-        print(f"All product details saved to output/barbechli_products_details.json")
-        print(f"Total products: {final_data['stats']['total_products']}, Total sources: {final_data['stats']['total_sources']}")
+        print(f"All product details saved to {details_path()}")
+        print(f"Total products: {stats['total_products']}, Total sources: {stats['total_sources']}")
+        print(write_summary())
+
+        # Line-per-product snapshot, streamed by the next load_existing_data
+        snapshot.write_jsonl(_plain_products(products_dict, lock), details_jsonl_path())
+
+        # Append this crawl's history entries to the columnar export, which
+        # converts the products a batch at a time
+        if parquet_export is not None and EXPORT_PARQUET:
+            try:
+                counts = parquet_export.export_products(_plain_products(products_dict, lock))
+                print(f"Parquet export: {counts['price_points']} new price points, "
+                      f"{counts['availability_points']} new availability points")
+            except Exception as e:
+                print(f"Warning: Parquet export failed: {e}")
         
     elif not is_incremental:
-        print(f"Progress saved: total products in file: {final_data['stats']['total_products']}")
+        print(f"Progress saved: total products in file: {stats['total_products']}")
     
-    return final_data
+    return stats
 
 # Initialize database when module is imported
 try:
@@ -26,6 +26,9 @@ connection_pool = None
 
 NEON_URI = os.getenv("NEON_URI")
 
+# Postgres LISTEN/NOTIFY channel used to publish price and availability changes
+CHANGES_CHANNEL = "product_changes"
+
 def init_db():
     """
     Initialize the database by creating tables if they don't exist
@@ -84,6 +87,10 @@ def init_db():
                 )
             """)
             
+            # Content fingerprint of the last write and time of the last scrape
+            cursor.execute("ALTER TABLE products ADD COLUMN IF NOT EXISTS content_hash VARCHAR(32)")
+            cursor.execute("ALTER TABLE products ADD COLUMN IF NOT EXISTS seen_at TIMESTAMP")
+            
             # Create indexes for better performance
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_source_name ON products(source_name)")
             
@@ -148,12 +155,13 @@ def close_all_connections():
         except Exception as e:
             logger.error(f"Error closing database connections: {e}")
 
-def add_or_update_product(product_data):
+def add_or_update_product(product_data, content_hash=None):
     """
     Add a new product or update an existing one
     
     Args:
         product_data: Dictionary containing product information
+        content_hash: Fingerprint of product_data, stored for change detection
         
     Returns:
         Tuple (success, product_id, is_new)
@@ -174,6 +182,9 @@ def add_or_update_product(product_data):
             # Prepare data for insertion/update
             current_time = datetime.now()
             
+            # Change events published to listeners once the transaction commits
+            change_events = []
+            
             # Extract core fields
             unique_id = product_data.get("uniqueID")
             title = product_data.get("title", "")
@@ -236,6 +247,10 @@ def add_or_update_product(product_data):
                         "date_price": current_time.isoformat(),
                         "price": float(current_price)
                     })
+                    change_events.append(build_change_event(
+                        "price", product_data, current_time,
+                        old_price=float(old_price) if old_price is not None else None
+                    ))
                 
                 # Update availability history if availability has changed
                 if old_availability != availability:
@@ -243,6 +258,10 @@ def add_or_update_product(product_data):
                         "date_availability": current_time.isoformat(),
                         "availability": availability
                     })
+                    change_events.append(build_change_event(
+                        "availability", product_data, current_time,
+                        old_availability=old_availability
+                    ))
                 
                 # Import existing price and availability history from product_data if available
                 if "priceTable" in product_data and product_data["priceTable"]:
@@ -265,13 +284,15 @@ def add_or_update_product(product_data):
                         source_name = %s, image_url = %s, currency = %s, current_price = %s,
                         brand = %s, availability = %s, link = %s, source_link = %s,
                         clicks = %s, clicks_external = %s, last_updated = %s,
-                        price_history = %s, availability_history = %s, additional_data = %s
+                        price_history = %s, availability_history = %s, additional_data = %s,
+                        content_hash = %s, seen_at = %s
                     WHERE id = %s
                 """, (
                     title, store_label, category, subcategory, source_name, image_url,
                     currency, current_price, brand, availability, link, source_link,
                     clicks, clicks_external, current_time, Json(price_history), 
-                    Json(availability_history), Json(additional_data), product_id
+                    Json(availability_history), Json(additional_data), content_hash,
+                    current_time, product_id
                 ))
                 
                 is_new = False
@@ -305,22 +326,27 @@ def add_or_update_product(product_data):
                         unique_id, title, store_label, category, subcategory, source_name,
                         image_url, currency, current_price, brand, availability, link,
                         source_link, clicks, clicks_external, date_creation, last_updated,
-                        price_history, availability_history, additional_data
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        price_history, availability_history, additional_data, content_hash, seen_at
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     RETURNING id
                 """, (
                     unique_id, title, store_label, category, subcategory, source_name,
                     image_url, currency, current_price, brand, availability, link,
                     source_link, clicks, clicks_external, current_time, current_time,
-                    Json(price_history), Json(availability_history), Json(additional_data)
+                    Json(price_history), Json(availability_history), Json(additional_data),
+                    content_hash, current_time
                 ))
                 
                 product_id = cursor.fetchone()[0]
                 is_new = True
+                change_events.append(build_change_event("new", product_data, current_time))
             
             # Update source stats
             update_source_stats(cursor)
             
+            # Queue change notifications (delivered by Postgres on commit)
+            publish_changes(cursor, change_events)
+            
             conn.commit()
             logger.info(f"{'Added new' if is_new else 'Updated'} product: {unique_id}")
             return True, product_id, is_new
@@ -333,6 +359,85 @@ def add_or_update_product(product_data):
     finally:
         release_connection(conn)
 
+def touch_product(unique_id, content_hash, clicks=0, clicks_external=0):
+    """
+    Lightweight update for a product whose content has not changed: only
+    seen_at and the click counters are written, histories are left alone
+    
+    Args:
+        unique_id: The product's unique ID
+        content_hash: Fingerprint the stored row must still have
+        clicks: Current click count
+        clicks_external: Current external click count
+        
+    Returns:
+        True if the row was touched, False if it is missing, has another
+        fingerprint (a full write is needed) or the update failed
+    """
+    conn = get_connection()
+    if not conn:
+        return False
+    
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE products
+                SET seen_at = %s, clicks = %s, clicks_external = %s
+                WHERE unique_id = %s AND content_hash = %s
+            """, (datetime.now(), clicks, clicks_external, unique_id, content_hash))
+            touched = cursor.rowcount == 1
+        conn.commit()
+        return touched
+    
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error touching product {unique_id}: {e}")
+        return False
+    
+    finally:
+        release_connection(conn)
+
+def build_change_event(event_type, product_data, event_time, old_price=None, old_availability=None):
+    """
+    Build the payload describing a price or availability change
+    
+    Args:
+        event_type: "price", "availability" or "new"
+        product_data: Dictionary containing the updated product information
+        event_time: Time the change was detected
+        old_price: Previous price, for price changes
+        old_availability: Previous availability, for availability changes
+        
+    Returns:
+        Dictionary with the event fields
+    """
+    price = product_data.get("price", 0)
+    return {
+        "type": event_type,
+        "uniqueID": product_data.get("uniqueID"),
+        "title": product_data.get("title", ""),
+        "brand": product_data.get("brand", ""),
+        "store_label": product_data.get("store_label", ""),
+        "source_name": product_data.get("source_name", ""),
+        "price": float(price) if price is not None else None,
+        "old_price": old_price,
+        "availability": product_data.get("availability", "unknown"),
+        "old_availability": old_availability,
+        "date": event_time.isoformat()
+    }
+
+def publish_changes(cursor, events):
+    """
+    Publish change events on the CHANGES_CHANNEL with pg_notify.
+    Notifications are only delivered if the surrounding transaction commits.
+    
+    Args:
+        cursor: Database cursor to use for queries
+        events: List of event dictionaries from build_change_event
+    """
+    for event in events:
+        cursor.execute("SELECT pg_notify(%s, %s)", (CHANGES_CHANNEL, json.dumps(event, ensure_ascii=False)))
+
 def update_source_stats(cursor):
     """
     Update source statistics
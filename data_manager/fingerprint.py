@@ -0,0 +1,35 @@
+"""
+Content fingerprints of formatted products.
+
+A re-scraped product usually has not changed. Comparing its fingerprint with
+the one stored at the previous write lets the scraper skip the database
+update, the JSONB history rewrite and the file save.
+
+Fingerprints are always xxh3: a fallback hash would make every stored
+fingerprint look changed on a machine without xxhash.
+"""
+
+import json
+
+import xxhash
+
+# Fields left out of the fingerprint: engagement counters change on nearly
+# every visit without the product itself changing, content_hash is the
+# fingerprint itself and db_synced is bookkeeping. Clicks are refreshed by the
+# lightweight touch instead.
+VOLATILE_FIELDS = frozenset(("clicks", "clicksExternal", "content_hash", "db_synced", "seen_at", "last_updated"))
+
+
+def normalize(product):
+    """
+    Canonical text of a product: stable key order, volatile fields removed
+    """
+    content = {key: value for key, value in product.items() if key not in VOLATILE_FIELDS}
+    return json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def product_fingerprint(product):
+    """
+    Return the xxh3 content fingerprint of a formatted product as a hex string
+    """
+    return xxhash.xxh3_64_hexdigest(normalize(product).encode("utf-8"))
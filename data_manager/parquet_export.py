@@ -0,0 +1,352 @@
+"""
+Columnar export of the product catalog for analysis.
+
+Writes into an output directory:
+- products.parquet: one row per product, typed columns, dictionary-encoded
+  store, brand and source
+- price_points/ and availability_points/: one row per history entry,
+  partitioned by source (source_name=<value>/part-<crawl_id>-0.parquet)
+
+Each export appends only the history entries newer than what was exported
+before for the product (per-product watermarks kept in _export_state.json),
+so running it after every crawl adds a few small files per source.
+
+Products are processed in batches of BATCH_SIZE, so the export never holds
+more than one batch of product dictionaries and frames in memory.
+
+Usage:
+    python -m data_manager.parquet_export [--input output/barbechli_products_details.json] [--full]
+"""
+
+import argparse
+import ast
+import csv
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from itertools import islice
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+DEFAULT_OUTPUT_DIR = "output/parquet"
+STATE_FILE = "_export_state.json"
+
+# Low-cardinality text columns stored dictionary-encoded
+CATEGORY_COLUMNS = [
+    "store_label", "brand", "source_name", "category", "subcategory", "currency", "availability",
+]
+TEXT_COLUMNS = ["uniqueID", "title", "image", "link", "source_link"]
+FLOAT_COLUMNS = [
+    "price", "price_min", "price_max", "price_drop", "price_drop_percent",
+    "price_week_drop", "price_week_drop_percent",
+]
+INT_COLUMNS = ["clicks", "clicksExternal"]
+# "yes"/"no" flags
+FLAG_COLUMNS = ["price_week_changed", "price_deal", "price_hot_deal", "price_top_deal"]
+DATE_COLUMNS = ["date_creation", "last_updated"]
+
+# History column -> (entry date key, entry value key, value column name)
+HISTORY_TABLES = {
+    "price_points": ("priceTable", "date_price", "price"),
+    "availability_points": ("availabilityTable", "date_availability", "availability"),
+}
+
+# Hive partitions cannot be empty strings
+UNKNOWN_SOURCE = "unknown"
+
+# Products converted to frames at a time
+BATCH_SIZE = 50_000
+
+# Every batch of the products table is cast to this schema, so the batches of
+# one file agree (dictionary index widths, all-null columns)
+PRODUCTS_SCHEMA = pa.schema(
+    [(column, pa.string()) for column in TEXT_COLUMNS]
+    + [(column, pa.dictionary(pa.int32(), pa.string())) for column in CATEGORY_COLUMNS]
+    + [(column, pa.float64()) for column in FLOAT_COLUMNS]
+    + [(column, pa.int64()) for column in INT_COLUMNS]
+    + [(column, pa.bool_()) for column in FLAG_COLUMNS]
+    + [(column, pa.timestamp("ns", tz="UTC")) for column in DATE_COLUMNS]
+)
+
+
+def _to_timestamps(values):
+    """
+    Parse ISO dates (mixed naive and UTC offsets, as stored by the scraper) to UTC
+    """
+    return pd.to_datetime(values, format="ISO8601", utc=True, errors="coerce")
+
+
+def parse_history(value):
+    """
+    Parse a history column value: a list, JSON text, or the Python-repr text
+    found in CSV exports
+
+    Returns:
+        List of entry dictionaries (empty when the value cannot be parsed)
+    """
+    if isinstance(value, list):
+        return value
+    if not isinstance(value, str) or not value:
+        return []
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return []
+
+
+def load_products(path):
+    """
+    Load products from the JSON details file or a CSV export
+
+    Returns:
+        List of product dictionaries
+    """
+    if path.endswith(".csv"):
+        csv.field_size_limit(1 << 30)
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return list(csv.DictReader(f))
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data["products"] if isinstance(data, dict) else data
+
+
+def batches(products, size=BATCH_SIZE):
+    """
+    Split an iterable of products into lists of at most `size` products
+    """
+    products = iter(products)
+    while True:
+        batch = list(islice(products, size))
+        if not batch:
+            return
+        yield batch
+
+
+def products_table(products):
+    """
+    Build the typed products table (history columns excluded)
+
+    Args:
+        products: List of product dictionaries (one batch)
+
+    Returns:
+        pyarrow Table with one row per product
+    """
+    # Every column is always written so exports keep the same schema
+    frame = pd.DataFrame(products).reindex(
+        columns=TEXT_COLUMNS + CATEGORY_COLUMNS + FLOAT_COLUMNS + INT_COLUMNS + FLAG_COLUMNS + DATE_COLUMNS
+    )
+    columns = {}
+
+    for column in TEXT_COLUMNS:
+        columns[column] = frame[column].astype("string")
+    for column in CATEGORY_COLUMNS:
+        columns[column] = frame[column].fillna("").astype(str).astype("category")
+    for column in FLOAT_COLUMNS:
+        columns[column] = pd.to_numeric(frame[column], errors="coerce").astype("float64")
+    for column in INT_COLUMNS:
+        columns[column] = pd.to_numeric(frame[column], errors="coerce").astype("Int64")
+    for column in FLAG_COLUMNS:
+        columns[column] = frame[column].astype(str).str.lower().eq("yes")
+    for column in DATE_COLUMNS:
+        columns[column] = _to_timestamps(frame[column])
+
+    table = pa.Table.from_pandas(pd.DataFrame(columns), preserve_index=False)
+    # Keep the pandas metadata so the table reads back with the same dtypes
+    return table.cast(PRODUCTS_SCHEMA.with_metadata(table.schema.metadata))
+
+
+def history_frame(products, table_name):
+    """
+    Explode one history column into one row per entry
+
+    Args:
+        products: List of product dictionaries (one batch)
+        table_name: Key of HISTORY_TABLES
+
+    Returns:
+        DataFrame with columns uniqueID, source_name, store_label, date and the
+        entry value, rows without a valid date dropped
+    """
+    history_column, date_key, value_key = HISTORY_TABLES[table_name]
+
+    exploded = pd.DataFrame({
+        "uniqueID": [p.get("uniqueID") for p in products],
+        "source_name": [p.get("source_name") or UNKNOWN_SOURCE for p in products],
+        "store_label": [p.get("store_label", "") for p in products],
+        "entry": [parse_history(p.get(history_column)) for p in products],
+    }).explode("entry", ignore_index=True)
+    exploded = exploded[exploded["entry"].map(lambda entry: isinstance(entry, dict)).astype(bool)]
+
+    entries = pd.DataFrame.from_records(exploded["entry"].tolist(), columns=[date_key, value_key])
+    frame = pd.DataFrame({
+        "uniqueID": exploded["uniqueID"].values,
+        "source_name": exploded["source_name"].values,
+        "store_label": exploded["store_label"].values,
+        "date": _to_timestamps(entries[date_key]).values,
+        value_key: entries[value_key].values,
+    })
+
+    if value_key == "price":
+        frame[value_key] = pd.to_numeric(frame[value_key], errors="coerce").astype("float64")
+    else:
+        frame[value_key] = frame[value_key].astype("category")
+
+    # .values dropped the time zone; the dates are UTC
+    frame["date"] = frame["date"].dt.tz_localize("UTC")
+    frame = frame.dropna(subset=["date"])
+    frame["store_label"] = frame["store_label"].astype("category")
+    return frame.drop_duplicates(subset=["uniqueID", "date"])
+
+
+def load_state(output_dir):
+    """
+    Load the per-product watermarks of previous exports
+    """
+    path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {name: {} for name in HISTORY_TABLES}
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    for name in HISTORY_TABLES:
+        state.setdefault(name, {})
+    return state
+
+
+def save_state(output_dir, state):
+    path = os.path.join(output_dir, STATE_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def new_entries(frame, watermarks):
+    """
+    Keep the history entries newer than the product's watermark
+
+    Args:
+        frame: Output of history_frame
+        watermarks: Dictionary uniqueID -> ISO date of the last exported entry
+
+    Returns:
+        Filtered DataFrame
+    """
+    if not watermarks:
+        return frame
+    exported = _to_timestamps(frame["uniqueID"].map(watermarks))
+    return frame[exported.isna() | (frame["date"] > exported)]
+
+
+def export_products(products, output_dir=DEFAULT_OUTPUT_DIR, crawl_id=None, full=False, batch_size=BATCH_SIZE):
+    """
+    Export the catalog and append new history entries
+
+    Args:
+        products: Iterable of product dictionaries (JSON details format or CSV
+            rows), read once, batch_size products at a time
+        output_dir: Directory receiving the Parquet files
+        crawl_id: Name of this export's part files, the current UTC time by default
+        full: Drop previous exports and write the whole history again
+        batch_size: Products converted to frames at a time
+
+    Returns:
+        Dictionary with the number of rows written per table
+    """
+    crawl_id = crawl_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+
+    if full and os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    counts = {"products": 0, **{name: 0 for name in HISTORY_TABLES}}
+    state = load_state(output_dir)
+
+    # The catalog is rewritten, batch by batch, and swapped in atomically
+    products_path = os.path.join(output_dir, "products.parquet")
+    writer = None
+    try:
+        for batch_number, batch in enumerate(batches(products, batch_size)):
+            table = products_table(batch)
+            if writer is None:
+                writer = pq.ParquetWriter(products_path + ".tmp", table.schema)
+            writer.write_table(table)
+            counts["products"] += len(batch)
+
+            for name in HISTORY_TABLES:
+                frame = new_entries(history_frame(batch, name), state[name])
+                counts[name] += len(frame)
+                if frame.empty:
+                    continue
+
+                pq.write_to_dataset(
+                    pa.Table.from_pandas(frame, preserve_index=False),
+                    root_path=os.path.join(output_dir, name),
+                    partition_cols=["source_name"],
+                    basename_template=f"part-{crawl_id}-{batch_number}-{{i}}.parquet",
+                    existing_data_behavior="overwrite_or_ignore",
+                )
+
+                latest = frame.groupby("uniqueID", observed=True)["date"].max()
+                state[name].update({unique_id: date.isoformat() for unique_id, date in latest.items()})
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        # No products: still write the (empty) table
+        pq.write_table(products_table([]), products_path + ".tmp")
+    os.replace(products_path + ".tmp", products_path)
+
+    # Watermarks are only advanced once all the part files are written
+    save_state(output_dir, state)
+    return counts
+
+
+def read_products(output_dir=DEFAULT_OUTPUT_DIR, columns=None):
+    """
+    Read the products table as a DataFrame
+    """
+    return pq.read_table(os.path.join(output_dir, "products.parquet"), columns=columns).to_pandas()
+
+
+def read_points(name, output_dir=DEFAULT_OUTPUT_DIR, sources=None, columns=None):
+    """
+    Read a history table ("price_points" or "availability_points") as a DataFrame
+
+    Args:
+        name: Table name
+        output_dir: Export directory
+        sources: Optional list of source names; other partitions are not read
+        columns: Optional list of columns to read
+    """
+    dataset = ds.dataset(os.path.join(output_dir, name), format="parquet", partitioning="hive")
+    filter_expression = ds.field("source_name").isin(sources) if sources else None
+    return dataset.to_table(columns=columns, filter=filter_expression).to_pandas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export products and their history to Parquet")
+    parser.add_argument("--input", default="output/barbechli_products_details.json",
+                        help="JSON details file or CSV export to read")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="Output directory")
+    parser.add_argument("--crawl-id", help="Name of the part files written by this export")
+    parser.add_argument("--full", action="store_true", help="Rewrite everything instead of appending")
+    args = parser.parse_args()
+
+    products = load_products(args.input)
+    counts = export_products(products, args.output, crawl_id=args.crawl_id, full=args.full)
+    print(f"Exported {counts['products']} products, {counts['price_points']} price points and "
+          f"{counts['availability_points']} availability points to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
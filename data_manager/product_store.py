@@ -0,0 +1,344 @@
+"""
+Compact in-memory storage for the scraper's product catalog.
+
+A product dictionary carries ~28 keys, many repeating the same few strings
+(store, brand, currency, 'yes'/'no' flags), plus price and availability
+histories as lists of small dictionaries. ProductStore keeps each product as a
+__slots__ record instead:
+- categorical strings are interned, so all products share one copy
+- histories are parallel arrays: int64 timestamps (microseconds since the
+  epoch), a UTC flag per entry, and float/int prices or availability codes
+
+ProductStore behaves like the previous dict[uniqueID -> dict]: indexing
+returns a ProductView that reads and writes the record, so update_product and
+the JSON save keep working. Histories returned by a view are rebuilt lists;
+assign them back to change them.
+
+Histories that would not round-trip exactly (unexpected keys, non-UTC offsets,
+mixed value types) are kept as they are.
+"""
+
+import sys
+from array import array
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta, timezone
+
+from data_manager.stats import NO_SOURCE, StatsAccumulator
+
+# Product keys in the order written by format_product_data, then update_product
+FIELDS = (
+    "uniqueID", "title", "store_label", "category", "subcategory", "source_name", "image",
+    "currency", "price", "price_min", "price_max", "price_drop", "price_drop_percent",
+    "price_week_changed", "price_week_drop", "price_week_drop_percent", "price_deal",
+    "price_hot_deal", "price_top_deal", "link", "source_link", "brand", "availability",
+    "clicks", "clicksExternal", "priceTable", "availabilityTable", "date_creation",
+    "content_hash", "db_synced",
+)
+
+_FIELD_SET = frozenset(FIELDS)
+
+# Low-cardinality string fields, interned
+CATEGORICAL_FIELDS = frozenset((
+    "store_label", "category", "subcategory", "source_name", "currency", "brand", "availability",
+    "price_week_changed", "price_deal", "price_hot_deal", "price_top_deal",
+))
+
+# History field -> (entry date key, entry value key)
+HISTORY_FIELDS = {
+    "priceTable": ("date_price", "price"),
+    "availabilityTable": ("date_availability", "availability"),
+}
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+# Marks a field absent from the original dictionary
+_MISSING = object()
+
+# Availability values are stored as small codes into this shared table
+_availability_values = []
+_availability_codes = {}
+
+
+def _availability_code(value):
+    code = _availability_codes.get(value)
+    if code is None:
+        code = len(_availability_values)
+        _availability_values.append(sys.intern(value))
+        _availability_codes[value] = code
+    return code
+
+
+def _encode_date(text):
+    """
+    Convert an ISO date to (microseconds since the epoch, is_utc)
+
+    Raises:
+        ValueError: The date would not be rebuilt identically
+    """
+    parsed = datetime.fromisoformat(text)
+    if parsed.isoformat() != text:
+        raise ValueError(text)
+    if parsed.tzinfo is None:
+        return (parsed - EPOCH) // ONE_MICROSECOND, 0
+    if parsed.utcoffset() != timedelta(0):
+        raise ValueError(text)
+    return (parsed.replace(tzinfo=None) - EPOCH) // ONE_MICROSECOND, 1
+
+
+def _decode_date(micros, is_utc):
+    parsed = EPOCH + timedelta(microseconds=micros)
+    if is_utc:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.isoformat()
+
+
+class History:
+    """
+    A price or availability history as parallel arrays
+    """
+    __slots__ = ("dates", "utc", "values")
+
+    def __init__(self, dates, utc, values):
+        self.dates = dates
+        self.utc = utc
+        self.values = values
+
+    def __len__(self):
+        return len(self.dates)
+
+
+def encode_history(field, entries):
+    """
+    Pack a history list into a History, or return it unchanged when it
+    would not round-trip exactly
+    """
+    if not isinstance(entries, list) or not entries:
+        return entries
+
+    date_key, value_key = HISTORY_FIELDS[field]
+    keys = (date_key, value_key)
+    dates = array("q")
+    utc = array("b")
+    raw_values = []
+
+    try:
+        for entry in entries:
+            if not isinstance(entry, dict) or tuple(entry) != keys:
+                return entries
+            micros, is_utc = _encode_date(entry[date_key])
+            dates.append(micros)
+            utc.append(is_utc)
+            raw_values.append(entry[value_key])
+    except (TypeError, ValueError, OverflowError):
+        return entries
+
+    if field == "availabilityTable":
+        if not all(isinstance(value, str) for value in raw_values):
+            return entries
+        values = array("H", (_availability_code(value) for value in raw_values))
+    elif all(type(value) is float for value in raw_values):
+        values = array("d", raw_values)
+    elif all(type(value) is int for value in raw_values):
+        try:
+            values = array("q", raw_values)
+        except OverflowError:
+            return entries
+    else:
+        return entries
+
+    return History(dates, utc, values)
+
+
+def decode_history(field, value):
+    """
+    Rebuild the history list stored by encode_history
+    """
+    if not isinstance(value, History):
+        return value
+
+    date_key, value_key = HISTORY_FIELDS[field]
+    if field == "availabilityTable":
+        values = [_availability_values[code] for code in value.values]
+    else:
+        values = value.values.tolist()
+
+    return [
+        {date_key: _decode_date(micros, is_utc), value_key: entry_value}
+        for micros, is_utc, entry_value in zip(value.dates, value.utc, values)
+    ]
+
+
+def encode_value(field, value):
+    if field in HISTORY_FIELDS:
+        return encode_history(field, value)
+    if field in CATEGORICAL_FIELDS and type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+def decode_value(field, value):
+    if field in HISTORY_FIELDS:
+        return decode_history(field, value)
+    return value
+
+
+class CompactProduct:
+    """
+    One product: a slot per known field plus a dictionary for unknown keys
+    """
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, product=None):
+        for field in FIELDS:
+            setattr(self, field, _MISSING)
+        self.extra = None
+        if product:
+            for key, value in product.items():
+                self.set(key, value)
+
+    def get(self, key):
+        """
+        Return the stored value (decoded), or _MISSING when the key is absent
+        """
+        if key in _FIELD_SET:
+            return decode_value(key, getattr(self, key))
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        return _MISSING
+
+    def set(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, encode_value(key, value))
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def delete(self, key):
+        if key in _FIELD_SET and getattr(self, key) is not _MISSING:
+            setattr(self, key, _MISSING)
+        elif self.extra is not None and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def source(self):
+        """
+        The source_name used for statistics (NO_SOURCE when absent)
+        """
+        return NO_SOURCE if self.source_name is _MISSING else self.source_name
+
+    def keys(self):
+        for field in FIELDS:
+            if getattr(self, field) is not _MISSING:
+                yield field
+        if self.extra:
+            yield from self.extra
+
+
+class ProductView(MutableMapping):
+    """
+    Dictionary facade over a CompactProduct; writes go to the record and
+    source changes are reported to the store's statistics
+    """
+    __slots__ = ("record", "stats")
+
+    def __init__(self, record, stats=None):
+        self.record = record
+        self.stats = stats
+
+    def __getitem__(self, key):
+        value = self.record.get(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key == "source_name" and self.stats is not None:
+            old_source = self.record.source()
+            self.record.set(key, value)
+            self.stats.move(old_source, self.record.source())
+        else:
+            self.record.set(key, value)
+
+    def __delitem__(self, key):
+        if key == "source_name" and self.stats is not None:
+            old_source = self.record.source()
+            self.record.delete(key)
+            self.stats.move(old_source, NO_SOURCE)
+        else:
+            self.record.delete(key)
+
+    def __iter__(self):
+        return self.record.keys()
+
+    def __len__(self):
+        return sum(1 for _ in self.record.keys())
+
+    def __contains__(self, key):
+        return self.record.get(key) is not _MISSING
+
+    def __repr__(self):
+        return f"ProductView({dict(self)!r})"
+
+
+class ProductStore(MutableMapping):
+    """
+    Mapping uniqueID -> product, stored as CompactProduct records.
+
+    Reading a product returns a ProductView; assigning a dictionary packs it.
+    Use dict(store[product_id]) to get a plain dictionary. Per-source counts
+    are kept up to date in `stats` (a StatsAccumulator).
+    """
+
+    def __init__(self, products=None):
+        self._records = {}
+        self.stats = StatsAccumulator()
+        if products is not None:
+            self.update(products)
+
+    @classmethod
+    def from_products(cls, products):
+        """
+        Build a store from an iterable of product dictionaries keyed by uniqueID
+        """
+        store = cls()
+        for product in products:
+            store[product["uniqueID"]] = product
+        return store
+
+    def __getitem__(self, product_id):
+        return ProductView(self._records[product_id], self.stats)
+
+    def __setitem__(self, product_id, product):
+        if isinstance(product, ProductView):
+            product = dict(product)
+        record = CompactProduct(product)
+
+        old_record = self._records.get(product_id)
+        if old_record is None:
+            self.stats.add(record.source())
+        else:
+            self.stats.move(old_record.source(), record.source())
+        self._records[product_id] = record
+
+    def __delitem__(self, product_id):
+        record = self._records.pop(product_id)
+        self.stats.remove(record.source())
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, product_id):
+        return product_id in self._records
+
+    def to_dicts(self):
+        """
+        Materialize every product as a plain dictionary, in insertion order
+        """
+        return [dict(ProductView(record)) for record in self._records.values()]
+
@@ -0,0 +1,184 @@
+"""
+Streaming access to the products snapshot.
+
+`output/barbechli_products_details.json` holds {"stats": ..., "products": [...]}.
+Loading it with json.load needs several times the file size in memory before
+the first product is usable. The helpers here read one product at a time
+instead, from either:
+- a JSONL snapshot (one product per line), written next to the JSON file at
+  the end of each crawl and preferred when it is at least as recent, or
+- the JSON file itself, parsed incrementally with ijson when installed
+
+Both files are written one product at a time by write_json and write_jsonl.
+"""
+
+import json
+import os
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+JSON_PATH = "output/barbechli_products_details.json"
+JSONL_PATH = "output/barbechli_products_details.jsonl"
+
+
+def _jsonl_is_current(json_path, jsonl_path):
+    """
+    Whether the JSONL snapshot exists and is not older than the JSON file
+    """
+    if not os.path.exists(jsonl_path):
+        return False
+    if not os.path.exists(json_path):
+        return True
+    return os.path.getmtime(jsonl_path) >= os.path.getmtime(json_path)
+
+
+def iter_products(json_path=JSON_PATH, jsonl_path=JSONL_PATH):
+    """
+    Yield the products of the snapshot one at a time
+
+    Args:
+        json_path: The JSON details file
+        jsonl_path: The JSONL snapshot, used when it is current
+
+    Yields:
+        Product dictionaries
+    """
+    if _jsonl_is_current(json_path, jsonl_path):
+        with open(jsonl_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    if not os.path.exists(json_path):
+        return
+
+    if ijson is not None:
+        with open(json_path, "rb") as f:
+            yield from ijson.items(f, "products.item", use_float=True)
+        return
+
+    # No incremental parser available: fall back to loading the whole file
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    yield from data["products"]
+
+
+def load_stats(json_path=JSON_PATH):
+    """
+    Read only the stats block of the JSON file
+
+    Returns:
+        The stats dictionary, or None when the file is missing or has no stats
+    """
+    if not os.path.exists(json_path):
+        return None
+
+    if ijson is not None:
+        with open(json_path, "rb") as f:
+            # stats is written before products, so this stops early
+            for stats in ijson.items(f, "stats", use_float=True):
+                return stats
+        return None
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        return json.load(f).get("stats")
+
+
+def write_jsonl(products, jsonl_path=JSONL_PATH):
+    """
+    Write products as a JSONL snapshot, replacing the previous one atomically
+
+    Args:
+        products: Iterable of product dictionaries
+
+    Returns:
+        Number of products written
+    """
+    tmp_path = jsonl_path + ".tmp"
+    count = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for product in products:
+            f.write(json.dumps(product, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    os.replace(tmp_path, jsonl_path)
+    return count
+
+
+def write_json(stats, products, json_path=JSON_PATH):
+    """
+    Write the JSON details file one product at a time, replacing the
+    previous file atomically
+
+    Args:
+        stats: Stats dictionary, written before the products
+        products: Iterable of product dictionaries
+
+    Returns:
+        Number of products written
+    """
+    tmp_path = json_path + ".tmp"
+    count = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write('{\n  "stats": ')
+        f.write(json.dumps(stats, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+        f.write(',\n  "products": [')
+        for product in products:
+            f.write(",\n    " if count else "\n    ")
+            f.write(json.dumps(product, ensure_ascii=False))
+            count += 1
+        f.write("\n  ]\n}\n" if count else "]\n}\n")
+    os.replace(tmp_path, json_path)
+    return count
+
+
+def last_update(product):
+    """
+    Date of a product's latest known change: last_updated when present,
+    otherwise the latest price or availability history entry
+    """
+    if product.get("last_updated"):
+        return product["last_updated"]
+
+    dates = [entry.get("date_price") for entry in product.get("priceTable") or [] if isinstance(entry, dict)]
+    dates += [entry.get("date_availability") for entry in product.get("availabilityTable") or []
+              if isinstance(entry, dict)]
+    dates = [date for date in dates if date]
+    # ISO strings sort chronologically except across naive/offset forms, close enough here
+    return max(dates) if dates else product.get("date_creation")
+
+
+def load_product_index(json_path=JSON_PATH, jsonl_path=JSONL_PATH):
+    """
+    Load only what is needed to tell whether a product changed, without
+    keeping full product records in memory
+
+    Returns:
+        Dictionary uniqueID -> (price, availability, last_updated)
+    """
+    return {
+        product["uniqueID"]: (product.get("price"), product.get("availability"), last_update(product))
+        for product in iter_products(json_path, jsonl_path)
+    }
+
+
+def load_fingerprints(json_path=JSON_PATH, jsonl_path=JSONL_PATH):
+    """
+    Load the content fingerprints of the snapshot's products
+
+    Returns:
+        Tuple (dictionary uniqueID -> content_hash for products that have one,
+        set of the IDs among them whose last write did not reach the database)
+    """
+    hashes = {}
+    unsynced = set()
+    for product in iter_products(json_path, jsonl_path):
+        if product.get("content_hash"):
+            hashes[product["uniqueID"]] = product["content_hash"]
+            if product.get("db_synced") is False:
+                unsynced.add(product["uniqueID"])
+    return hashes, unsynced
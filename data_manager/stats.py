@@ -0,0 +1,82 @@
+"""
+Catalog statistics maintained incrementally.
+
+StatsAccumulator keeps per-source product counts up to date as products are
+added, removed or change source (O(1) each), so the stats block of the JSON
+file no longer needs a full pass over the catalog on every save. The
+result matches calculate_stats.
+"""
+
+# Products without a source_name key are counted in the total only
+NO_SOURCE = object()
+
+
+class StatsAccumulator:
+    """
+    Running product counts per source
+    """
+
+    def __init__(self):
+        self.total_products = 0
+        self.source_counts = {}  # source name -> product count, insertion ordered
+        self._snapshot = None    # cached result of snapshot(), reset on change
+
+    def add(self, source=NO_SOURCE):
+        """
+        Count a new product with the given source_name
+        """
+        self.total_products += 1
+        self._increment(source, 1)
+
+    def remove(self, source=NO_SOURCE):
+        """
+        Forget a product that had the given source_name
+        """
+        self.total_products -= 1
+        self._increment(source, -1)
+
+    def move(self, old_source, new_source):
+        """
+        Record a product changing source_name
+        """
+        if old_source == new_source:
+            return
+        self._increment(old_source, -1)
+        self._increment(new_source, 1)
+
+    def _increment(self, source, delta):
+        self._snapshot = None
+        if source is NO_SOURCE:
+            return
+        count = self.source_counts.get(source, 0) + delta
+        if count > 0:
+            self.source_counts[source] = count
+        else:
+            self.source_counts.pop(source, None)
+
+    def snapshot(self):
+        """
+        Return the stats block: total products, number of sources and
+        per-source counts with percentages, largest sources first.
+        Computed over the sources only, and cached until the next change.
+        """
+        if self._snapshot is None:
+            total = self.total_products
+            sources = [
+                {
+                    "name": name,
+                    "products": count,
+                    "percentage": round((count / total) * 100 if total > 0 else 0, 2),
+                }
+                for name, count in self.source_counts.items()
+                if name  # Skip empty source names
+            ]
+            sources.sort(key=lambda x: x["products"], reverse=True)
+            self._snapshot = {
+                "total_products": total,
+                "total_sources": len(sources),
+                "sources": sources,
+            }
+
+        stats = self._snapshot
+        return {**stats, "sources": [dict(source) for source in stats["sources"]]}
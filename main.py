@@ -1,14 +1,70 @@
+import os
 import threading
 import time
 import queue
 from scraper.scrape_product_details import get_product_details
 from scraper.scrape_ids import collect_ids_thread   
+from scraper.scheduler import CrawlScheduler, ScheduledQueue
+from scraper.seen_ids import SeenIds
+from scraper.crawl_plan import load_plan, run_plan
+from scraper.browser_pool import start_pool
+
+# "full" re-scrapes every product found, "scheduled" only products that are due,
+# "budget" the most valuable products within CRAWL_BUDGET_FETCHES / CRAWL_BUDGET_MINUTES
+CRAWL_MODE = os.getenv("CRAWL_MODE", "full")
+CRAWL_BUDGET_FETCHES = int(os.getenv("CRAWL_BUDGET_FETCHES", 0)) or None
+CRAWL_BUDGET_MINUTES = float(os.getenv("CRAWL_BUDGET_MINUTES", 0)) or None
+
+# "full" walks every listing page, "incremental" stops after KNOWN_PAGES_STOP
+# consecutive pages without a new product ID
+DISCOVERY_MODE = os.getenv("DISCOVERY_MODE", "full")
+KNOWN_PAGES_STOP = int(os.getenv("KNOWN_PAGES_STOP", 3))
+
+# JSON/YAML crawl plan; when set, its queries run in parallel shards instead
+# of the single search below
+CRAWL_PLAN = os.getenv("CRAWL_PLAN")
+
+# Share one Chromium between the collector and the detail workers
+BROWSER_POOL = os.getenv("BROWSER_POOL", "true").lower() == "true"
+
+
+def create_queue():
+    """
+    Create the product ID queue for the configured crawl mode
+    
+    Returns:
+        Tuple (queue, scheduler), scheduler is None in full mode
+    """
+    if CRAWL_MODE == "full":
+        return queue.Queue(), None
+    
+    scheduler = CrawlScheduler().load()
+    
+    if CRAWL_MODE == "budget":
+        deadline = time.time() + CRAWL_BUDGET_MINUTES * 60 if CRAWL_BUDGET_MINUTES else None
+        id_queue = ScheduledQueue(scheduler, max_fetches=CRAWL_BUDGET_FETCHES, deadline=deadline)
+        # Known products compete with newly discovered ones for the budget
+        for product_id in scheduler.plan(CRAWL_BUDGET_FETCHES or len(scheduler.products)):
+            id_queue.put(product_id)
+    else:
+        id_queue = ScheduledQueue(scheduler, only_due=True)
+        for product_id in scheduler.due():
+            id_queue.put(product_id)
+    
+    print(f"Crawl mode {CRAWL_MODE}: {id_queue.qsize()} known products queued")
+    return id_queue, scheduler
 
 
 def main():
     """
     Run the product ID collection and product details scraping concurrently
     """    
+    if CRAWL_PLAN:
+        known_pages_stop = KNOWN_PAGES_STOP if DISCOVERY_MODE == "incremental" else None
+        run_plan(load_plan(CRAWL_PLAN), known_pages_stop=known_pages_stop)
+        print("Scraping completed!")
+        return
+    
     # Example parameters for product search
     params = {
         "text": "ordinateur portable",
@@ -18,21 +74,32 @@ def main():
     }
     
     # Create a queue for passing product IDs between threads
-    id_queue = queue.Queue()
+    id_queue, scheduler = create_queue()
     
     # Create an event to signal when ID collection is complete
     stop_event = threading.Event()
     
+    # IDs seen in previous runs, used to dedupe and for incremental discovery
+    seen_ids = SeenIds().load()
+    known_pages_stop = KNOWN_PAGES_STOP if DISCOVERY_MODE == "incremental" else None
+    if known_pages_stop:
+        # Newest products first, so the known tail of the listing can be skipped
+        params.setdefault("orderby", "date")
+    
+    # Both stages borrow their pages from one browser process
+    browser_pool = start_pool() if BROWSER_POOL else None
+    
     # Create the ID collector thread
     collector_thread = threading.Thread(
         target=collect_ids_thread,
-        args=(id_queue, stop_event, params, 1)
+        args=(id_queue, stop_event, params, 1, seen_ids, known_pages_stop, browser_pool)
     )
     
     # Create the product details processor thread
     processor_thread = threading.Thread(
         target=get_product_details,
-        args=(id_queue, stop_event)
+        args=(id_queue, stop_event, scheduler),
+        kwargs={"browser_pool": browser_pool}
     )
     
     # Start the ID collector thread
@@ -62,6 +129,11 @@ def main():
         
         print("Scraping process stopped by user")
     
+    finally:
+        if browser_pool is not None:
+            print(f"Browser pool: {browser_pool.metrics()}")
+            browser_pool.close()
+    
     print("Scraping completed!")
 
 
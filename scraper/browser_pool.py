@@ -0,0 +1,322 @@
+"""
+One Chromium process shared by the collector and the detail workers.
+
+Playwright's sync API objects belong to the thread that created them, so
+threads cannot share a Browser object. BrowserPool instead starts Chromium
+once with remote debugging enabled, and each thread borrows a lease that
+connects to it over CDP and owns one context and page:
+
+    with pool.lease() as lease:
+        page = lease.page
+        page.goto(url)
+        lease.navigated()
+
+A lease replaces its page (and context) after MAX_NAVIGATIONS navigations,
+when the page's JS heap is above MAX_PAGE_HEAP_MB, or when the whole browser
+uses more than MAX_BROWSER_RSS_MB (needs psutil), which contains leaks of
+long-running pages. Each lease reports its page's memory to the pool;
+pool.metrics() returns the browser RSS and the per-page figures.
+
+borrow(None) launches a browser of its own, as the stages did before;
+start_pool() returns None when the shared browser cannot be started.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from playwright.sync_api import sync_playwright
+
+try:
+    import psutil
+except ImportError:
+    # psutil not installed: no browser RSS, pages are recycled by navigations and heap size
+    psutil = None
+
+VIEWPORT = {"width": 1000, "height": 400}
+
+MAX_NAVIGATIONS = int(os.getenv("BROWSER_MAX_NAVIGATIONS", 200))
+MAX_PAGE_HEAP_MB = float(os.getenv("BROWSER_MAX_PAGE_HEAP_MB", 300))
+MAX_BROWSER_RSS_MB = float(os.getenv("BROWSER_MAX_RSS_MB", 2048))
+
+# Page memory is read every this many navigations
+MEMORY_CHECK_EVERY = 10
+
+# Seconds to wait for Chromium to open its debugging port
+STARTUP_TIMEOUT = 30
+
+# The switches Playwright passes to Chromium in launch(), which a bare process
+# otherwise misses: without --no-sandbox Chromium exits when run as root or in
+# most containers, and --disable-dev-shm-usage avoids crashes on a small /dev/shm
+LAUNCH_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-field-trial-config",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-back-forward-cache",
+    "--disable-breakpad",
+    "--disable-client-side-phishing-detection",
+    "--disable-component-extensions-with-background-pages",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-extensions",
+    "--disable-hang-monitor",
+    "--disable-ipc-flooding-protection",
+    "--disable-popup-blocking",
+    "--disable-prompt-on-repost",
+    "--disable-renderer-backgrounding",
+    "--disable-search-engine-choice-screen",
+    "--force-color-profile=srgb",
+    "--metrics-recording-only",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--no-service-autorun",
+    "--password-store=basic",
+    "--use-mock-keychain",
+]
+HEADLESS_ARGS = ["--headless", "--hide-scrollbars", "--mute-audio"]
+
+MB = 1024 * 1024
+
+
+class PageLease:
+    """
+    A thread's connection to the browser, with one context and page
+    """
+
+    def __init__(self, browser, name, pool=None, viewport=VIEWPORT):
+        self.browser = browser
+        self.name = name
+        self.pool = pool
+        self.viewport = viewport
+        self.navigations = 0
+        self.recycled = 0
+        self.context = None
+        self.page = None
+        self._new_page()
+
+    def _new_page(self):
+        self.context = self.browser.new_context(viewport=self.viewport)
+        self.page = self.context.new_page()
+        self.navigations = 0
+
+    def recycle(self, reason):
+        """
+        Replace the page and its context
+        """
+        print(f"Recycling page of {self.name} ({reason})")
+        self.context.close()
+        self._new_page()
+        self.recycled += 1
+        if self.pool is not None:
+            self.pool.record_recycle()
+
+    def page_memory(self):
+        """
+        Memory of the page from the Chrome DevTools Performance domain
+
+        Returns:
+            Dictionary with js_heap_mb, js_heap_total_mb, dom_nodes and documents
+        """
+        session = self.context.new_cdp_session(self.page)
+        try:
+            session.send("Performance.enable")
+            metrics = {m["name"]: m["value"] for m in session.send("Performance.getMetrics")["metrics"]}
+        finally:
+            session.detach()
+        return {
+            "js_heap_mb": round(metrics.get("JSHeapUsedSize", 0) / MB, 1),
+            "js_heap_total_mb": round(metrics.get("JSHeapTotalSize", 0) / MB, 1),
+            "dom_nodes": int(metrics.get("Nodes", 0)),
+            "documents": int(metrics.get("Documents", 0)),
+        }
+
+    def navigated(self):
+        """
+        Count a navigation and recycle the page when it is due. Call it
+        between navigations, once the page's listeners have been removed.
+        """
+        self.navigations += 1
+        if self.navigations >= MAX_NAVIGATIONS:
+            self.recycle(f"{self.navigations} navigations")
+            return
+        if self.navigations % MEMORY_CHECK_EVERY:
+            return
+
+        try:
+            memory = self.page_memory()
+        except Exception as e:
+            print(f"Could not read page memory of {self.name}: {e}")
+            return
+
+        browser_rss = None
+        if self.pool is not None:
+            self.pool.report(self.name, memory)
+            browser_rss = self.pool.browser_rss_mb()
+
+        if memory["js_heap_mb"] > MAX_PAGE_HEAP_MB:
+            self.recycle(f"JS heap {memory['js_heap_mb']} MB")
+        elif browser_rss is not None and browser_rss > MAX_BROWSER_RSS_MB:
+            self.recycle(f"browser RSS {browser_rss:.0f} MB")
+
+    def close(self):
+        try:
+            self.context.close()
+        except Exception as e:
+            print(f"Error closing context of {self.name}: {e}")
+
+
+class BrowserPool:
+    """
+    A Chromium process shared over CDP by the scraper threads
+    """
+
+    def __init__(self, headless=True):
+        self.headless = headless
+        self.process = None
+        self.endpoint = None
+        self.recycled = 0
+        self._user_data_dir = None
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Launch Chromium with remote debugging on a free port
+        """
+        with sync_playwright() as p:
+            executable = p.chromium.executable_path
+
+        self._user_data_dir = tempfile.mkdtemp(prefix="barbechli-browser-")
+        args = [executable, *LAUNCH_ARGS]
+        if self.headless:
+            args += HEADLESS_ARGS
+        args += ["--remote-debugging-port=0", f"--user-data-dir={self._user_data_dir}", "about:blank"]
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        # Chromium writes the port it picked to DevToolsActivePort
+        port_file = os.path.join(self._user_data_dir, "DevToolsActivePort")
+        deadline = time.time() + STARTUP_TIMEOUT
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                self.close()
+                raise RuntimeError(f"Chromium exited with code {self.process.returncode}")
+            if os.path.exists(port_file):
+                with open(port_file, "r", encoding="utf-8") as f:
+                    port = f.readline().strip()
+                if port:
+                    self.endpoint = f"http://127.0.0.1:{port}"
+                    print(f"Browser pool started: {self.endpoint} (pid {self.process.pid})")
+                    return self
+            time.sleep(0.1)
+
+        self.close()
+        raise RuntimeError("Chromium did not open its debugging port")
+
+    def close(self):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+            print(f"Browser pool closed ({self.recycled} pages recycled)")
+        if self._user_data_dir:
+            shutil.rmtree(self._user_data_dir, ignore_errors=True)
+            self._user_data_dir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
+
+    @contextmanager
+    def lease(self, viewport=VIEWPORT):
+        """
+        Connect the calling thread to the browser and give it a page
+        """
+        name = threading.current_thread().name
+        with sync_playwright() as p:
+            browser = p.chromium.connect_over_cdp(self.endpoint)
+            lease = PageLease(browser, name, pool=self, viewport=viewport)
+            try:
+                yield lease
+            finally:
+                lease.close()
+                # Disconnects only; the pool's process keeps running
+                browser.close()
+                with self._lock:
+                    self._pages.pop(name, None)
+
+    def record_recycle(self):
+        with self._lock:
+            self.recycled += 1
+
+    def report(self, name, memory):
+        with self._lock:
+            self._pages[name] = memory
+
+    def browser_rss_mb(self):
+        """
+        Resident memory of Chromium and its child processes, None without psutil
+        """
+        if psutil is None or self.process is None:
+            return None
+        try:
+            root = psutil.Process(self.process.pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(process.memory_info().rss for process in processes) / MB
+        except psutil.Error:
+            return None
+
+    def metrics(self):
+        rss = self.browser_rss_mb()
+        with self._lock:
+            return {
+                "browser_rss_mb": round(rss, 1) if rss is not None else None,
+                "pages_recycled": self.recycled,
+                "pages": dict(self._pages),
+            }
+
+
+def start_pool(headless=True):
+    """
+    Start a BrowserPool, or return None (each thread then launches its own
+    browser) when Chromium cannot be started this way
+    """
+    pool = BrowserPool(headless=headless)
+    try:
+        return pool.start()
+    except Exception as e:
+        print(f"Could not start the browser pool, using one browser per thread: {e}")
+        pool.close()
+        return None
+
+
+@contextmanager
+def borrow(pool=None, viewport=VIEWPORT):
+    """
+    Lease a page from the pool, or launch a browser for the calling thread
+    when there is no pool
+    """
+    if pool is not None:
+        with pool.lease(viewport) as lease:
+            yield lease
+        return
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        lease = PageLease(browser, threading.current_thread().name, viewport=viewport)
+        try:
+            yield lease
+        finally:
+            browser.close()
@@ -0,0 +1,299 @@
+"""
+Crawl plans: several searches run in parallel, one process per shard.
+
+A plan is a JSON or YAML file (YAML needs PyYAML) with search parameters:
+
+    {
+      "defaults": {"orderby": "popularity"},
+      "queries": [
+        {"text": "ordinateur portable", "category": "computers", "subcategories": "laptops"}
+      ],
+      "matrix": {
+        "categories": [{"category": "computers", "subcategories": "laptops"}, {"category": "phones"}],
+        "sources": ["tunisianet", "mytek"]
+      }
+    }
+
+Every query, and every category x source pair of the matrix, becomes a shard.
+Shards run the usual collector + detail pipeline in a process pool, each
+writing its product files to output/shards/<shard>/. Product IDs are claimed
+in a dictionary shared by all shards, so a product listed by several queries
+is fetched once. When all shards are done, their products are merged into the
+main product files.
+
+Usage:
+    python -m scraper.crawl_plan plan.yaml [--processes 4]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import re
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from data_manager import data_manager, snapshot
+from scraper import rate_control, retry, scrape_ids
+from scraper.browser_pool import start_pool
+from scraper.retry import DeadLetters
+from scraper.scrape_ids import collect_ids_thread
+from scraper.scrape_product_details import get_product_details
+from scraper.seen_ids import SeenIds
+
+try:
+    import yaml
+except ImportError:
+    # PyYAML not installed: JSON plans only
+    yaml = None
+
+SHARDS_DIR = "output/shards"
+
+# Shard processes running at once, and detail workers (browsers) per shard
+CRAWL_PROCESSES = int(os.getenv("CRAWL_PROCESSES", min(4, os.cpu_count() or 1)))
+SHARD_DETAIL_WORKERS = int(os.getenv("SHARD_DETAIL_WORKERS", 2))
+
+
+def load_plan(path):
+    """
+    Read a crawl plan from a JSON or YAML file
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ImportError("PyYAML is required for YAML crawl plans (pip install pyyaml)")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def _shard_name(params):
+    values = [str(params[key]) for key in ("text", "category", "subcategories", "sources") if params.get(key)]
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", "_".join(values)).strip("-").lower() or "all"
+
+
+def expand_plan(plan):
+    """
+    Turn a plan into shards
+
+    Args:
+        plan: Dictionary with optional defaults, queries and matrix, or a list of queries
+
+    Returns:
+        List of (shard name, search parameters) tuples
+
+    A plan without a matrix yields exactly its queries:
+
+    >>> expand_plan([{"text": "tv"}, {"category": "phones"}])
+    [('tv', {'text': 'tv'}), ('phones', {'category': 'phones'})]
+    >>> [name for name, _ in expand_plan({"matrix": {"categories": ["phones"], "sources": ["mytek", "sbs"]}})]
+    ['phones_mytek', 'phones_sbs']
+    """
+    if isinstance(plan, list):
+        plan = {"queries": plan}
+
+    defaults = plan.get("defaults") or {}
+    shards = [{**defaults, **query} for query in plan.get("queries") or []]
+
+    matrix = plan.get("matrix")
+    if matrix:
+        categories = matrix.get("categories") or [{}]
+        sources = matrix.get("sources") or [None]
+        for category in categories:
+            if isinstance(category, str):
+                category = {"category": category}
+            for source in sources:
+                params = {**defaults, **category}
+                if source:
+                    params["sources"] = source
+                shards.append(params)
+
+    named = []
+    names = set()
+    for params in shards:
+        name = base = _shard_name(params)
+        suffix = 2
+        while name in names:
+            name = f"{base}-{suffix}"
+            suffix += 1
+        names.add(name)
+        named.append((name, params))
+    return named
+
+
+class ClaimedQueue(queue.Queue):
+    """
+    Queue that drops product IDs already claimed by another shard
+    """
+
+    def __init__(self, claimed, shard):
+        super().__init__()
+        self.claimed = claimed
+        self.shard = shard
+        self.duplicates = 0
+
+    def put(self, product_id, block=True, timeout=None):
+        # Dropped IDs never reach the queue, so they are not unfinished tasks
+        if self.claimed.setdefault(product_id, self.shard) != self.shard:
+            with self.mutex:
+                self.duplicates += 1
+            return
+        super().put(product_id, block, timeout)
+
+
+def run_shard(name, params, claimed, known_ids, main_paths, known_pages_stop=None,
+              workers=SHARD_DETAIL_WORKERS):
+    """
+    Run the collector and detail workers for one shard (in a pool process)
+
+    Args:
+        name: Shard name, also its directory under SHARDS_DIR
+        params: Search parameters
+        claimed: Shared dictionary uniqueID -> shard that queued it
+        known_ids: Product IDs seen by previous runs
+        main_paths: (JSON, JSONL) paths of the main product files
+        known_pages_stop: Incremental discovery setting passed to the collector
+
+    Returns:
+        Dictionary with the shard's counts
+    """
+    # Everything this process writes goes to the shard directory
+    shard_dir = os.path.join(SHARDS_DIR, name)
+    data_manager.set_output_dir(shard_dir)
+    data_manager.EXPORT_PARQUET = False
+    scrape_ids.IDS_BACKUP_PATH = os.path.join(shard_dir, "barbechli_product_ids.json")
+    retry.DEAD_LETTERS_PATH = os.path.join(shard_dir, "dead_letters.jsonl")
+    rate_control.METRICS_PATH = os.path.join(shard_dir, "scraper_metrics.json")
+
+    # Unchanged products are detected from the main catalog's fingerprints
+    data_manager.known_hashes, data_manager.known_unsynced = snapshot.load_fingerprints(*main_paths)
+
+    seen_ids = SeenIds(os.path.join(shard_dir, "seen_ids.txt"))
+    seen_ids.known = known_ids
+    params = dict(params)
+    if known_pages_stop:
+        # Newest products first, so the known tail of the listing can be skipped
+        params.setdefault("orderby", "date")
+
+    id_queue = ClaimedQueue(claimed, name)
+    stop_event = threading.Event()
+    print(f"Shard {name}: {params}")
+
+    # One browser process per shard, shared by its collector and workers
+    browser_pool = start_pool()
+    try:
+        collector_thread = threading.Thread(
+            target=collect_ids_thread,
+            args=(id_queue, stop_event, params, 1, seen_ids, known_pages_stop, browser_pool)
+        )
+        collector_thread.start()
+        products = get_product_details(id_queue, stop_event, workers=workers, browser_pool=browser_pool)
+        collector_thread.join()
+    finally:
+        if browser_pool is not None:
+            browser_pool.close()
+
+    return {
+        "shard": name,
+        "ids": len(seen_ids.current),
+        "duplicates": id_queue.duplicates,
+        "products": len(products),
+        **data_manager.write_counts,
+    }
+
+
+def merge_shards(names):
+    """
+    Merge the shards' product files into the main product files, and their
+    dead letters into the main dead-letter file
+    """
+    _, products = data_manager.load_existing_data()
+    merged = 0
+    for name in names:
+        shard_dir = os.path.join(SHARDS_DIR, name)
+        for product in snapshot.iter_products(
+            os.path.join(shard_dir, "barbechli_products_details.json"),
+            os.path.join(shard_dir, "barbechli_products_details.jsonl"),
+        ):
+            products[product["uniqueID"]] = product
+            merged += 1
+
+        shard_dead_letters = os.path.join(shard_dir, "dead_letters.jsonl")
+        if os.path.exists(shard_dead_letters):
+            with open(shard_dead_letters, "r", encoding="utf-8") as source, \
+                    open(DeadLetters().path, "a", encoding="utf-8") as target:
+                shutil.copyfileobj(source, target)
+
+    print(f"Merged {merged} products from {len(names)} shards")
+    if products:
+        data_manager.save_products_data(products, is_final=True)
+    return products
+
+
+def run_plan(plan, processes=CRAWL_PROCESSES, known_pages_stop=None):
+    """
+    Run every shard of a plan in a process pool and merge the results
+
+    Args:
+        plan: Plan dictionary or list of queries (see load_plan)
+        processes: Shards running at once
+        known_pages_stop: Incremental discovery setting for the collectors
+    """
+    shards = expand_plan(plan)
+    print(f"Crawl plan: {len(shards)} shards, {processes} at a time")
+
+    # Shard directories only hold this run's results
+    for name, _ in shards:
+        shutil.rmtree(os.path.join(SHARDS_DIR, name), ignore_errors=True)
+
+    # Shards requeue their own dead letters: hand them the products that
+    # failed in earlier runs, spread across the shards. Listing pages stay in
+    # the main file since their URLs belong to other searches.
+    requeued = DeadLetters().take("product") if shards else []
+    shard_dead_letters = [DeadLetters(os.path.join(SHARDS_DIR, name, "dead_letters.jsonl")) for name, _ in shards]
+    for i, product_id in enumerate(requeued):
+        shard_dead_letters[i % len(shards)].add(product_id, "product", "requeued", 0)
+    if requeued:
+        print(f"Requeueing {len(requeued)} dead-lettered products across the shards")
+
+    seen_ids = SeenIds().load()
+    main_paths = (data_manager.details_path(), data_manager.details_jsonl_path())
+
+    # Spawned workers start clean (no inherited database connections or threads)
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        claimed = manager.dict()
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+            futures = {
+                executor.submit(run_shard, name, params, claimed, seen_ids.known, main_paths, known_pages_stop): name
+                for name, params in shards
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    result = future.result()
+                    print(f"Shard {name} done: {result}")
+                except Exception as e:
+                    print(f"Shard {name} failed: {e}")
+
+        seen_ids.current = set(claimed.keys())
+
+    seen_ids.save()
+    # Failed shards may still have saved products incrementally
+    return merge_shards([name for name, _ in shards])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a crawl plan across a process pool")
+    parser.add_argument("plan", help="JSON or YAML crawl plan")
+    parser.add_argument("--processes", type=int, default=CRAWL_PROCESSES, help="Shards running at once")
+    parser.add_argument("--known-pages-stop", type=int,
+                        help="Incremental discovery: stop after this many pages without new IDs")
+    args = parser.parse_args()
+
+    run_plan(load_plan(args.plan), processes=args.processes, known_pages_stop=args.known_pages_stop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Recorded barbechli.tn responses, for running the scrapers offline.
+
+With RECORD_FIXTURES=<file> the scrapers append every find/?q= response they
+capture (listing pages and product lookups) to a gzip-compressed JSON-lines
+file. Each line holds:
+- page: the page the scraper navigated to (/search;... or /product/<id>)
+- url: the request path and query (/find/?q=...)
+- status and body of the response
+
+scraper/mock_server.py replays such a file. Responses recorded several times
+keep the latest one.
+
+Usage:
+    RECORD_FIXTURES=fixtures/barbechli.jsonl.gz python main.py
+"""
+
+import gzip
+import json
+import os
+import threading
+from urllib.parse import unquote, urlsplit
+
+DEFAULT_PATH = "fixtures/barbechli.jsonl.gz"
+
+_lock = threading.Lock()
+
+
+def request_key(url):
+    """
+    Path and query of a URL, percent-decoded, so that the URL sent by the
+    browser and the one received by the server compare equal
+    """
+    parts = urlsplit(url)
+    key = unquote(parts.path)
+    if parts.query:
+        key += "?" + unquote(parts.query)
+    return key
+
+
+class FixtureRecorder:
+    """
+    Appends responses to a fixture file; safe to share between threads
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.recorded = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def record(self, page_url, url, status, body):
+        """
+        Append one response
+
+        Args:
+            page_url: URL of the page that requested it
+            url: Request URL
+            status: HTTP status
+            body: Response body (bytes)
+        """
+        entry = {
+            "page": request_key(page_url),
+            "url": request_key(url),
+            "status": status,
+            "body": body.decode("utf-8", errors="replace"),
+        }
+        # One complete gzip member per write, so the file stays readable even
+        # if the process stops mid-run
+        data = gzip.compress((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+        with _lock:
+            with open(self.path, "ab") as f:
+                f.write(data)
+            self.recorded += 1
+
+
+# Set from RECORD_FIXTURES; None when not recording
+recorder = FixtureRecorder(os.environ["RECORD_FIXTURES"]) if os.getenv("RECORD_FIXTURES") else None
+
+
+def record_response(response, page_url):
+    """
+    Record a Playwright response when recording is enabled
+
+    Args:
+        response: Playwright response of a find/?q= request
+        page_url: URL the scraper navigated to; the replay server serves the
+            recorded requests when it is requested again
+    """
+    if recorder is None:
+        return
+    try:
+        recorder.record(page_url, response.url, response.status, response.body())
+    except Exception as e:
+        print(f"Could not record response from {response.url}: {e}")
+
+
+class FixtureStore:
+    """
+    Recorded responses indexed by request, and the requests made by each page
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.responses = {}  # request key -> (status, body)
+        self.pages = {}      # page key -> request keys, in recording order
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self.responses[entry["url"]] = (entry["status"], entry["body"].encode("utf-8"))
+                requests = self.pages.setdefault(entry["page"], [])
+                if entry["url"] not in requests:
+                    requests.append(entry["url"])
+
+    def response(self, key):
+        """
+        Return (status, body) recorded for a request key (see request_key), or None
+        """
+        return self.responses.get(key)
+
+    def page_requests(self, page_key):
+        """
+        The find/?q= requests the page made when it was recorded, by request key
+        """
+        return self.pages.get(page_key, [])
+
+    def __len__(self):
+        return len(self.responses)
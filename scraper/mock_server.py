@@ -0,0 +1,195 @@
+"""
+Local stand-in for barbechli.tn that replays recorded fixtures.
+
+- /find/?q=... returns the recorded response. Unknown listing requests
+  return an empty page (the end of the listing); unknown product lookups
+  return an empty response.
+- /search;... and /product/<id> return a small SPA shell whose script
+  requests the same find/?q= URLs the real page made when it was recorded,
+  so the Playwright scrapers run unchanged.
+- Latency, jitter and errors can be injected to exercise the rate
+  controller, retries and circuit breaker.
+
+Usage:
+    python -m scraper.mock_server --fixtures fixtures/barbechli.jsonl.gz --port 8765 \\
+        --latency 0.2 --jitter 0.1 --error-rate 0.05
+    BARBECHLI_BASE_URL=http://127.0.0.1:8765 python main.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+from scraper.fixtures import DEFAULT_PATH, FixtureStore, request_key
+
+SHELL = """<!doctype html>
+<html>
+<head><meta charset="utf-8"><title>barbechli (mock)</title></head>
+<body>
+<div id="app">Loading...</div>
+<script>
+const requests = %s;
+Promise.all(requests.map((url) => fetch(url).then((response) => response.text())))
+  .then((bodies) => { document.getElementById("app").textContent = bodies.length + " responses"; });
+</script>
+</body>
+</html>
+"""
+
+EMPTY_PAGE = b'{"response": []}'
+EMPTY_PRODUCT = b'{"response": null}'
+
+
+class MockBarbechli(ThreadingHTTPServer):
+    """
+    HTTP server replaying a FixtureStore
+
+    Args:
+        address: (host, port)
+        store: FixtureStore to replay
+        latency: Seconds added to each find/?q= response
+        jitter: Random extra seconds, uniform in [0, jitter]
+        error_rate: Share of find/?q= requests answered with error_status
+        error_status: Status of injected errors (503, or 429 to test throttling)
+        timeout_rate: Share of find/?q= requests left unanswered for `hang` seconds
+        hang: Seconds a "timed out" request hangs
+    """
+    daemon_threads = True
+
+    def __init__(self, address, store, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503,
+                 timeout_rate=0.0, hang=60.0):
+        super().__init__(address, MockHandler)
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.served = 0
+        self.injected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        Serve from a background thread (for benchmarks and tests)
+        """
+        thread = threading.Thread(target=self.serve_forever, name="mock-barbechli", daemon=True)
+        thread.start()
+        return self
+
+    def count(self, injected=False):
+        with self._lock:
+            self.served += 1
+            if injected:
+                self.injected += 1
+
+
+class MockHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        # Quiet by default; a request line per fetch drowns the scraper output
+        pass
+
+    def do_GET(self):
+        # The only place the request path is decoded
+        key = request_key(self.path)
+        if key.startswith("/find/"):
+            self.find(key)
+        elif key.startswith("/search") or key.startswith("/product/"):
+            self.shell(key)
+        else:
+            self.send_body(404, b"Not found", "text/plain")
+
+    def find(self, key):
+        server = self.server
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        roll = random.random()
+        if roll < server.timeout_rate:
+            server.count(injected=True)
+            time.sleep(server.hang)
+            return
+        if roll < server.timeout_rate + server.error_rate:
+            server.count(injected=True)
+            self.send_body(server.error_status, b'{"error": "injected"}')
+            return
+
+        server.count()
+        recorded = server.store.response(key)
+        if recorded is not None:
+            status, body = recorded
+            self.send_body(status, body)
+        elif "uid" in key:
+            self.send_body(200, EMPTY_PRODUCT)
+        else:
+            self.send_body(200, EMPTY_PAGE)
+
+    def shell(self, key):
+        requests = self.server.store.page_requests(key)
+        if not requests:
+            requests = [self.fallback_request(key)]
+        # The recorded keys are decoded; re-encode them as the browser would
+        urls = [quote(url, safe="/?=&{}:,") for url in requests]
+        body = (SHELL % json.dumps(urls)).encode("utf-8")
+        self.send_body(200, body, "text/html; charset=utf-8")
+
+    @staticmethod
+    def fallback_request(key):
+        """
+        A find/?q= request for a page that was not recorded, shaped so the
+        scrapers recognise it and get an empty answer
+        """
+        if key.startswith("/product/"):
+            return '/find/?q={"uid":"%s"}' % key[len("/product/"):]
+        return '/find/?q={"unrecorded":true}&orderby=' + quote(key)
+
+    def send_body(self, status, body, content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded barbechli.tn responses")
+    parser.add_argument("--fixtures", default=DEFAULT_PATH, help="Fixture file written with RECORD_FIXTURES")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of responses replaced by errors")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected errors")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Share of requests left hanging")
+    args = parser.parse_args()
+
+    store = FixtureStore(args.fixtures)
+    server = MockBarbechli(
+        (args.host, args.port), store, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, error_status=args.error_status, timeout_rate=args.timeout_rate,
+    )
+    print(f"Replaying {len(store)} responses from {args.fixtures} at {server.base_url}")
+    print(f"Run the scrapers with BARBECHLI_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Served {server.served} find requests ({server.injected} injected failures)")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
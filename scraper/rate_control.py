@@ -0,0 +1,199 @@
+"""
+Adaptive concurrency control for requests to barbechli.tn.
+
+Each endpoint ("search" for listing pages, "product" for product pages) has an
+AdaptiveLimiter that caps the number of fetches in flight, AIMD style:
+- every healthy response (payload received, latency under the endpoint's
+  target) grows the limit by 1/limit, i.e. by one slot per round of requests
+- a timeout, an HTTP 429, an error or an empty payload halves the limit, at
+  most once per cooldown so one burst of failures counts as one signal, and a
+  429 also pauses new fetches for the cooldown
+- slow responses (latency above the target) shrink the limit gently
+
+Workers wrap each fetch in `with limiter.slot() as slot:` and set
+slot.outcome; the limit then converges on the highest rate the site sustains.
+controller.metrics() returns the state of every limiter, and
+controller.save_metrics() writes it to output/scraper_metrics.json.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+
+METRICS_PATH = "output/scraper_metrics.json"
+
+# Fetch outcomes
+OK = "ok"
+TIMEOUT = "timeout"
+THROTTLED = "throttled"
+EMPTY = "empty"
+ERROR = "error"
+FAILURES = frozenset((TIMEOUT, THROTTLED, EMPTY, ERROR))
+
+# Per-endpoint settings: initial/min/max in-flight fetches and the latency
+# (seconds) above which responses count as slow. A limit only matters up to
+# the number of threads fetching the endpoint: listing pages are read by a
+# single collector thread, and get_product_details caps the product maximum
+# at its worker count.
+ENDPOINT_LIMITS = {
+    "search": {"initial": 1, "minimum": 1, "maximum": 1, "latency_target": 10.0},
+    "product": {"initial": 2, "minimum": 1, "maximum": 8, "latency_target": 6.0},
+}
+DEFAULT_LIMITS = {"initial": 1, "minimum": 1, "maximum": 4, "latency_target": 8.0}
+
+# Seconds between two decreases, also the pause after a 429
+COOLDOWN = 5.0
+
+# Number of recent outcomes used for the error rate
+WINDOW = 50
+
+
+class Slot:
+    """
+    One fetch holding a limiter slot; set `outcome` before leaving the block
+    """
+    __slots__ = ("limiter", "started", "outcome")
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.started = None
+        self.outcome = OK
+
+    def __enter__(self):
+        self.limiter.acquire()
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None and self.outcome == OK:
+            self.outcome = ERROR
+        self.limiter.release(self.outcome, time.monotonic() - self.started)
+        return False
+
+
+class AdaptiveLimiter:
+    """
+    AIMD limit on concurrent fetches for one endpoint
+    """
+
+    def __init__(self, name, initial=1, minimum=1, maximum=4, latency_target=8.0,
+                 decrease=0.5, cooldown=COOLDOWN):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self.cooldown = cooldown
+
+        self.limit = float(initial)
+        self.in_flight = 0
+        self.latency = None          # Moving average of healthy responses, seconds
+        self.outcomes = Counter()
+        self.recent = deque(maxlen=WINDOW)
+        self.paused_until = 0.0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def slot(self):
+        return Slot(self)
+
+    def acquire(self, stop_event=None):
+        """
+        Wait for a free slot (and for the end of a 429 pause)
+        """
+        with self._condition:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    break
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    break
+                self._condition.wait(timeout=wait if wait > 0 else 1)
+            self.in_flight += 1
+
+    def release(self, outcome, latency):
+        """
+        Free a slot and adjust the limit from the fetch outcome
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self.outcomes[outcome] += 1
+            self.recent.append(outcome in FAILURES)
+            now = time.monotonic()
+
+            if outcome in FAILURES:
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = now
+                if outcome == THROTTLED:
+                    self.paused_until = max(self.paused_until, now + self.cooldown)
+            else:
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+                if self.latency > self.latency_target:
+                    # Slow but successful: shrink by one slot per round
+                    self.limit = max(self.minimum, self.limit - 1 / self.limit)
+                else:
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+            self._condition.notify_all()
+
+    def metrics(self):
+        with self._condition:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "latency_avg": round(self.latency, 3) if self.latency is not None else None,
+                "error_rate": round(sum(self.recent) / len(self.recent), 3) if self.recent else 0.0,
+                "paused": self.paused_until > time.monotonic(),
+                "outcomes": dict(self.outcomes),
+            }
+
+
+class RateController:
+    """
+    The limiters of all endpoints, shared by the collector and detail workers
+    """
+
+    def __init__(self, limits=None):
+        self.limits = limits or ENDPOINT_LIMITS
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, endpoint):
+        with self._lock:
+            if endpoint not in self._limiters:
+                settings = self.limits.get(endpoint, DEFAULT_LIMITS)
+                self._limiters[endpoint] = AdaptiveLimiter(endpoint, **settings)
+            return self._limiters[endpoint]
+
+    def metrics(self):
+        """
+        Current state of every endpoint's limiter
+        """
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.name: limiter.metrics() for limiter in limiters}
+
+    def summary(self):
+        """
+        One-line description of the limiters, for progress logs
+        """
+        return ", ".join(
+            f"{name}: limit {m['limit']}, in flight {m['in_flight']}, "
+            f"avg {m['latency_avg']}s, errors {m['error_rate']:.0%}"
+            for name, m in self.metrics().items()
+        )
+
+    def save_metrics(self, path=None):
+        path = path or METRICS_PATH
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": time.time(), "endpoints": self.metrics()}, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+# Shared by all scraper threads of the process
+controller = RateController()
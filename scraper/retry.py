@@ -0,0 +1,218 @@
+"""
+Retries, dead letters and circuit breaking for scraper fetches.
+
+- backoff_delay: exponential backoff with full jitter, so workers that failed
+  together do not retry together
+- RetryTracker: per-ID retry budget; failed product IDs are put back on the
+  queue after their backoff delay, and IDs that exhaust the budget go to the
+  dead-letter file (output/dead_letters.jsonl), which the next run requeues
+- CircuitBreaker: after enough consecutive failures the circuit opens and
+  workers pause instead of burning their retry budgets against a degraded
+  site; after the reset timeout one trial fetch decides whether it closes
+"""
+
+import json
+import os
+import random
+import threading
+import time
+
+DEAD_LETTERS_PATH = "output/dead_letters.jsonl"
+
+# Fetch attempts per product ID (first try included) and per listing page
+MAX_ATTEMPTS = int(os.getenv("MAX_ATTEMPTS", 3))
+PAGE_ATTEMPTS = int(os.getenv("PAGE_ATTEMPTS", 4))
+
+# Backoff: base * 2^attempt seconds, capped
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 60.0
+
+# Circuit breaker: consecutive failures before opening, and the first pause
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+MAX_RESET_TIMEOUT = 300.0
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """
+    Delay before retry number `attempt` (1 for the first retry), with full jitter
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class DeadLetters:
+    """
+    IDs that failed every attempt, one JSON object per line
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DEAD_LETTERS_PATH
+        self._lock = threading.Lock()
+
+    def add(self, key, kind, reason, attempts):
+        """
+        Record a failed product ID or listing page
+        """
+        entry = {"id": key, "kind": kind, "reason": reason, "attempts": attempts, "at": time.time()}
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def take(self, kind="product"):
+        """
+        Remove and return the dead-lettered IDs of one kind, for requeueing
+        """
+        with self._lock:
+            if not os.path.exists(self.path):
+                return []
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+
+            taken = list(dict.fromkeys(entry["id"] for entry in entries if entry["kind"] == kind))
+            kept = [entry for entry in entries if entry["kind"] != kind]
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in kept:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+            return taken
+
+
+class RetryTracker:
+    """
+    Per-ID attempt counts and delayed requeueing of failed product IDs
+    """
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, dead_letters=None):
+        self.max_attempts = max_attempts
+        self.dead_letters = dead_letters or DeadLetters()
+        self.attempts = {}
+        self.retried = 0
+        self.dead = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def pending(self):
+        """
+        Number of IDs waiting for their backoff delay before being requeued
+        """
+        with self._lock:
+            return self._pending
+
+    def succeeded(self, product_id):
+        with self._lock:
+            self.attempts.pop(product_id, None)
+
+    def failed(self, product_id, id_queue, reason):
+        """
+        Requeue a failed product ID after its backoff delay, or dead-letter it
+        once its attempts are used up
+
+        Returns:
+            True if the ID will be retried
+        """
+        with self._lock:
+            attempt = self.attempts.get(product_id, 0) + 1
+            self.attempts[product_id] = attempt
+            if attempt >= self.max_attempts:
+                self.attempts.pop(product_id, None)
+                self.dead += 1
+                retry = False
+            else:
+                self.retried += 1
+                self._pending += 1
+                retry = True
+
+        if not retry:
+            print(f"Giving up on product {product_id} after {attempt} attempts ({reason})")
+            self.dead_letters.add(product_id, "product", reason, attempt)
+            return False
+
+        delay = backoff_delay(attempt)
+        print(f"Retrying product {product_id} in {delay:.1f}s (attempt {attempt + 1}/{self.max_attempts}, {reason})")
+        timer = threading.Timer(delay, self._requeue, args=(product_id, id_queue))
+        timer.daemon = True
+        timer.start()
+        return True
+
+    def _requeue(self, product_id, id_queue):
+        try:
+            # ScheduledQueue drops IDs it has served unless they are requeued
+            getattr(id_queue, "requeue", id_queue.put)(product_id)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def summary(self):
+        return f"{self.retried} retries, {self.dead} products dead-lettered"
+
+
+class CircuitBreaker:
+    """
+    Pauses fetches to an endpoint after consecutive failures.
+
+    closed: fetches go through; open: fetches wait for the reset timeout;
+    half-open: one trial fetch, its outcome closes or reopens the circuit
+    (with a doubled timeout).
+    """
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT,
+                 max_reset_timeout=MAX_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._trial_running = False
+        self._condition = threading.Condition()
+
+    def wait(self):
+        """
+        Block until a fetch may go through (at most the reset timeout, unless
+        another worker's trial fetch is still running)
+        """
+        with self._condition:
+            while True:
+                if self.state == "closed":
+                    return
+                remaining = self.opened_at + self.reset_timeout - time.monotonic()
+                if remaining <= 0 and not self._trial_running:
+                    self.state = "half_open"
+                    self._trial_running = True
+                    print(f"Circuit {self.name} half-open: trying one fetch")
+                    return
+                self._condition.wait(timeout=max(0.1, min(remaining, 1.0)))
+
+    def record_success(self):
+        with self._condition:
+            if self.state != "closed":
+                print(f"Circuit {self.name} closed")
+            self.state = "closed"
+            self.failures = 0
+            self.reset_timeout = self.base_reset_timeout
+            self._trial_running = False
+            self._condition.notify_all()
+
+    def record_failure(self):
+        with self._condition:
+            self.failures += 1
+            if self.state == "half_open":
+                self.reset_timeout = min(self.max_reset_timeout, self.reset_timeout * 2)
+                self._open()
+            elif self.state == "closed" and self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self._trial_running = False
+        print(f"Circuit {self.name} open after {self.failures} consecutive failures, "
+              f"pausing for {self.reset_timeout:.0f}s")
+        self._condition.notify_all()
@@ -0,0 +1,291 @@
+"""
+Recrawl scheduling by staleness and volatility.
+
+Each product's changes are modelled as a Poisson process whose rate is
+estimated from its price and availability histories (smoothed with a prior
+so products with little history still get revisited). The probability that a
+product changed since it was last crawled is 1 - exp(-rate * elapsed); this
+is weighted by popularity (clicks) to rank products.
+
+- Scheduled mode: a product is due once its weighted change probability
+  reaches DUE_PROBABILITY, which gives each product its own interval.
+- Budget mode: with N fetches or T minutes, the most valuable products are
+  fetched first, which maximizes the expected number of detected changes.
+
+ScheduledQueue feeds the detail workers in priority order and can be used
+wherever the plain id queue was.
+"""
+
+import heapq
+import json
+import math
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from data_manager import snapshot
+
+SCHEDULE_PATH = "output/crawl_schedule.json"
+
+DAY = 24 * 3600
+
+# Prior: one change per PRIOR_DAYS of observation, so sparse histories are
+# pulled towards a monthly change rate
+PRIOR_CHANGES = 1.0
+PRIOR_DAYS = 30.0
+
+# A product is due when its weighted change probability reaches this value
+DUE_PROBABILITY = 0.5
+
+# Bounds on the interval between two crawls of the same product
+MIN_INTERVAL = 6 * 3600
+MAX_INTERVAL = 60 * DAY
+
+
+def _timestamp(value):
+    """
+    Convert an ISO date to a Unix timestamp (None when it cannot be parsed).
+    Naive dates are local time, as written by the scraper.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+def count_changes(entries, date_key, value_key):
+    """
+    Count value changes in a history and return (changes, first date, last date)
+    """
+    points = sorted(
+        (timestamp, entry.get(value_key))
+        for entry in entries or []
+        if isinstance(entry, dict) and (timestamp := _timestamp(entry.get(date_key))) is not None
+    )
+    if not points:
+        return 0, None, None
+
+    changes = sum(1 for (_, previous), (_, current) in zip(points, points[1:]) if current != previous)
+    return changes, points[0][0], points[-1][0]
+
+
+def estimate_change_rate(product, now):
+    """
+    Estimate a product's change rate from its price and availability histories
+
+    Returns:
+        Tuple (changes per day, timestamp of the latest known change or observation)
+    """
+    price_changes, price_first, price_last = count_changes(product.get("priceTable"), "date_price", "price")
+    availability_changes, availability_first, availability_last = count_changes(
+        product.get("availabilityTable"), "date_availability", "availability"
+    )
+
+    starts = [t for t in (price_first, availability_first, _timestamp(product.get("date_creation"))) if t]
+    lasts = [t for t in (price_last, availability_last) if t]
+
+    observed_days = max(0.0, (now - min(starts)) / DAY) if starts else 0.0
+    rate = (price_changes + availability_changes + PRIOR_CHANGES) / (observed_days + PRIOR_DAYS)
+    last_seen = max(lasts) if lasts else (min(starts) if starts else None)
+    return rate, last_seen
+
+
+def popularity_weight(product):
+    """
+    Weight of a product's changes: popular products matter more to users
+    """
+    clicks = (product.get("clicks") or 0) + (product.get("clicksExternal") or 0)
+    try:
+        return 1.0 + math.log1p(max(0.0, float(clicks)))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class CrawlScheduler:
+    """
+    Per-product change rates, popularity and last crawl times
+    """
+
+    def __init__(self, schedule_path=SCHEDULE_PATH):
+        self.schedule_path = schedule_path
+        self.products = {}       # uniqueID -> (rate per day, weight)
+        self.last_crawled = {}   # uniqueID -> Unix timestamp
+        self.crawled = 0
+        self.changed = 0
+        self._lock = threading.Lock()
+
+    def load(self, products=None, now=None):
+        """
+        Compute rates for known products and read the last crawl times
+
+        Args:
+            products: Iterable of product dictionaries; defaults to streaming
+                the products snapshot
+            now: Current Unix timestamp
+        """
+        now = now or time.time()
+        if products is None:
+            products = snapshot.iter_products()
+
+        if os.path.exists(self.schedule_path):
+            with open(self.schedule_path, "r", encoding="utf-8") as f:
+                self.last_crawled = json.load(f)
+
+        for product in products:
+            product_id = product.get("uniqueID")
+            if not product_id:
+                continue
+            rate, last_seen = estimate_change_rate(product, now)
+            self.products[product_id] = (rate, popularity_weight(product))
+            if product_id not in self.last_crawled and last_seen:
+                self.last_crawled[product_id] = last_seen
+
+        print(f"Scheduler loaded {len(self.products)} products")
+        return self
+
+    def expected_value(self, product_id, now=None):
+        """
+        Weighted probability that the product changed since its last crawl.
+        Unknown or never crawled products have the highest value.
+        """
+        known = self.products.get(product_id)
+        last = self.last_crawled.get(product_id)
+        if known is None or last is None:
+            return math.inf
+
+        rate, weight = known
+        elapsed_days = max(0.0, ((now or time.time()) - last) / DAY)
+        return weight * (1.0 - math.exp(-rate * elapsed_days))
+
+    def next_due(self, product_id):
+        """
+        Unix timestamp at which the product becomes due for a recrawl
+        """
+        known = self.products.get(product_id)
+        last = self.last_crawled.get(product_id)
+        if known is None or last is None:
+            return 0.0
+
+        rate, weight = known
+        # Solve weight * (1 - exp(-rate * t)) = DUE_PROBABILITY for t:
+        # popular products become due sooner
+        target = min(DUE_PROBABILITY / weight, 0.99)
+        interval = -math.log(1.0 - target) / rate * DAY
+        return last + min(max(interval, MIN_INTERVAL), MAX_INTERVAL)
+
+    def is_due(self, product_id, now=None):
+        return self.next_due(product_id) <= (now or time.time())
+
+    def due(self, now=None):
+        """
+        Known products that are due, most overdue first
+        """
+        now = now or time.time()
+        heap = [(self.next_due(product_id), product_id) for product_id in self.products]
+        heapq.heapify(heap)
+        result = []
+        while heap and heap[0][0] <= now:
+            result.append(heapq.heappop(heap)[1])
+        return result
+
+    def plan(self, budget, now=None):
+        """
+        Pick the `budget` products with the highest expected detected changes
+        """
+        now = now or time.time()
+        return heapq.nlargest(budget, self.products, key=lambda product_id: self.expected_value(product_id, now))
+
+    def record_crawl(self, product_id, changed, now=None):
+        """
+        Remember that a product was crawled and whether it had changed
+        """
+        with self._lock:
+            self.last_crawled[product_id] = now or time.time()
+            self.crawled += 1
+            if changed:
+                self.changed += 1
+
+    def save(self):
+        """
+        Persist the last crawl times for the next run
+        """
+        with self._lock:
+            data = dict(self.last_crawled)
+        tmp_path = self.schedule_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.schedule_path)
+        print(f"Scheduler: {self.changed} of {self.crawled} crawled products had changed")
+
+
+class ScheduledQueue(queue.Queue):
+    """
+    Queue of product IDs served by expected value instead of arrival order.
+
+    Args:
+        scheduler: A loaded CrawlScheduler
+        only_due: Drop known products that are not due yet (scheduled mode)
+        max_fetches: Stop serving IDs after this many (budget mode)
+        deadline: Stop serving IDs after this Unix timestamp (budget mode)
+    """
+
+    def __init__(self, scheduler, only_due=False, max_fetches=None, deadline=None):
+        super().__init__()
+        self.scheduler = scheduler
+        self.only_due = only_due
+        self.max_fetches = max_fetches
+        self.deadline = deadline
+        self.served = 0
+        self.skipped = 0
+
+    def _init(self, maxsize):
+        self.queue = []
+        self.queued = set()
+        self.requeued = set()
+
+    def requeue(self, product_id):
+        """
+        Put back an ID that failed, even if it was already served or is not due
+        """
+        with self.mutex:
+            self.requeued.add(product_id)
+        self.put(product_id)
+
+    def put(self, product_id, block=True, timeout=None):
+        """
+        Queue an ID, unless it was already queued this run or is not due.
+        Dropped IDs never reach the queue, so they are not unfinished tasks.
+        """
+        with self.mutex:
+            if product_id in self.requeued:
+                self.requeued.discard(product_id)
+            elif product_id in self.queued:
+                # Each product is fetched at most once per run
+                return
+            elif self.only_due and not self.scheduler.is_due(product_id):
+                self.skipped += 1
+                return
+            self.queued.add(product_id)
+        super().put(product_id, block, timeout)
+
+    def _qsize(self):
+        return 0 if self.exhausted() else len(self.queue)
+
+    def _put(self, product_id):
+        heapq.heappush(self.queue, (-self.scheduler.expected_value(product_id), product_id))
+
+    def _get(self):
+        self.served += 1
+        return heapq.heappop(self.queue)[1]
+
+    def exhausted(self):
+        """
+        Whether the fetch budget or the deadline has been reached
+        """
+        if self.max_fetches is not None and self.served >= self.max_fetches:
+            return True
+        return self.deadline is not None and time.time() >= self.deadline
@@ -1,4 +1,3 @@
-from playwright.sync_api import sync_playwright
 import json
 import re
 import sys
@@ -6,6 +5,20 @@ import time
 import os
 from dotenv import load_dotenv
 import logging
+from scraper.rate_control import controller, TIMEOUT, THROTTLED, ERROR
+from scraper.browser_pool import borrow
+from scraper import fixtures, site
+from scraper.retry import CircuitBreaker, DeadLetters, backoff_delay, PAGE_ATTEMPTS
+
+# Listing pages skipped in a row (after all their attempts) before giving up
+MAX_SKIPPED_PAGES = 3
+
+# Stop after this many listing pages (0: walk the whole listing), for short
+# runs such as recording fixtures
+MAX_PAGES = int(os.getenv("MAX_PAGES", 0))
+
+# Backup of the IDs collected by the last run
+IDS_BACKUP_PATH = "output/barbechli_product_ids.json"
 
 # load_dotenv()
 # logger = logging.getLogger(__name__)
@@ -18,7 +31,8 @@ import logging
 #     # For local development
 #     logger.info("Running in local development mode")
 
-def collect_ids_thread(id_queue, stop_event, params=None, start_page=1):
+def collect_ids_thread(id_queue, stop_event, params=None, start_page=1, seen_ids=None, known_pages_stop=None,
+                       browser_pool=None):
     """
     Thread function that collects product IDs and adds them to the queue
     as they are found, for immediate processing by the product details scraper.
@@ -28,6 +42,11 @@ def collect_ids_thread(id_queue, stop_event, params=None, start_page=1):
         stop_event: Event to signal when ID collection is complete
         params: Parameters for the product search
         start_page: Page to start collection from
+        seen_ids: Optional SeenIds; IDs already seen this run are not queued again
+        known_pages_stop: Incremental discovery: stop after this many consecutive
+            pages with only IDs known from previous runs (requires seen_ids)
+        browser_pool: Optional BrowserPool to borrow a page from instead of
+            launching a browser
     """
     # Set default parameters if none provided
     if params is None:
@@ -42,36 +61,64 @@ def collect_ids_thread(id_queue, stop_event, params=None, start_page=1):
     all_ids = []  # Keep track of all IDs for a single backup file
     current_page = start_page
     last_page_reached = False
+    known_pages = 0  # Consecutive pages without a new product ID
+    limiter = controller.limiter("search")
+    breaker = CircuitBreaker("search")
+    dead_letters = DeadLetters()
+    page_attempts = 0  # Failed attempts on the current page
+    skipped_pages = 0  # Consecutive pages skipped after all their attempts
+    
+    # A ScheduledQueue with a budget stops accepting work once it is spent
+    budget_spent = getattr(id_queue, "exhausted", lambda: False)
+    
+    # Listing pages that failed in the previous run, retried once the listing is done
+    retry_urls = dead_letters.take("page")
+    if retry_urls:
+        print(f"Retrying {len(retry_urls)} listing pages that failed in the previous run")
     
     try:
-        with sync_playwright() as p:
-            # Launch the browser
-            browser = p.chromium.launch(headless=True)  # Set to True for production
-            page = browser.new_page(viewport={"width": 1000, "height": 400})
-            
-            while not last_page_reached and not stop_event.is_set():
-                # Update page number parameter
-                params["pagenumber"] = str(current_page)
-                
-                # Build the URL with parameters
-                base_url = "https://barbechli.tn/search"
-                url_parts = []
+        with borrow(browser_pool) as lease:
+            while not stop_event.is_set():
+                if budget_spent():
+                    print(f"Fetch budget spent, stopping the listing at page {current_page}")
+                    break
                 
-                for key, value in params.items():
-                    url_parts.append(f"{key}={value}")
+                # The lease replaces its page from time to time
+                page = lease.page
+                retrying = last_page_reached
                 
-                full_url = base_url + ";" + ";".join(url_parts)
-                print(f"\nScraping page {current_page}: {full_url}")
+                if retrying and page_attempts == 0:
+                    if not retry_urls:
+                        break
+                    full_url = retry_urls.pop(0)
+                    print(f"\nRetrying page from the previous run: {full_url}")
+                elif not retrying:
+                    # Update page number parameter
+                    params["pagenumber"] = str(current_page)
+                    
+                    # Build the URL with parameters
+                    url_parts = []
+                    
+                    for key, value in params.items():
+                        url_parts.append(f"{key}={value}")
+                    
+                    full_url = site.SEARCH_URL + ";" + ";".join(url_parts)
+                    print(f"\nScraping page {current_page}: {full_url}")
                 
                 # Reset capture flag for this page
                 response_captured = False
                 page_products = None
+                throttled = False
                 
                 # Listen for response events
                 def handle_response(response):
-                    nonlocal response_captured, page_products
+                    nonlocal response_captured, page_products, throttled
                     url = response.url
-                    if "https://barbechli.tn/find/?q=" in url and "orderby" in url:
+                    if site.FIND_URL in url and "orderby" in url:
+                        fixtures.record_response(response, full_url)
+                        if response.status == 429:
+                            throttled = True
+                            return
                         try:
                             xhr_data = response.json()
                             print(f"Captured XHR response")
@@ -86,69 +133,130 @@ def collect_ids_thread(id_queue, stop_event, params=None, start_page=1):
                 # Set up the response listener
                 page.on("response", handle_response)
                 
-                # Navigate to the page
-                page.goto(full_url)
-                
-                # Wait until response is captured
-                wait_start = time.time()
-                timeout = 30  # seconds
-                while not response_captured:
-                    if time.time() - wait_start > timeout:
-                        print(f"Timed out waiting for response on page {current_page}")
-                        break
-                    page.wait_for_timeout(100)
+                # Navigate to the page, paced by the search endpoint's limiter
+                # and paused while the search circuit is open
+                breaker.wait()
+                with limiter.slot() as slot:
+                    try:
+                        page.goto(full_url)
+                        
+                        # Wait until response is captured
+                        wait_start = time.time()
+                        timeout = 30  # seconds
+                        while not response_captured and not throttled:
+                            if time.time() - wait_start > timeout:
+                                print(f"Timed out waiting for response on page {current_page}")
+                                break
+                            page.wait_for_timeout(100)
+                    except Exception as e:
+                        print(f"Error loading page {current_page}: {e}")
+                        slot.outcome = ERROR
+                    
+                    if throttled:
+                        slot.outcome = THROTTLED
+                        print(f"Rate limited (HTTP 429) on page {current_page}")
+                    elif not response_captured and slot.outcome != ERROR:
+                        slot.outcome = TIMEOUT
                 
                 # Remove the event listener to avoid duplicate handlers
                 page.remove_listener("response", handle_response)
+                lease.navigated()
                 
-                # Check if we've reached the last page (empty response)
-                if page_products is not None:
-                    if len(page_products) == 0:
-                        print(f"Reached last page at page {current_page} (empty response)")
+                if page_products is None:
+                    breaker.record_failure()
+                    page_attempts += 1
+                    if page_attempts < PAGE_ATTEMPTS:
+                        # Try the same page again after a jittered backoff
+                        delay = backoff_delay(page_attempts)
+                        print(f"No response captured for page {current_page}, "
+                              f"retrying in {delay:.1f}s (attempt {page_attempts + 1}/{PAGE_ATTEMPTS})")
+                        stop_event.wait(delay)
+                        continue
+                    
+                    if retrying:
+                        # Failed in two runs in a row: expire it rather than
+                        # retrying a page whose content has likely moved
+                        print(f"No response captured for {full_url} again, dropping it")
+                        page_attempts = 0
+                        continue
+                    
+                    # Skip the page rather than truncating the crawl
+                    dead_letters.add(full_url, "page", slot.outcome, page_attempts)
+                    page_attempts = 0
+                    skipped_pages += 1
+                    if skipped_pages >= MAX_SKIPPED_PAGES:
+                        print(f"No response captured for {skipped_pages} pages in a row, stopping")
                         last_page_reached = True
                     else:
-                        # Process each product and add its ID to the queue immediately
-                        page_ids_count = 0
-                        for product in page_products:
-                            if "uniqueID" in product:
-                                product_id = product["uniqueID"]
-                                # Add to queue for immediate processing
-                                id_queue.put(product_id)
-                                # Also add to our complete list for backup
-                                all_ids.append(product_id)
-                                page_ids_count += 1
-                                total_ids_found += 1
-                        
-                        print(f"Added {page_ids_count} product IDs to queue from page {current_page}")
-                        print(f"Total product IDs collected so far: {total_ids_found}")
-                        
-                        # Save all IDs to a single backup file periodically
-                        if current_page % 3 == 0:  # Save every 3 pages to avoid excessive disk writes
-                            try:
-                                with open("output/barbechli_product_ids.json", "w", encoding="utf-8") as f:
-                                    json.dump(all_ids, f, indent=2, ensure_ascii=False)
-                                print(f"Saved backup of {len(all_ids)} IDs to output/barbechli_product_ids.json")
-                            except Exception as e:
-                                print(f"Error saving IDs to backup file: {e}")
-                        
-                        # Move to next page
+                        print(f"No response captured for page {current_page}, skipping it")
                         current_page += 1
-                else:
-                    print(f"No response captured for page {current_page}, stopping")
+                    continue
+                
+                breaker.record_success()
+                page_attempts = 0
+                skipped_pages = 0
+                
+                # Check if we've reached the last page (empty response)
+                if len(page_products) == 0 and not retrying:
+                    print(f"Reached last page at page {current_page} (empty response)")
                     last_page_reached = True
+                else:
+                    # Process each product and add its ID to the queue immediately
+                    page_ids_count = 0
+                    page_has_new_id = False
+                    for product in page_products:
+                        if "uniqueID" in product:
+                            product_id = product["uniqueID"]
+                            if seen_ids is not None:
+                                first_this_run, known = seen_ids.add(product_id)
+                                page_has_new_id = page_has_new_id or not known
+                                if not first_this_run:
+                                    # Already queued from an earlier page
+                                    continue
+                            # Add to queue for immediate processing
+                            id_queue.put(product_id)
+                            # Also add to our complete list for backup
+                            all_ids.append(product_id)
+                            page_ids_count += 1
+                            total_ids_found += 1
+                    
+                    print(f"Added {page_ids_count} product IDs to queue from "
+                          f"{full_url if retrying else f'page {current_page}'}")
+                    print(f"Total product IDs collected so far: {total_ids_found}")
+                    if retrying:
+                        # The listing itself is done: no paging or early stop
+                        continue
+                    
+                    known_pages = 0 if page_has_new_id else known_pages + 1
+                    if seen_ids is not None and known_pages_stop and known_pages >= known_pages_stop:
+                        print(f"No new product IDs in the last {known_pages} pages, stopping at page {current_page}")
+                        last_page_reached = True
+                    
+                    # Save all IDs to a single backup file periodically
+                    if current_page % 3 == 0:  # Save every 3 pages to avoid excessive disk writes
+                        try:
+                            with open(IDS_BACKUP_PATH, "w", encoding="utf-8") as f:
+                                json.dump(all_ids, f, indent=2, ensure_ascii=False)
+                            print(f"Saved backup of {len(all_ids)} IDs to {IDS_BACKUP_PATH}")
+                        except Exception as e:
+                            print(f"Error saving IDs to backup file: {e}")
+                    
+                    # Move to next page
+                    current_page += 1
+                    if MAX_PAGES and current_page - start_page >= MAX_PAGES:
+                        print(f"Reached the limit of {MAX_PAGES} pages")
+                        last_page_reached = True
             
             # Save final backup of all IDs
             if all_ids:
                 try:
-                    with open("output/barbechli_product_ids.json", "w", encoding="utf-8") as f:
+                    with open(IDS_BACKUP_PATH, "w", encoding="utf-8") as f:
                         json.dump(all_ids, f, indent=2, ensure_ascii=False)
-                    print(f"Saved final backup of {len(all_ids)} IDs to output/barbechli_product_ids.json")
+                    print(f"Saved final backup of {len(all_ids)} IDs to {IDS_BACKUP_PATH}")
                 except Exception as e:
                     print(f"Error saving IDs to backup file: {e}")
             
-            # Close the browser when done
-            browser.close()
-            print("\nID collector browser closed")
+            print("\nID collector browser page closed")
             
             print(f"Total product IDs added to queue: {total_ids_found}")
     
@@ -156,6 +264,14 @@ def collect_ids_thread(id_queue, stop_event, params=None, start_page=1):
         print(f"Error in ID collector thread: {e}")
     
     finally:
+        if seen_ids is not None:
+            try:
+                print(f"New product IDs this run: {len(seen_ids.new_ids)}")
+                seen_ids.save()
+            except Exception as e:
+                print(f"Error saving seen product IDs: {e}")
+        
+
         # Signal that we're done collecting IDs
         print("ID collection completed, setting stop event")
         stop_event.set()
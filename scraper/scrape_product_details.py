@@ -1,6 +1,5 @@
 import logging
 from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright
 import json
 import time
 import sys
@@ -9,6 +8,21 @@ import queue
 import os
 from collections import Counter
 from data_manager import data_manager
+from scraper.rate_control import controller, ENDPOINT_LIMITS, OK, TIMEOUT, THROTTLED, EMPTY, ERROR
+from scraper.retry import CircuitBreaker, RetryTracker
+from scraper.browser_pool import borrow
+from scraper import fixtures, site
+
+# Browser threads fetching product pages; the rate controller decides how many
+# of them have a fetch in flight at any time. Unset: one thread per slot of the
+# product limiter when the workers share the browser pool, and the limiter's
+# initial value otherwise, since each worker then launches its own Chromium.
+DETAIL_WORKERS = int(os.getenv("DETAIL_WORKERS", 0)) or None
+
+# Changed products are written to the JSON file in batches: after this many
+# changes, or once this many seconds have passed since the last save
+SAVE_EVERY_CHANGES = int(os.getenv("SAVE_EVERY_CHANGES", 25))
+SAVE_INTERVAL_SECONDS = float(os.getenv("SAVE_INTERVAL_SECONDS", 60))
 
 # load_dotenv()
 # logger = logging.getLogger(__name__)
@@ -22,27 +36,133 @@ from data_manager import data_manager
 #     logger.info("Running in local development mode")
 
 
-def get_product_details(id_queue, stop_event):
+class IncrementalSaver:
+    """
+    Batches the incremental saves of the products shared by the detail workers
+    """
+
+    def __init__(self, products_dict, save_lock, every=SAVE_EVERY_CHANGES, interval=SAVE_INTERVAL_SECONDS):
+        self.products_dict = products_dict
+        self.save_lock = save_lock
+        self.every = every
+        self.interval = interval
+        self.unsaved = 0
+        self.saves = 0
+        self.saved_at = time.monotonic()
+        self._write_lock = threading.Lock()
+
+    def changed(self):
+        """
+        Count a changed product; call it with save_lock held
+
+        Returns:
+            True when a save is due, which the caller then runs with save()
+            after releasing save_lock
+        """
+        self.unsaved += 1
+        if self.unsaved < self.every and time.monotonic() - self.saved_at < self.interval:
+            return False
+        self.unsaved = 0
+        self.saved_at = time.monotonic()
+        return True
+
+    def save(self):
+        """
+        Write the products file. save_lock is only taken per product, so the
+        other workers keep updating products during the write.
+        """
+        # One write at a time; changes missed by a skipped save go into the next one
+        if not self._write_lock.acquire(blocking=False):
+            return
+        try:
+            data_manager.save_products_data(self.products_dict, is_incremental=True, lock=self.save_lock)
+            self.saves += 1
+        finally:
+            self._write_lock.release()
+
+
+def get_product_details(id_queue, stop_event, scheduler=None, workers=DETAIL_WORKERS, browser_pool=None):
     """
     Process product details from a queue that's being filled by the ID collector
     
     Args:
         id_queue: Queue containing product IDs to process
         stop_event: Event to signal when ID collection is complete
+        scheduler: Optional CrawlScheduler recording when each product was crawled
+        workers: Number of browser threads sharing the queue (see DETAIL_WORKERS)
+        browser_pool: Optional BrowserPool the workers borrow pages from instead
+            of launching a browser each
     """
+    if workers is None:
+        limits = ENDPOINT_LIMITS["product"]
+        workers = limits["maximum"] if browser_pool is not None else limits["initial"]
+    
     # Load existing data
     _, existing_products_dict = data_manager.load_existing_data()
     
-    # Initialize counters
-    processed = 0
+    # The limit cannot usefully grow beyond the threads that fetch
+    limiter = controller.limiter("product")
+    limiter.maximum = min(limiter.maximum, max(1, workers))
+    limiter.limit = min(limiter.limit, limiter.maximum)
     
-    with sync_playwright() as p:
-        # Launch the browser
-        browser = p.chromium.launch(headless=True)  
-        page = browser.new_page(viewport={"width": 1000, "height": 400})
-        
-        # Continue processing as long as we're not stopped and there might be more IDs
-        while not stop_event.is_set() or not id_queue.empty():
+    # Updates and saves of the shared products dictionary are serialized
+    save_lock = threading.Lock()
+    saver = IncrementalSaver(existing_products_dict, save_lock)
+    progress = Counter()
+    
+    # Failed fetches are retried with backoff; workers pause while the site fails
+    retries = RetryTracker()
+    breaker = CircuitBreaker("product")
+    
+    # Products that failed every attempt in the previous run come first
+    dead_letter_ids = retries.dead_letters.take("product")
+    for product_id in dead_letter_ids:
+        getattr(id_queue, "requeue", id_queue.put)(product_id)
+    if dead_letter_ids:
+        print(f"Requeued {len(dead_letter_ids)} products that failed in the previous run")
+    
+    worker_threads = [
+        threading.Thread(
+            target=_detail_worker,
+            args=(id_queue, stop_event, existing_products_dict, save_lock, saver, progress, scheduler, retries,
+                  breaker, browser_pool),
+            name=f"detail-worker-{i + 1}",
+        )
+        for i in range(max(1, workers))
+    ]
+    for thread in worker_threads:
+        thread.start()
+    for thread in worker_threads:
+        thread.join()
+    
+    print(f"Rate control: {controller.summary()}")
+    print(f"Retries: {retries.summary()}, product circuit opened {breaker.trips} times")
+    print(f"Incremental saves: {saver.saves}")
+    controller.save_metrics()
+    
+    if scheduler is not None:
+        scheduler.save()
+    
+    # Save all product details one final time
+    if existing_products_dict:
+        data_manager.save_products_data(existing_products_dict, is_final=True)
+    else:
+        print("No product details were collected")
+    
+    return existing_products_dict
+
+
+def _detail_worker(id_queue, stop_event, existing_products_dict, save_lock, saver, progress, scheduler, retries,
+                   breaker, browser_pool):
+    """
+    One browser fetching product pages from the queue until it is drained
+    """
+    limiter = controller.limiter("product")
+    
+    with borrow(browser_pool) as lease:
+        # Continue processing as long as we're not stopped and there might be more IDs,
+        # including failed ones waiting for their retry
+        while not stop_event.is_set() or not id_queue.empty() or retries.pending():
             try:
                 # Get an ID from the queue, wait up to 1 second
                 try:
@@ -51,29 +171,39 @@ def get_product_details(id_queue, stop_event):
                     # No ID available yet, continue waiting
                     continue
                 
-                processed += 1
+                # The lease replaces its page from time to time
+                page = lease.page
+                
+                with save_lock:
+                    progress["processed"] += 1
+                    processed = progress["processed"]
                 print(f"\nProcessing product #{processed}: {product_id}")
                 
                 # Build the product URL
-                product_url = f"https://barbechli.tn/product/{product_id}"
+                product_url = site.product_url(product_id)
                 
                 # Reset capture flag for this product
                 response_captured = False
                 product_data = None
+                throttled = False
                 
                 # Listen for XHR response events
                 def handle_response(response):
-                    nonlocal response_captured, product_data
+                    nonlocal response_captured, product_data, throttled
                     url = response.url
                     # Capture the XHR request containing product details
-                    if "https://barbechli.tn/find/?q={%22uid" in url:
+                    if site.PRODUCT_FIND_URL in url:
+                        fixtures.record_response(response, product_url)
+                        if response.status == 429:
+                            throttled = True
+                            return
                         try:
                             xhr_data = response.json()
                             # print(f"Captured product XHR response")
                             # The product data is in the response field
                             if "response" in xhr_data and xhr_data["response"]:
                                 product_data = xhr_data["response"]
-                                response_captured = True
+                            response_captured = True
                         except Exception as e:
                             print(f"Failed to parse response from: {url}")
                             print(f"Error: {e}")
@@ -82,39 +212,66 @@ def get_product_details(id_queue, stop_event):
                 page.on("response", handle_response)
                 
                 # Navigate to the product page
+                slot = None
                 try:
-                    page.goto(product_url)
+                    breaker.wait()
+                    with limiter.slot() as slot:
+                        page.goto(product_url)
+                        
+                        # Wait until response is captured
+                        wait_start = time.time()
+                        timeout = 15  # seconds - shorter for product pages
+                        while not response_captured and not throttled:
+                            if time.time() - wait_start > timeout:
+                                print(f"Timed out waiting for response for product {product_id}")
+                                break
+                            page.wait_for_timeout(100)
+                        
+                        if throttled:
+                            slot.outcome = THROTTLED
+                            print(f"Rate limited (HTTP 429) on product {product_id}")
+                        elif not response_captured:
+                            slot.outcome = TIMEOUT
+                        elif not product_data:
+                            slot.outcome = EMPTY
                     
-                    # Wait until response is captured
-                    wait_start = time.time()
-                    timeout = 15  # seconds - shorter for product pages
-                    while not response_captured:
-                        if time.time() - wait_start > timeout:
-                            print(f"Timed out waiting for response for product {product_id}")
-                            break
-                        page.wait_for_timeout(100)
+                    if slot.outcome == OK:
+                        breaker.record_success()
+                        retries.succeeded(product_id)
+                    else:
+                        breaker.record_failure()
+                        retries.failed(product_id, id_queue, slot.outcome)
                     
                     # Process and store the product data if captured
                     if product_data and len(product_data) > 0:
-                        # Update the product in our collection
-                        updated = data_manager.update_product(existing_products_dict, product_id, product_data)
-                        
-                        if updated:
-                            # Save right away after each product to prevent data loss
-                            data_manager.save_products_data(existing_products_dict, is_incremental=True)
-                            # print(f"Product saved immediately: {product_id}")
+                        save_due = False
+                        with save_lock:
+                            # Update the product in our collection
+                            updated = data_manager.update_product(existing_products_dict, product_id, product_data)
+                            
+                            if scheduler is not None and updated:
+                                scheduler.record_crawl(product_id, changed=updated != "unchanged")
                             
-                            # Also do a more comprehensive save every 1 products
-                            if processed % 1 == 0:
-                                data_manager.save_products_data(existing_products_dict)
-                                print(f"Progress milestone: {processed} products processed in this session")
-                        else:
-                            print(f"No data captured for product {product_id}")
+                            if updated == "unchanged":
+                                # Same content as last time: nothing new to save
+                                print(f"Product unchanged, write skipped: {product_id}")
+                            elif updated:
+                                # Saved with the next batch (and by the final save)
+                                save_due = saver.changed()
+                            else:
+                                print(f"No data captured for product {product_id}")
+                        
+                        if save_due:
+                            saver.save()
                     else:
                         print(f"No data captured for product {product_id}")
                 
                 except Exception as e:
                     print(f"Error processing product {product_id}: {e}")
+                    if slot is not None and slot.outcome == ERROR:
+                        # The page itself failed to load
+                        breaker.record_failure()
+                        retries.failed(product_id, id_queue, ERROR)
                 
                 finally:
                     # Remove the event listener to avoid duplicate handlers
@@ -122,17 +279,15 @@ def get_product_details(id_queue, stop_event):
                     # Mark task as done
                     id_queue.task_done()
                 
+                lease.navigated()
+                
+                if processed % 50 == 0:
+                    print(f"Rate control: {controller.summary()}")
+                    controller.save_metrics()
+                    if browser_pool is not None:
+                        print(f"Browser pool: {browser_pool.metrics()}")
+                
             except Exception as e:
                 print(f"Error in product processing loop: {e}")
         
-        # Close the browser when done
-        browser.close()
-        print("\nBrowser closed")
-    
-    # Save all product details one final time
-    if existing_products_dict:
-        data_manager.save_products_data(existing_products_dict, is_final=True)
-    else:
-        print("No product details were collected")
-    
-    return existing_products_dict
+        print(f"\nBrowser page closed ({threading.current_thread().name})")
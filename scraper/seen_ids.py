@@ -0,0 +1,85 @@
+"""
+Persistent set of product IDs already discovered by the collector.
+
+The IDs are kept in a sorted text file (one ID per line) and loaded into a
+set; a few hundred thousand IDs take a few tens of MB, so no probabilistic
+structure is needed. The set is used to:
+- queue each product ID at most once per run, even when listing pages overlap
+- stop paginating in incremental mode once K consecutive pages only contain
+  IDs known from previous runs (use with orderby=date so new products come first)
+"""
+
+import json
+import os
+import threading
+
+SEEN_IDS_PATH = "output/seen_ids.txt"
+
+# Backup written by the collector, used to seed the set on the first run
+IDS_BACKUP_PATH = "output/barbechli_product_ids.json"
+
+
+class SeenIds:
+    """
+    IDs known from previous runs plus the IDs seen during this run
+    """
+
+    def __init__(self, path=SEEN_IDS_PATH):
+        self.path = path
+        self.known = set()     # Seen in previous runs
+        self.current = set()   # Seen during this run
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Read the seen-ID file, or seed it from the collector's ID backup
+        """
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.known = {line.strip() for line in f if line.strip()}
+        elif os.path.exists(IDS_BACKUP_PATH):
+            try:
+                with open(IDS_BACKUP_PATH, "r", encoding="utf-8") as f:
+                    self.known = set(json.load(f))
+            except (json.JSONDecodeError, TypeError) as e:
+                print(f"Could not seed seen IDs from {IDS_BACKUP_PATH}: {e}")
+
+        print(f"Loaded {len(self.known)} known product IDs")
+        return self
+
+    def add(self, product_id):
+        """
+        Record an ID seen during this run
+
+        Returns:
+            Tuple (first time this run, known from a previous run)
+        """
+        with self._lock:
+            if product_id in self.current:
+                return False, product_id in self.known
+            self.current.add(product_id)
+            return True, product_id in self.known
+
+    @property
+    def new_ids(self):
+        """
+        IDs discovered for the first time during this run
+        """
+        return self.current - self.known
+
+    def save(self):
+        """
+        Merge this run's IDs into the file, sorted, replacing it atomically
+        """
+        with self._lock:
+            self.known |= self.current
+            ids = sorted(self.known)
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for product_id in ids:
+                f.write(product_id)
+                f.write("\n")
+        os.replace(tmp_path, self.path)
+        print(f"Saved {len(ids)} known product IDs to {self.path}")
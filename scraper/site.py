@@ -0,0 +1,21 @@
+"""
+Addresses of the barbechli.tn site.
+
+Set BARBECHLI_BASE_URL to point the scrapers at another server, such as the
+fixture replay server in scraper/mock_server.py.
+"""
+
+import os
+
+BASE_URL = os.getenv("BARBECHLI_BASE_URL", "https://barbechli.tn").rstrip("/")
+
+# Listing pages: SEARCH_URL;key=value;key=value
+SEARCH_URL = BASE_URL + "/search"
+
+# XHR requests made by the site's pages, carrying the data the scrapers read
+FIND_URL = BASE_URL + "/find/?q="
+PRODUCT_FIND_URL = FIND_URL + "{%22uid"
+
+
+def product_url(product_id):
+    return f"{BASE_URL}/product/{product_id}"